@@ -0,0 +1,96 @@
+"""
+Guibot command line.
+
+Usage: python . run automations/*.a.py [--in-process] [--watch] [--status-interval SECONDS]
+       python . record session.gblog
+       python . replay session.gblog [--speed 2] [--max-idle 1]
+       python . control trigger greet --args '["world"]' [--wait] [--address ~/.guibot/control.sock]
+"""
+from argparse import ArgumentParser
+from src.supervisor import Supervisor, discover
+
+
+def main():
+    parser = ArgumentParser(prog="guibot", description="Run and supervise guibot automations.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="run automation scripts under a supervisor, one worker process per group")
+    run.add_argument('patterns', nargs='+',
+                     help="automation files, directories or globs; join files with ',' to run them in one worker")
+    run.add_argument('--in-process', action='store_true',
+                     help="run every group in this process instead of separate worker processes")
+    run.add_argument('--watch', action='store_true',
+                     help="apply the modifications of the scripts while they run, without restarting them")
+    run.add_argument('--backoff', type=float, default=1.0, help="delay before restarting a crashed worker (default: 1)")
+    run.add_argument('--max-backoff', type=float, default=60.0, help="maximum restart delay (default: 60)")
+    run.add_argument('--heartbeat-timeout', type=float, default=10.0,
+                     help="kill and restart a worker silent for this long, 0 to disable (default: 10)")
+    run.add_argument('--status-interval', type=float, default=0.0,
+                     help="print the status of the workers at this interval, in seconds")
+
+    commands.add_parser('list', help="list the automation scripts found, grouped by worker").add_argument(
+        'patterns', nargs='*', default=['automations'])
+
+    record = commands.add_parser('record', help="record the mouse and keyboard events into a log, until 'esc'")
+    record.add_argument('path', help="path of the log file")
+    record.add_argument('--move-interval', type=float, default=0.01,
+                        help="minimum time between two recorded mouse moves, in seconds (default: 0.01)")
+
+    replay = commands.add_parser('replay', help="play a recorded log back and report the timing error")
+    replay.add_argument('path', help="path of the log file")
+    replay.add_argument('--speed', type=float, default=1.0, help="speed multiplier (default: 1)")
+    replay.add_argument('--max-idle', type=float, default=None,
+                        help="shorten the idle gaps of the recording to this many seconds")
+
+    control = commands.add_parser('control', help="send a request to the control socket of Automation.serve")
+    control.add_argument('request', choices=['list', 'trigger', 'status', 'stop'], help="command of the request")
+    control.add_argument('name', nargs='?', help="name of the automation to trigger or stop")
+    control.add_argument('--args', default='[]', help="JSON list of the arguments of the automation (default: [])")
+    control.add_argument('--kwargs', default='{}', help="JSON object of its keyword arguments (default: {})")
+    control.add_argument('--run', type=int, help="id of the run to query or stop")
+    control.add_argument('--wait', action='store_true', help="answer once the automation triggered is idle")
+    control.add_argument('--timeout', type=float, help="maximum time to wait with --wait, in seconds")
+    control.add_argument('--all', action='store_true', help="stop every run of the process, not only the server")
+    control.add_argument('--address', help="Unix socket path or host:port (default: CONTROL_ADDRESS)")
+
+    arguments = parser.parse_args()
+    if arguments.command == 'control':
+        import json
+        from src.control import ControlClient
+
+        fields = {key: value for key, value in (('name', arguments.name), ('run', arguments.run)) if value is not None}
+        if arguments.request == 'trigger':
+            fields.update(args=json.loads(arguments.args), kwargs=json.loads(arguments.kwargs), wait=arguments.wait)
+            if arguments.timeout is not None:
+                fields['timeout'] = arguments.timeout
+        if arguments.request == 'stop' and arguments.all:
+            fields['all'] = True
+        with ControlClient(arguments.address) as client:
+            response = client.request(arguments.request, **fields)
+        print(json.dumps(response, indent=2))
+        raise SystemExit(0 if response.get('ok') else 1)
+
+    if arguments.command in ('record', 'replay'):
+        from src.automation import Automation
+
+        if arguments.command == 'record':
+            Automation.record(arguments.path, arguments.move_interval)
+        else:
+            print(Automation.replay(arguments.path, arguments.speed, arguments.max_idle).stats)
+        return
+
+    groups = discover(arguments.patterns)
+
+    if arguments.command == 'list':
+        for group in groups:
+            print(", ".join(map(str, group)))
+        return
+
+    if not groups:
+        parser.error("no automation found.")
+    Supervisor(groups, arguments.in_process, arguments.backoff, arguments.max_backoff,
+               arguments.heartbeat_timeout, arguments.watch).run(arguments.status_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,9 @@ from src.automation import Automation
 
 def autoclick():
     mc.click()
-    mc.wait(1)
 
 def main():
-    Automation.loop("Autoclick", autoclick)
+    Automation.loop("Autoclick", autoclick, period=1)
 
 if __name__ == "__main__":
     main()
@@ -8,7 +8,7 @@ def keep_alive():
     mc.move_by_offset(-50, 0, slowly=True)
 
 def main():
-    Automation.loop("keep_alive", keep_alive)
+    Automation.loop("keep_alive", keep_alive, period=2)
 
 if __name__ == "__main__":
     main()
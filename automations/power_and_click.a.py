@@ -1,15 +1,16 @@
 from src.mouse_controller import MouseController as mc
-from src.keyboard_listener import KeyboardListener as kl
 from src.automation import Automation
+from src.parameters import Parameter, ParameterStore
 from src.point import Point
 from src.logger import get_logger
-from collections.abc import Callable
-from typing import Literal
 
 logger = get_logger(__name__)
 
-long_wait = 21.5
-offset = 0.25
+# Tuned with the hotkeys below; the tuned values are kept across restarts.
+# Both stay strictly positive: decrementing below the minimum clamps to it, so the last click always waits.
+MINIMUM = 0.01  # seconds
+long_wait = ParameterStore.define("power_and_click.long_wait", 21.5, minimum=MINIMUM)
+offset = ParameterStore.define("power_and_click.offset", 0.25, minimum=MINIMUM)
 
 def power_and_click():
     """Automation"""
@@ -18,47 +19,24 @@ def power_and_click():
 
     mc.click_at(charge)
     mc.click_at(download, 1)
-    mc.click_at(charge, long_wait)
+    mc.click_at(charge, long_wait.value)
 
-def get_offset(sign: Literal[1, -1]) -> Callable[[], float]:
-    def offset_getter() -> float:
-        return offset * sign
-    return offset_getter
-
-def alter_long_wait(offset_getter: Callable[[], float]):
-    global long_wait
-    offset = offset_getter()
-    if long_wait + offset > 0:
-        long_wait += offset
-        message = f"Long wait time adjusted by {offset} seconds. New long wait time: {long_wait} seconds."
-        print(message)
-        logger.info(message)
-    else:
-        message = "Long wait time cannot be negative. No changes made."
-        print(message)
-        logger.warning(message)
-
-def alter_offset(multiplier: float):
-    global offset
-    if multiplier > 0:
-        offset *= multiplier
-        message = f"Offset adjusted by a factor of {multiplier}. New offset: {offset} seconds."
-        print(message)
-        logger.info(message)
-    else:
-        message = "Multiplier must be greater than zero. No changes made."
-        print(message)
-        logger.warning(message)
+def report(parameter: Parameter):
+    message = f"{parameter.name} adjusted. New value: {parameter.value} seconds."
+    print(message)
+    logger.info(message)
 
 def main():
-    print(f"Press 'p' to increase long wait time by {offset} seconds. Actual value: {long_wait} seconds.")
-    print(f"Press 'm' to decrease long wait time by {offset} seconds. Actual value: {long_wait} seconds.")
-    print(f"Press 'd' to double the offset. Actual value: {offset} seconds.")
-    print(f"Press 'h' to halve the offset. Actual value: {offset} seconds.")
-    kl.listen_for_key_then('p', alter_long_wait, offset_getter=get_offset(1))
-    kl.listen_for_key_then('m', alter_long_wait, offset_getter=get_offset(-1))
-    kl.listen_for_key_then('d', alter_offset, multiplier=2)
-    kl.listen_for_key_then('h', alter_offset, multiplier=0.5)
+    print(f"Press 'p' to increase long wait time by the offset. Actual value: {long_wait.value} seconds.")
+    print(f"Press 'm' to decrease long wait time by the offset. Actual value: {long_wait.value} seconds.")
+    print(f"Press 'd' to double the offset. Actual value: {offset.value} seconds.")
+    print(f"Press 'h' to halve the offset. Actual value: {offset.value} seconds.")
+    long_wait.on_change(report)
+    offset.on_change(report)
+    long_wait.bind_increment('p', offset)
+    long_wait.bind_decrement('m', offset)
+    offset.bind_scale('d', 2)
+    offset.bind_scale('h', 0.5)
     Automation.keystroke("Power and Click", power_and_click, "z")
 
 
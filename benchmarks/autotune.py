@@ -0,0 +1,95 @@
+"""
+Benchmark: auto-tuning the waits of a macro against a simulated application, on the virtual clock of a dry run.
+
+The macro clicks a menu, waits for it to open, clicks an item, waits for a dialog, types a value and waits for it
+to be applied: three hand-picked waits of 0.5, 1.0 and 0.3 seconds. The application takes a random time to
+respond at each step (--jitter around 0.12, 0.35 and 0.05 seconds); a run succeeds when every wait covered it.
+
+Reported: the runs and simulated time the tuning took, the tuned waits, the cycle time of the macro before and
+after, and the failure rate of the macro over --checks runs before and after: tuning must not make the macro
+less reliable, so the failure rate after must not exceed the one before by more than --max-regression.
+
+Usage: python -m benchmarks.autotune [--jitter 0.2] [--checks 1000] [--seed 1]
+"""
+import random
+from argparse import ArgumentParser
+from src.autotune import AutoTuner
+from src.dry_run import DryRun
+from src.keyboard_controller import KeyboardController as kc
+from src.mouse_controller import MouseController as mc
+from src.parameters import ParameterStore
+from src.point import Point
+
+RESPONSES = {'menu': 0.12, 'dialog': 0.35, 'apply': 0.05}  # median response times of the application
+WAITS = {'menu': 0.5, 'dialog': 1.0, 'apply': 0.3}  # hand-picked waits
+
+
+class Application:
+    """ Simulated application: each step takes a random time to respond, drawn again at each run. """
+    def __init__(self, jitter: float, generator: random.Random):
+        self.jitter = jitter
+        self.generator = generator
+        self.responses = {}
+
+    def draw(self):
+        """Draw the response time of each step of the next run."""
+        self.responses = {step: median * self.generator.lognormvariate(0, self.jitter)
+                          for step, median in RESPONSES.items()}
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jitter', type=float, default=0.2, help="spread of the response times (default: 0.2)")
+    parser.add_argument('--checks', type=int, default=1000, help="runs checking the tuned macro (default: 1000)")
+    parser.add_argument('--max-regression', type=float, default=0.005,
+                        help="highest increase of the failure rate accepted after tuning (default: 0.005)")
+    parser.add_argument('--seed', type=int, default=1, help="seed of the response times (default: 1)")
+    arguments = parser.parse_args()
+
+    ParameterStore.use('')
+    application = Application(arguments.jitter, random.Random(arguments.seed))
+    waits = {step: AutoTuner.tunable(f"benchmark.{step}", default) for step, default in WAITS.items()}
+    covered = True
+
+    def macro():
+        nonlocal covered
+        application.draw()
+        covered = True
+        for step, point, text in (('menu', Point(10, 10), None), ('dialog', Point(20, 40), None),
+                                  ('apply', None, "42")):
+            if point is not None:
+                mc.click_at(point, 0)
+            else:
+                kc.typewrite(text, delay=0)
+            kc.wait(waits[step].value)
+            covered = covered and waits[step].value >= application.responses[step]
+
+    def run_times(runs: int) -> tuple[float, float]:
+        """Run the macro, returning its mean cycle time and its failure rate."""
+        failures = 0
+        with DryRun("check") as dry_run:
+            for _ in range(runs):
+                macro()
+                failures += not covered
+        return dry_run.duration / runs, failures / runs
+
+    before, failure_rate_before = run_times(arguments.checks)
+    tuner = AutoTuner(macro, lambda: covered, list(waits.values()))
+    with DryRun("tune") as dry_run:
+        tuner.tune()
+    after, failure_rate_after = run_times(arguments.checks)
+
+    print(f"tuning: {tuner.trials} runs ({tuner.failures} failed), {dry_run.duration:.1f} s simulated, "
+          f"{dry_run.elapsed * 1000:.0f} ms real")
+    print(f"{'wait':>8} {'hand-picked':>12} {'tuned':>8} {'response p50':>13}")
+    for step, wait in waits.items():
+        print(f"{step:>8} {WAITS[step]:>12.3f} {wait.value:>8.3f} {RESPONSES[step]:>13.3f}")
+    print(f"cycle time: {before:.3f} s -> {after:.3f} s ({(1 - after / before) * 100:.0f}% shorter); "
+          f"failure rate: {failure_rate_before:.1%} -> {failure_rate_after:.1%} over {arguments.checks} runs")
+    failed = after >= before or failure_rate_after > failure_rate_before + arguments.max_regression
+    print("FAILED" if failed else "OK")
+    raise SystemExit(failed)
+
+
+if __name__ == "__main__":
+    main()
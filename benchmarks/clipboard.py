@@ -0,0 +1,104 @@
+"""
+Benchmark: multi-keyword and multi-pattern clipboard queries, before and after the snapshot matcher.
+
+The previous implementation is reproduced here: one clipboard read per keyword and a pattern compiled per call.
+Each query is timed on three clipboards:
+
+- memory: the clipboard of the null backend, with a change counter;
+- process: every read starts a process, like pyperclip with xclip or xsel on Linux, without change counter;
+- process+counter: the same, with a change counter, as on Windows and macOS.
+
+Usage: python -m benchmarks.clipboard [--keywords 20]
+"""
+import re
+import subprocess
+from argparse import ArgumentParser
+from tempfile import NamedTemporaryFile
+from timeit import repeat
+from src import backend
+from src.backend import MemoryClipboard
+from src.clipboard import Clipboard
+
+TEXT = "Order 4521 shipped to Mario Rossi, via Roma 12, 00100 Roma. Tracking: IT-99812-XZ."
+
+
+class ProcessClipboard(MemoryClipboard):
+    """ Clipboard whose reads start a process, like pyperclip on Linux. """
+    def __init__(self, counter: bool):
+        super().__init__()
+        self.__file = NamedTemporaryFile('w+', suffix='.txt')
+        if not counter:
+            self.change_count = lambda: None
+
+    def copy(self, text: str):
+        super().copy(text)
+        self.__file.seek(0)
+        self.__file.truncate()
+        self.__file.write(text)
+        self.__file.flush()
+
+    def paste(self) -> str:
+        return subprocess.run(['cat', self.__file.name], capture_output=True, text=True, check=True).stdout
+
+
+class Previous:
+    """ The clipboard queries before the snapshot matcher. """
+    @staticmethod
+    def contains(text: str, case_sensitive: bool = False) -> bool:
+        clipboard_text = backend.clipboard.paste()
+        if not case_sensitive:
+            text = text.lower()
+            clipboard_text = clipboard_text.lower()
+        return text in clipboard_text
+
+    @classmethod
+    def contains_any(cls, keywords: list[str], case_sensitive: bool = False) -> bool:
+        for keyword in keywords:
+            if cls.contains(keyword, case_sensitive):
+                return True
+        return False
+
+    @staticmethod
+    def matches_any(patterns: list[str]) -> bool:
+        for pattern in patterns:
+            if re.compile(pattern).search(backend.clipboard.paste()):
+                return True
+        return False
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--keywords', type=int, default=20, help="number of keywords and patterns (default: 20)")
+    arguments = parser.parse_args()
+
+    # Worst case for the previous implementation: only the last keyword and the last pattern match.
+    keywords = [f"keyword{i}" for i in range(arguments.keywords - 1)] + ["tracking"]
+    patterns = [rf"\bREF-{i}\d+\b" for i in range(arguments.keywords - 1)] + [r"IT-\d{5}-[A-Z]{2}"]
+
+    queries = {
+        'contains_any': (lambda: Previous.contains_any(keywords), lambda: Clipboard.contains_any(keywords)),
+        'matches_any': (lambda: Previous.matches_any(patterns), lambda: Clipboard.matches_any(patterns)),
+    }
+    clipboards = {
+        'memory': MemoryClipboard,
+        'process': lambda: ProcessClipboard(counter=False),
+        'process+counter': lambda: ProcessClipboard(counter=True),
+    }
+
+    print(f"{'clipboard':>16} {'query':>14} {'before (µs)':>12} {'after (µs)':>12} {'speedup':>8}")
+    for clipboard_name, clipboard in clipboards.items():
+        null = backend.use('null')
+        null.clipboard = clipboard()
+        backend.use(null)
+        Clipboard.copy(TEXT)
+        calls = 20 if clipboard_name.startswith('process') else 2000
+
+        for query_name, (before, after) in queries.items():
+            assert before() and after()
+            times = [min(repeat(statement, number=calls, repeat=3)) / calls * 1e6 for statement in (before, after)]
+            print(f"{clipboard_name:>16} {query_name:>14} {times[0]:>12.1f} {times[1]:>12.1f} "
+                  f"{times[0] / times[1]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
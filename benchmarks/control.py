@@ -0,0 +1,88 @@
+"""
+Benchmark: latency of triggering a preloaded automation through the control socket of `Automation.serve`,
+against starting a new Python process that imports guibot.
+
+A no-op automation is served on the null backend, over a Unix domain socket (where the system has them) and over
+TCP on the loopback interface. Each request is sent on a connection kept open, and its response awaited:
+- trigger: {"command": "trigger", "name": "noop"}, which schedules the automation on the WorkerPool;
+- trigger+wait: the same with "wait", answered once the automation has run;
+- status: {"command": "status"}.
+
+The median must stay under --budget.
+
+Usage: python -m benchmarks.control [--requests 2000] [--budget 1.0]
+"""
+import os
+import socket
+import subprocess
+import sys
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from src import backend
+from src.automation import Automation
+from src.control import ControlClient
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Get a percentile of sorted samples."""
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000, help="requests per case (default: 2000)")
+    parser.add_argument('--budget', type=float, default=1.0, help="median latency budget in ms (default: 1)")
+    arguments = parser.parse_args()
+    backend.use('null')
+
+    with TemporaryDirectory() as directory:
+        addresses = {'tcp': f"127.0.0.1:{free_port()}"}
+        if hasattr(socket, 'AF_UNIX'):
+            addresses = {'unix': os.path.join(directory, "control.sock"), **addresses}
+
+        print(f"{'socket':>6} {'request':>13} {'p50 µs':>8} {'p99 µs':>8}")
+        medians = []
+        for kind, address in addresses.items():
+            with redirect_stdout(None):
+                handle = Automation.serve({'noop': lambda: None}, address, blocking=False)
+            requests = {
+                'trigger': {'command': 'trigger', 'name': 'noop'},
+                'trigger+wait': {'command': 'trigger', 'name': 'noop', 'wait': True},
+                'status': {'command': 'status'},
+            }
+            with ControlClient(address, timeout=5) as client:
+                for name, request in requests.items():
+                    samples = []
+                    for _ in range(arguments.requests):
+                        start = perf_counter()
+                        client.request(**request)
+                        samples.append(perf_counter() - start)
+                        handle.server.triggers['noop'].join()
+                    samples.sort()
+                    medians.append(percentile(samples, 0.5))
+                    print(f"{kind:>6} {name:>13} {percentile(samples, 0.5) * 1e6:>8.0f} "
+                          f"{percentile(samples, 0.99) * 1e6:>8.0f}")
+            handle.stop()
+            handle.join(5)
+
+    start = perf_counter()
+    subprocess.run([sys.executable, "-c", "import src.automation"], check=True)
+    print(f"new process importing src.automation: {(perf_counter() - start) * 1000:.0f} ms")
+
+    failed = max(medians) * 1000 > arguments.budget
+    print(f"slowest median {max(medians) * 1e6:.0f} µs, budget {arguments.budget * 1000:.0f} µs: "
+          f"{'FAILED' if failed else 'OK'}")
+    raise SystemExit(failed)
+
+
+def free_port() -> int:
+    """Get a free TCP port of the loopback interface."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+if __name__ == "__main__":
+    main()
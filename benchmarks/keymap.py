@@ -0,0 +1,105 @@
+"""
+Benchmark: typing and hotkeys through the keycode table, against one backend call per key event.
+
+The null backend sends nothing, so it is given the cost of an X11 display: --round-trip microseconds per round
+trip to the server. Like pynput on X11, a key event sent through the keyboard costs two round trips (focus
+query and sync). Through the keymap, a whole sequence of events costs one round trip (the sync of XTest).
+
+- type: TypingEngine.type with the BATCH strategy, in characters per second;
+- typewrite: KeyboardController.typewrite without delay, in characters per second;
+- hotkey: KeyboardController.hotkey(ctrl, shift, 'v') without hold time, in microseconds per call.
+
+The cost of building the table of the null keymap and of checking the layout is reported too.
+
+Usage: python -m benchmarks.keymap [--round-trip 100] [--length 500]
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+from timeit import repeat
+from src import backend
+from src.backend import NullKeyboard, NullKeymap
+from src.enums import TypingStrategy
+from src.keyboard_controller import KeyboardController
+from src.keymap import KeyTable
+from src.typing_engine import TypingEngine
+
+SENTENCE = "The Quick Brown Fox jumps over the lazy dog: 42 times!\n"
+
+
+def spend(seconds: float):
+    """Busy-wait, like a call blocked on the display server."""
+    end = perf_counter() + seconds
+    while perf_counter() < end:
+        pass
+
+
+class X11Keyboard(NullKeyboard):
+    """ Keyboard resolving and sending each event on its own, like pynput on X11. """
+    def __init__(self, round_trip: float):
+        super().__init__()
+        self.round_trip = round_trip
+
+    def press(self, key):
+        spend(2 * self.round_trip)
+        super().press(key)
+
+    def release(self, key):
+        spend(2 * self.round_trip)
+        super().release(key)
+
+
+class X11Keymap(NullKeymap):
+    """ Keymap sending every sequence of events with one round trip, like XTest and a single sync. """
+    def __init__(self, keyboard: NullKeyboard, round_trip: float):
+        super().__init__(keyboard)
+        self.round_trip = round_trip
+
+    def send(self, events):
+        super().send(events)
+        spend(self.round_trip)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--round-trip', type=float, default=100,
+                        help="cost of a round trip to the display server in µs (default: 100)")
+    parser.add_argument('--length', type=int, default=500, help="characters typed (default: 500)")
+    arguments = parser.parse_args()
+    round_trip = arguments.round_trip / 1e6
+    text = (SENTENCE * (arguments.length // len(SENTENCE) + 1))[:arguments.length]
+
+    null = backend.use('null')
+    null.keyboard = X11Keyboard(round_trip)
+    keymap = X11Keymap(NullKeyboard(), round_trip)
+    backend.use(null)
+
+    cases = {
+        'type': (lambda: TypingEngine.type(text, TypingStrategy.BATCH, cps=0), len(text)),
+        'typewrite': (lambda: KeyboardController.typewrite(text, delay=0), len(text)),
+        'hotkey': (lambda: KeyboardController.hotkey(backend.Key.ctrl, backend.Key.shift, 'v', wait=0), None),
+    }
+
+    print(f"{'case':>10} {'per event':>14} {'keycode table':>14} {'speedup':>8}")
+    for name, (statement, characters) in cases.items():
+        results = []
+        for null.keymap in (None, keymap):
+            backend.use(null)
+            KeyTable.invalidate()
+            calls = 1 if characters else 200
+            seconds = min(repeat(statement, number=calls, repeat=3)) / calls
+            results.append(characters / seconds if characters else seconds * 1e6)
+        speedup = results[1] / results[0] if characters else results[0] / results[1]
+        unit = "chars/s" if characters else "µs"
+        print(f"{name:>10} {results[0]:>14,.0f} {results[1]:>14,.0f} {speedup:>7.1f}x  ({unit})")
+
+    null.keymap = NullKeymap(null.keyboard)
+    backend.use(null)
+    build = min(repeat(null.keymap.build, number=100, repeat=3)) / 100
+    KeyTable.get()
+    lookup = min(repeat(lambda: KeyTable.lookup('a'), number=100_000, repeat=3)) / 100_000
+    print(f"table build: {build * 1e6:.0f} µs; lookup with the layout checked every "
+          f"{KeyTable.CHECK_INTERVAL:g} s: {lookup * 1e9:.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
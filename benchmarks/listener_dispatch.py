@@ -0,0 +1,64 @@
+"""
+Benchmark: press-to-callback latency of the shared ListenerHub with 1, 10 and 100 single-key bindings or chords.
+
+The hub is driven directly through its press handler, so no display or real listener is needed.
+
+Usage: python -m benchmarks.listener_dispatch
+"""
+from statistics import median
+from string import printable
+from time import perf_counter_ns
+from src import backend
+from src.listener_hub import Binding, ListenerHub
+
+PRESSES = 20_000
+KEYS = [c for c in printable if c.isprintable() and not c.isspace()]
+
+
+def measure(bindings: int, chords: bool = False) -> list[int]:
+    """
+    Register `bindings` bindings on distinct keys and measure the latency of a press on one of them.
+
+    :param bindings: Number of bindings to register.
+    :param chords: If True, the bindings are 'ctrl' chords and 'ctrl' is held during the presses.
+    :return: Press-to-callback latencies in nanoseconds.
+    """
+    latencies = []
+    started = 0
+
+    def target():
+        latencies.append(perf_counter_ns() - started)
+
+    modifiers = {'ctrl'} if chords else set()
+    registered = [ListenerHub.register(Binding(frozenset({KEYS[i % len(KEYS)] + str(i), *modifiers}), lambda: None),
+                                       start=False)
+                  for i in range(bindings - 1)]
+    registered.append(ListenerHub.register(Binding(frozenset({'a', *modifiers}), target), start=False))
+
+    press = backend.KeyCode.from_char('a')
+    if chords:
+        ListenerHub._on_press(backend.Key.ctrl_l)
+    for _ in range(PRESSES):
+        started = perf_counter_ns()
+        ListenerHub._on_press(press)
+        ListenerHub._on_release(press)
+    if chords:
+        ListenerHub._on_release(backend.Key.ctrl_l)
+
+    for binding in registered:
+        binding.stop()
+    return latencies
+
+
+def main():
+    backend.use('null')
+    print(f"{'kind':>6} {'bindings':>8} {'p50 (ns)':>10} {'p99 (ns)':>10}")
+    for chords in (False, True):
+        for bindings in (1, 10, 100):
+            latencies = sorted(measure(bindings, chords))
+            print(f"{'chord' if chords else 'key':>6} {bindings:>8} {median(latencies):>10.0f} "
+                  f"{latencies[int(len(latencies) * 0.99)]:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Microbenchmark: per-call overhead of logging on the controller hot paths, with logging off and on.
+
+"eager" builds the message with an f-string as the controllers used to, "lazy" passes %-style arguments,
+and "click" is a full MouseController.click on the null input backend. With logging on, records go
+through the QueueHandler to a background sink writing to /dev/null (and to a JSON-lines file for "on+file").
+
+Usage: python -m benchmarks.logging_overhead
+"""
+import logging
+import os
+from tempfile import TemporaryDirectory
+from timeit import repeat
+from src import backend, logger as logger_module
+from src.mouse_controller import MouseController as mc
+from src.point import Point
+
+CALLS = 20_000
+logger = logger_module.get_logger("benchmark")
+point = Point(1920, 1080)
+
+
+def per_call(statement: callable) -> float:
+    """
+    :param statement: Function to time.
+    :return: Best time per call over 5 repetitions, in nanoseconds.
+    """
+    return min(repeat(statement, number=CALLS, repeat=5)) / CALLS * 1e9
+
+
+def main():
+    backend.use('null')
+    statements = {
+        'eager': lambda: logger.info(f"Preparing to click at: {point} in {0.2} seconds."),
+        'lazy': lambda: logger.info("Preparing to click at: %s in %s seconds.", point, 0.2),
+        'click': lambda: mc.click(must_wait=False),
+    }
+
+    with TemporaryDirectory() as directory, open(os.devnull, 'w') as devnull:
+        modes = {
+            'off': lambda: logger_module.configure(None),
+            'on': lambda: logger_module.configure(logging.INFO, stream=devnull),
+            'on+file': lambda: logger_module.configure(logging.INFO, os.path.join(directory, 'log.jsonl'), devnull),
+        }
+
+        print(f"{'logging':>8} " + " ".join(f"{name + ' (ns)':>12}" for name in statements))
+        for mode, configure in modes.items():
+            configure()
+            print(f"{mode:>8} " + " ".join(f"{per_call(statement):>12.0f}" for statement in statements.values()))
+        logger_module.configure(None)
+
+
+if __name__ == "__main__":
+    main()
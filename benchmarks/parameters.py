@@ -0,0 +1,74 @@
+"""
+Benchmark: cost of reading a tunable parameter in a tight loop, and number of file writes for a burst of updates.
+
+Reads are compared with a module global, which is what automations used before, and with a read under a lock.
+Updates are made from several threads at once, like hotkeys pressed during a run: the final value must count
+every update, and the parameters file must be written once per ParameterStore.FLUSH_DELAY, not once per update.
+
+Usage: python -m benchmarks.parameters [--updates 1000] [--threads 4]
+"""
+import json
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Lock, Thread
+from time import perf_counter, sleep
+from timeit import repeat
+from src.parameters import ParameterStore
+
+CALLS = 1_000_000
+plain_global = 21.5
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--updates', type=int, default=1000, help="updates per thread (default: 1000)")
+    parser.add_argument('--threads', type=int, default=4, help="updating threads (default: 4)")
+    arguments = parser.parse_args()
+
+    with TemporaryDirectory() as directory:
+        path = Path(directory) / "parameters.json"
+        ParameterStore.use(str(path))
+        parameter = ParameterStore.define("benchmark.wait", 21.5, minimum=0.0)
+        lock = Lock()
+
+        def locked():
+            with lock:
+                return parameter.value
+
+        reads = {
+            'module global': lambda: plain_global,
+            'parameter.value': lambda: parameter.value,
+            'values() snapshot': lambda: ParameterStore.values()["benchmark.wait"],
+            'read under a lock': locked,
+        }
+        print(f"{'read':>20} {'ns/read':>8}")
+        for name, statement in reads.items():
+            seconds = min(repeat(statement, number=CALLS, repeat=3)) / CALLS
+            print(f"{name:>20} {seconds * 1e9:>8.1f}")
+
+        step = 0.25
+        start = perf_counter()
+        threads = [Thread(target=lambda: [parameter.increment(step) for _ in range(arguments.updates)])
+                   for _ in range(arguments.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - start
+        sleep(ParameterStore.FLUSH_DELAY * 1.5)
+
+        updates = arguments.updates * arguments.threads
+        expected = 21.5 + updates * step
+        persisted = json.loads(path.read_text())["benchmark.wait"]
+        failed = parameter.value != expected or persisted != expected
+        print(f"{updates} updates from {arguments.threads} threads in {elapsed * 1000:.1f} ms "
+              f"({elapsed / updates * 1e6:.1f} µs each): value {parameter.value} (expected {expected}), "
+              f"persisted {persisted}, file written {ParameterStore.writes()} time(s)")
+        ParameterStore.use(None)
+    print("FAILED" if failed else "OK")
+    raise SystemExit(failed)
+
+
+if __name__ == "__main__":
+    main()
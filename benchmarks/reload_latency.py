@@ -0,0 +1,73 @@
+"""
+Check: a modified automation script is running its new code within RELOAD_BUDGET of being saved.
+
+A script with a keystroke automation is run by the Reloader on the null backend. Its source is then rewritten
+RUNS times, and the time until the function held by the running trigger returns the new value is measured.
+The listener and the binding are the same ones throughout.
+
+Usage: python -m benchmarks.reload_latency
+"""
+import os
+from pathlib import Path
+from statistics import median
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import perf_counter, sleep, time_ns
+from src import backend
+from src.automation import Automation
+from src.listener_hub import ListenerHub
+from src.registry import RunRegistry
+from src.reloader import Reloader
+
+RUNS = 20
+RELOAD_BUDGET = 0.1  # seconds
+
+SCRIPT = '''
+from src.automation import Automation
+
+def value():
+    return {value}
+
+def main():
+    Automation.keystroke("reload", value, 'a')
+
+if __name__ == "__main__":
+    main()
+'''
+
+
+def main():
+    backend.use('null')
+    with TemporaryDirectory() as directory:
+        path = Path(directory) / "reload.a.py"
+        path.write_text(SCRIPT.format(value=0))
+        thread = Thread(target=Reloader.run, args=(path,))
+        thread.start()
+        while not RunRegistry.runs():
+            sleep(0.01)
+        trigger = RunRegistry.runs()[0].trigger
+        listener = ListenerHub.start()
+
+        latencies = []
+        for value in range(1, RUNS + 1):
+            saved = perf_counter()
+            path.write_text(SCRIPT.format(value=value))
+            os.utime(path, ns=(time_ns(), time_ns() + value))  # distinct mtimes on coarse file systems
+            while trigger.function() != value:
+                sleep(0.001)
+            latencies.append(perf_counter() - saved)
+        same_listener = ListenerHub.start() is listener and RunRegistry.runs()[0].trigger is trigger
+
+        Automation.emergency_stop()
+        thread.join()
+
+    failed = max(latencies) > RELOAD_BUDGET or not same_listener
+    print(f"reload latency over {RUNS} saves: median {median(latencies) * 1000:.1f} ms, "
+          f"max {max(latencies) * 1000:.1f} ms, budget {RELOAD_BUDGET * 1000:.0f} ms; "
+          f"listener and trigger kept: {same_listener}")
+    print("FAILED" if failed else "OK")
+    raise SystemExit(failed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Check: cold-start cost of ``import src.automation`` stays within budget.
+
+Each run imports the module in a fresh interpreter with ``python -X importtime`` and reads the cumulative
+import time of ``src.automation``. The median of the runs is compared with the budget, and the slowest
+modules of the last run are listed to show where the time goes.
+
+Usage: python -m benchmarks.startup [--budget MS] [--runs N] [--module NAME]
+"""
+import os
+import subprocess
+import sys
+from argparse import ArgumentParser
+from statistics import median
+
+BUDGET_MS = 60.0
+TOP = 10
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Import a module in a fresh interpreter.
+
+    :param module: Name of the module to import.
+    :return: Cumulative import time of every imported module, in microseconds.
+    """
+    environment = {**os.environ, 'PYTHONPATH': os.getcwd()}
+    environment.pop('LOG', None)  # measure the default start, without a logging sink
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, env=environment, check=True)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget', type=float, default=BUDGET_MS, help=f"budget in ms (default: {BUDGET_MS:.0f})")
+    parser.add_argument('--runs', type=int, default=7, help="number of fresh interpreters (default: 7)")
+    parser.add_argument('--module', default='src.automation', help="module to import (default: src.automation)")
+    arguments = parser.parse_args()
+
+    runs = [import_times(arguments.module) for _ in range(arguments.runs)]
+    total = median(run[arguments.module] for run in runs) / 1000
+
+    print(f"{'module':>40} {'cumulative (ms)':>16}")
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)[:TOP]
+    for name, cumulative in slowest:
+        print(f"{name:>40} {cumulative / 1000:>16.1f}")
+
+    failed = total > arguments.budget
+    print(f"import {arguments.module}: {total:.1f} ms (median of {arguments.runs}), budget {arguments.budget:.0f} ms: "
+          f"{'FAILED' if failed else 'OK'}")
+    raise SystemExit(failed)
+
+
+if __name__ == "__main__":
+    main()
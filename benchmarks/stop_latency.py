@@ -0,0 +1,78 @@
+"""
+Check: stop latency of the mouse and keyboard controllers is below STOP_LATENCY and nothing stays pressed.
+
+A long drag and a long hotkey are started in a worker thread and cancelled mid-way, once through the run's own
+token and once through the root token (emergency stop). Input events go to the null backend, which only tracks what is pressed.
+
+Usage: python -m benchmarks.stop_latency
+"""
+from threading import Thread
+from time import perf_counter, sleep
+from src import backend
+from src.cancellation import ROOT, STOP_LATENCY, CancellationToken, Cancelled, bind
+from src.keyboard_controller import KeyboardController as kc
+from src.mouse_controller import MouseController as mc
+from src.point import Point
+
+RUNS = 20
+
+
+def measure(action: callable, cancel: callable, token: CancellationToken) -> float:
+    """
+    Run an action in a thread, cancel it mid-way and measure how long the thread takes to stop.
+
+    :param action: Function to run, long enough to be cancelled while it is still running.
+    :param cancel: Function that cancels the action.
+    :param token: Token bound to the thread.
+    :return: Time between the cancellation and the end of the thread, in seconds.
+    """
+    finished = 0.0
+
+    def body():
+        nonlocal finished
+        with bind(token):
+            try:
+                action()
+            except Cancelled:
+                pass
+        finished = perf_counter()
+
+    thread = Thread(target=body)
+    thread.start()
+    sleep(0.05)
+    cancelled = perf_counter()
+    cancel()
+    thread.join()
+    ROOT.reset()
+    return finished - cancelled
+
+
+def main():
+    null = backend.use('null')
+
+    actions = {
+        'drag': lambda: mc.drag_offset(Point(0, 0), 500, 0, elapsed_time=30, definition=30),
+        'hotkey': lambda: kc.hotkey(backend.Key.ctrl, backend.Key.shift, 'f', wait=30),
+        'wait': lambda: mc.wait(21.5),
+    }
+
+    failed = False
+    print(f"{'action':>8} {'stop':>10} {'max (ms)':>10} {'pressed':>8}")
+    for name, action in actions.items():
+        for stop in ('run', 'emergency'):
+            latencies = []
+            for _ in range(RUNS):
+                token = CancellationToken(parent=ROOT)
+                cancel = token.cancel if stop == 'run' else ROOT.cancel
+                latencies.append(measure(action, cancel, token))
+            pressed = len(null.mouse.pressed) + len(null.keyboard.pressed)
+            print(f"{name:>8} {stop:>10} {max(latencies) * 1000:>10.3f} {pressed:>8}")
+            failed |= max(latencies) >= STOP_LATENCY or pressed > 0
+
+    print(f"FAILED: stop latency must be below {STOP_LATENCY * 1000:.0f} ms with nothing left pressed."
+          if failed else "OK")
+    raise SystemExit(failed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Microbenchmark suite: per-call overhead of the controllers, the listener hub, Automation and the clipboard.
+
+Everything runs on the null input backend, so no display is needed and the numbers measure guibot itself,
+not the system. Waits are set to zero where the API allows it. Results can be written as JSON to track
+regressions across versions.
+
+Usage: python -m benchmarks.suite [--json results.json] [--repeat 5]
+"""
+import json
+import platform
+import sys
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from timeit import repeat
+from src import backend
+from src.automation import Automation
+from src.clipboard import Clipboard
+from src.keyboard_controller import KeyboardController as kc
+from src.listener_hub import ListenerHub
+from src.mouse_controller import MouseController as mc
+from src.point import Point
+from src.point_array import PointArray
+from src.typing_engine import TypingEngine
+
+CALLS = 2_000
+TEXT = "The quick brown fox"
+
+
+def get_version() -> str:
+    """Get the installed version of guibot, or 'unknown' when running from a source tree."""
+    try:
+        return version("Guibot")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def cases() -> dict[str, callable]:
+    """Get the benchmarked statements by name. Each statement is one call of the measured operation."""
+    point = Point(100, 200)
+    points = PointArray((x, x // 2) for x in range(1000))
+    a = backend.KeyCode.from_char('a')
+    Clipboard.copy(TEXT)
+
+    return {
+        'point': lambda: Point(100, 200),
+        'point_arithmetic': lambda: (point + point - point) * 2,
+        'point_array_transform': lambda: points.translate(5, 5).convert_dpi(96, 144),
+        'click_at': lambda: mc.click_at(point, wait=0),
+        'move_by_offset': lambda: mc.move_by_offset(10, 10, slowly=True, elapsed_time=1e-9, definition=10),
+        'type': lambda: kc.typewrite(TEXT, delay=0),
+        'typing_engine': lambda: TypingEngine.type(TEXT, cps=0),
+        'hotkey': lambda: kc.hotkey(backend.Key.ctrl, backend.Key.shift, 'f', wait=0),
+        'listener_dispatch': lambda: (ListenerHub._on_press(a), ListenerHub._on_release(a)),
+        'clipboard_copy': lambda: Clipboard.copy(TEXT),
+        'clipboard_contains_any': lambda: Clipboard.contains_any(['lazy', 'dog', 'fox']),
+    }
+
+
+def measure(repetitions: int) -> dict[str, dict]:
+    """
+    Time every case.
+
+    :param repetitions: Number of timing runs per case. The best one is kept.
+    :return: Results by case name, with the best and the median time per call in nanoseconds.
+    """
+    backend.use('null')
+    with redirect_stdout(sys.stderr):  # keep stdout for the JSON report
+        handle = Automation.keystroke("benchmark", lambda: None, 'a', blocking=False)
+
+    results = {}
+    try:
+        for name, statement in cases().items():
+            times = sorted(t / CALLS * 1e9 for t in repeat(statement, number=CALLS, repeat=repetitions))
+            results[name] = {'best_ns': round(times[0], 1), 'median_ns': round(times[len(times) // 2], 1),
+                             'calls': CALLS}
+    finally:
+        handle.stop()
+        handle.join()
+    return results
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--json', metavar='PATH', help="write the results as JSON to this file ('-' for stdout)")
+    parser.add_argument('--repeat', type=int, default=5, help="number of timing runs per case (default: 5)")
+    arguments = parser.parse_args()
+
+    results = measure(arguments.repeat)
+
+    table = sys.stderr if arguments.json == '-' else sys.stdout
+    print(f"{'case':>24} {'best (ns)':>12} {'median (ns)':>12}", file=table)
+    for name, result in results.items():
+        print(f"{name:>24} {result['best_ns']:>12.0f} {result['median_ns']:>12.0f}", file=table)
+
+    if arguments.json:
+        report = {
+            'version': get_version(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'results': results,
+        }
+        content = json.dumps(report, indent=2)
+        if arguments.json == '-':
+            print(content)
+        else:
+            with open(arguments.json, 'w', encoding='utf-8') as file:
+                file.write(content + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: characters per second of each typing strategy, and of the previous typing paths.
+
+The null backend sends nothing, so its keyboard and clipboard are given a cost per call to approach a desktop:
+every key event and every character typed by the backend takes --event-cost microseconds, every clipboard read
+or write takes --clipboard-cost milliseconds (pyperclip starts an xclip or xsel process on Linux). The paste
+also waits TypingEngine.PASTE_SETTLE before restoring the clipboard.
+
+- typewrite: the previous KeyboardController.typewrite, with its default delay between characters;
+- batch / fallback / paste: TypingEngine with a forced strategy;
+- auto: TypingEngine choosing the strategy;
+- batch capped: batch under the --cps cap.
+
+Usage: python -m benchmarks.typing_speed [--event-cost 50] [--clipboard-cost 5] [--cps 200]
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+from src import backend
+from src.backend import MemoryClipboard, NullKeyboard
+from src.enums import TypingStrategy
+from src.keyboard_controller import KeyboardController
+from src.typing_engine import TypingEngine
+
+LENGTHS = (20, 200, 500, 2000)
+SENTENCE = "The quick brown fox jumps over the lazy dog. "
+TYPEWRITE_LENGTH = 10  # characters: typewrite waits 0.1 seconds per character
+
+
+def spend(seconds: float):
+    """Busy-wait, like a call blocked on the display server."""
+    end = perf_counter() + seconds
+    while perf_counter() < end:
+        pass
+
+
+class CostlyKeyboard(NullKeyboard):
+    """ Keyboard whose events take time to send. """
+    def __init__(self, cost: float):
+        super().__init__()
+        self.cost = cost
+
+    def press(self, key):
+        spend(self.cost)
+        super().press(key)
+
+    def release(self, key):
+        spend(self.cost)
+        super().release(key)
+
+    def type(self, text: str):
+        spend(2 * self.cost * len(text))  # a press and a release per character
+
+
+class CostlyClipboard(MemoryClipboard):
+    """ Clipboard whose reads and writes take time. """
+    def __init__(self, cost: float):
+        super().__init__()
+        self.cost = cost
+
+    def copy(self, text: str):
+        spend(self.cost)
+        super().copy(text)
+
+    def paste(self) -> str:
+        spend(self.cost)
+        return super().paste()
+
+    def change_count(self) -> None:
+        return None  # like Linux: every read goes to the clipboard
+
+
+def rate(function: callable, text: str, runs: int = 3) -> float:
+    """Get the characters per second of a typing function on a text, best of some runs."""
+    best = float('inf')
+    for _ in range(runs):
+        start = perf_counter()
+        function(text)
+        best = min(best, perf_counter() - start)
+    return len(text) / best
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--event-cost', type=float, default=50, help="cost of a key event in µs (default: 50)")
+    parser.add_argument('--clipboard-cost', type=float, default=5,
+                        help="cost of a clipboard read or write in ms (default: 5)")
+    parser.add_argument('--cps', type=float, default=200, help="speed cap of 'batch capped' (default: 200)")
+    arguments = parser.parse_args()
+
+    null = backend.use('null')
+    null.keyboard = CostlyKeyboard(arguments.event_cost / 1e6)
+    null.clipboard = CostlyClipboard(arguments.clipboard_cost / 1e3)
+    null.keymap = None  # an event per call: benchmarks.keymap measures the keycode table
+    backend.use(null)
+
+    strategies = {
+        'typewrite': lambda text: KeyboardController.typewrite(text),
+        'batch': lambda text: TypingEngine.type(text, TypingStrategy.BATCH, cps=0),
+        'fallback': lambda text: TypingEngine.type(text, TypingStrategy.FALLBACK, cps=0),
+        'paste': lambda text: TypingEngine.type(text, TypingStrategy.PASTE, cps=0),
+        'auto': lambda text: TypingEngine.type(text, cps=0),
+        'batch capped': lambda text: TypingEngine.type(text, TypingStrategy.BATCH, cps=arguments.cps),
+    }
+
+    print(f"{'strategy':>14}" + ''.join(f"{f'{length} chars':>14}" for length in LENGTHS) + "   (characters/s)")
+    for name, function in strategies.items():
+        cells = []
+        rates = {}
+        for length in LENGTHS:
+            if name == 'typewrite' and length > TYPEWRITE_LENGTH:
+                length = TYPEWRITE_LENGTH
+            text = (SENTENCE * (length // len(SENTENCE) + 1))[:length]
+            if name == 'batch capped' and length > 2 * arguments.cps:
+                cells.append(f"{'-':>14}")  # would only measure the cap
+                continue
+            if text not in rates:
+                rates[text] = rate(function, text, runs=1 if name == 'typewrite' else 3)
+            cells.append(f"{rates[text]:>14,.0f}")
+        print(f"{name:>14}" + ''.join(cells))
+    print(f"typewrite is measured on {TYPEWRITE_LENGTH} characters; "
+          f"auto pastes from {TypingEngine.PASTE_THRESHOLD} characters.")
+
+
+if __name__ == "__main__":
+    main()
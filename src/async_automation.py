@@ -0,0 +1,146 @@
+import asyncio
+from enum import Enum
+from functools import partial
+from typing import Optional, Union
+from src.automation import Automation
+from src.enums import AutomationMode, OverrunPolicy, TriggerPolicy
+from src.listener_hub import Binding, ListenerHub, normalize_key
+from src.logger import get_logger
+from src.metrics import AutomationMetrics
+from src.registry import RunHandle, RunRegistry
+from src.scheduler import Schedule
+
+logger = get_logger(__name__)
+
+
+class AsyncAutomation:
+    """
+    asyncio counterpart of Automation: every automation is a task on the running event loop.
+
+    Automation functions are coroutine functions using AsyncMouseController and AsyncKeyboardController, so any
+    number of loops and key bindings share one thread. Key presses are received on the shared listener thread
+    and handed to the event loop with ``call_soon_threadsafe``. Stopping a run, or pressing 'esc', cancels its
+    task; the keys and buttons it holds are released in the ``finally`` blocks of the controllers.
+
+    Runs are registered in the same RunRegistry as the sync automations and count towards the parallel limit.
+    The methods must be called from a coroutine running on the event loop.
+    """
+    @classmethod
+    def loop(cls, name: str, automation_function: callable, priority: int = 0, period: Optional[float] = None,
+             rate: Optional[float] = None, overrun: OverrunPolicy = OverrunPolicy.SKIP) -> RunHandle:
+        """
+        Start a task awaiting the automation function repeatedly, until it is stopped.
+
+        :param name: Name of the automation process.
+        :param automation_function: Coroutine function to await at every iteration.
+        :param priority: Admission priority of the run.
+        :param period: Time between the starts of two iterations, in seconds. Without a period or a rate,
+            iterations run back to back.
+        :param rate: Number of iterations per second, in Hz. Alternative to period.
+        :param overrun: What to do when an iteration ends after the next deadline (period or rate only).
+        :return: The handle of the run. Its ``task`` is the asyncio task running the loop.
+        """
+        schedule = Schedule(period, rate, overrun) if period is not None or rate is not None else None
+        handle = RunRegistry.open(name, AutomationMode.ASYNC_LOOP, priority)
+        metrics = AutomationMetrics(name)
+        iteration = partial(metrics.run_async, automation_function)
+
+        async def body():
+            try:
+                if schedule is not None:
+                    handle.stats = schedule.stats
+                    await schedule.run_async(iteration, lambda: True)
+                else:
+                    while True:
+                        await iteration()
+            except asyncio.CancelledError:
+                logger.info("Async automation '%s' cancelled.", name)
+            except Exception:
+                logger.exception("Async automation '%s' raised an exception.", name)
+
+        cls.__start(handle, body())
+        logger.info("Started async automation loop '%s'.", name)
+        return handle
+
+    @classmethod
+    def keystroke(cls, name: str, automation_function: callable,
+                  key_activator: Union[str, Enum, list[Union[str, Enum]]], policy: TriggerPolicy = TriggerPolicy.DROP,
+                  max_queue: int = 1, edge_triggered: bool = True, priority: int = 0) -> RunHandle:
+        """
+        Start a task awaiting the automation function each time a key or a combination of keys is pressed.
+
+        Activations never overlap. Those arriving while the function is running are handled by the policy:
+        DROP discards them, QUEUE keeps up to max_queue of them, LATEST keeps the last one.
+
+        :param name: Name of the automation process.
+        :param automation_function: Coroutine function to await when the keys are pressed.
+        :param key_activator: A single character string, a Key, or a list of strings or Keys.
+        :param policy: TriggerPolicy.DROP, QUEUE or LATEST.
+        :param max_queue: Maximum number of pending activations (TriggerPolicy.QUEUE only).
+        :param edge_triggered: If True, the auto-repeat presses of a key held down are ignored.
+        :param priority: Admission priority of the run.
+        :return: The handle of the run. Its ``task`` is the asyncio task waiting for the activations.
+        """
+        if policy not in (TriggerPolicy.DROP, TriggerPolicy.QUEUE, TriggerPolicy.LATEST):
+            raise ValueError(f"The {policy.name} policy is not supported by async automations.")
+        keys = frozenset(map(normalize_key, key_activator if isinstance(key_activator, list) else [key_activator]))
+
+        event_loop = asyncio.get_running_loop()
+        handle = RunRegistry.open(name, AutomationMode.ASYNC_KEYSTROKE, priority)
+        metrics = AutomationMetrics(name)
+        keep = {TriggerPolicy.DROP: 0, TriggerPolicy.QUEUE: max_queue, TriggerPolicy.LATEST: 1}[policy]
+        activations: asyncio.Queue = asyncio.Queue()
+
+        def on_press():
+            """Called on the listener thread: hand the activation over to the event loop."""
+            metrics.triggers.inc()
+            event_loop.call_soon_threadsafe(activations.put_nowait, None)
+
+        async def body():
+            # registering may start the listener (SYNC_DELAY sleep, hub lock): done on an executor thread
+            registration = event_loop.run_in_executor(
+                None, ListenerHub.register, Binding(keys, on_press, edge_triggered=edge_triggered))
+            binding = None
+            try:
+                binding = await asyncio.shield(registration)
+                while True:
+                    await activations.get()
+                    try:
+                        await metrics.run_async(automation_function)
+                    except Exception:
+                        logger.exception("Async automation '%s' raised an exception.", name)
+
+                    # Activations received during the run: keep what the policy allows, newest last.
+                    for _ in range(activations.qsize() - keep):
+                        activations.get_nowait()
+                        metrics.dropped.inc()
+            except asyncio.CancelledError:
+                logger.info("Async automation '%s' cancelled.", name)
+            finally:
+                if binding is not None:
+                    binding.stop()
+                else:  # cancelled while registering: stop the binding once it is registered
+                    registration.add_done_callback(lambda done: done.exception() or done.result().stop())
+
+        cls.__start(handle, body())
+        logger.info("Started async keystroke automation '%s' on '%s'.", name, "+".join(sorted(keys)))
+        return handle
+
+    @staticmethod
+    async def join(handle: RunHandle):
+        """
+        Wait for an async run to finish, without blocking the event loop.
+
+        :param handle: The handle of the run.
+        """
+        await asyncio.wait({handle.task})
+
+    @staticmethod
+    def __start(handle: RunHandle, body):
+        """Run the coroutine as the task of the handle, cancelled when the run is stopped from any thread."""
+        event_loop = asyncio.get_running_loop()
+        handle.task = event_loop.create_task(body, name=f"guibot-{handle.mode.value}-{handle.id}")
+        handle.on_stop(partial(event_loop.call_soon_threadsafe, handle.task.cancel))
+        handle.task.add_done_callback(lambda _: RunRegistry.close(handle))  # also if cancelled before starting
+        # arming may start the listener (SYNC_DELAY sleep, hub lock): done on an executor thread
+        event_loop.run_in_executor(None, Automation._arm_emergency_stop)
@@ -0,0 +1,345 @@
+from contextlib import closing
+from enum import Enum
+from typing import Optional, Union
+from src import backend, clock, trajectory
+from src.base_controller import BaseController, wait_seconds
+from src.enums import Curve, Interval, TypingStrategy
+from src.keyboard_controller import KeyboardController
+from src.logger import get_logger
+from src.mouse_controller import MouseController, set_position
+from src.point import Point
+from src.point_array import PointArray
+from src.typing_engine import TypingEngine
+
+logger = get_logger(__name__)
+
+
+class AsyncBaseController:
+    """
+    Awaitable counterpart of BaseController.
+
+    Waits sleep on the event loop instead of blocking a thread, and are interrupted by cancelling the task.
+    Input events go through the same backend, metrics and pressed-key tracking as the sync controllers,
+    so an emergency stop releases what async automations have pressed too.
+    """
+    @staticmethod
+    async def wait(time: Union[Interval, float]):
+        """
+        Wait for a specified interval without blocking the event loop.
+
+        :param time: Interval to wait.
+        """
+        if isinstance(time, Interval):
+            seconds = time.value
+        elif isinstance(time, (int, float)):
+            seconds = time
+        else:
+            message = f"Invalid type for time: {type(time)}. Must be Interval, int, or float."
+            logger.error(message)
+            raise TypeError(message)
+
+        if seconds > 0:
+            logger.debug("Waiting for %s seconds.", seconds)
+            start = clock.now()
+            try:
+                await clock.get_clock().sleep_async(seconds)
+            finally:
+                wait_seconds.inc(clock.now() - start)
+
+
+class AsyncMouseController(AsyncBaseController):
+    """ Awaitable counterpart of MouseController. """
+    @staticmethod
+    def get_position() -> Point:
+        """ Get the current mouse position.
+
+        :return: Point representing the current mouse position.
+        """
+        return MouseController.get_position()
+
+    @classmethod
+    async def press(cls):
+        """ Press the left mouse button. """
+        await cls.wait(Interval.SHORT)
+        logger.info("Pressing the left mouse button.")
+        MouseController.inject(backend.mouse.press, backend.Button.left)
+        MouseController._pressed.add(backend.Button.left)
+
+    @classmethod
+    async def release(cls):
+        """ Release the left mouse button. """
+        logger.info("Releasing the left mouse button.")
+        MouseController.inject(backend.mouse.release, backend.Button.left, check=False)
+        MouseController._pressed.discard(backend.Button.left)
+        await cls.wait(Interval.INSTANT)
+
+    @classmethod
+    async def click(cls, must_wait: bool = True):
+        """ Click the left mouse button.
+
+        :param must_wait: If True, it will wait for a short interval before clicking."""
+        if must_wait:
+            await cls.wait(Interval.SHORT)
+        logger.info("Clicking the left mouse button.")
+        MouseController.inject(backend.mouse.click, backend.Button.left)
+
+    @classmethod
+    async def double_click(cls, must_wait: bool = True):
+        """ Double click the left mouse button.
+
+        :param must_wait: If True, it will wait for a short interval before double clicking."""
+        if must_wait:
+            await cls.wait(Interval.SHORT)
+        logger.info("Double clicking the left mouse button.")
+        MouseController.inject(backend.mouse.click, backend.Button.left, 2)
+
+    @classmethod
+    async def right_click(cls, must_wait: bool = True):
+        """ Right click the mouse button.
+
+        :param must_wait: If True, it will wait for a short interval before right clicking."""
+        if must_wait:
+            await cls.wait(Interval.SHORT)
+        logger.info("Right clicking the mouse button.")
+        MouseController.inject(backend.mouse.click, backend.Button.right)
+
+    @classmethod
+    async def move_by_offset(cls, x: int, y: int, slowly: bool = False, elapsed_time: float = .8,
+                             definition: int = 80, curve: Curve = Curve.LINEAR):
+        """ Move the mouse of x and y pixels.
+
+        :param x: Horizontal movement in pixels.
+        :param y: Vertical movement in pixels.
+        :param slowly: If True, it will be simulated the movement of the pointer
+        :param elapsed_time: Time in seconds to complete the movement. (Slowly must be True)
+        :param definition: Number of steps to divide the movement into. (Slowly must be True)
+        :param curve: Shape of the simulated movement. (Slowly must be True)
+        """
+        if slowly:
+            if not (elapsed_time > 0 and definition > 0):
+                message = (f"Elapsed time and definition must be greater than zero. "
+                           f"Elapsed time: {elapsed_time}, Definition: {definition}")
+                logger.error(message)
+                raise ValueError(message)
+
+            logger.info("Moving the mouse slowly by (%s, %s) over %s seconds with %s steps.", x, y, elapsed_time, definition)
+            await cls.follow(trajectory.offsets(int(x), int(y), definition, curve), elapsed_time)
+        else:
+            await cls.wait(Interval.SHORT)
+            logger.info("Moving the mouse instantly to (%s, %s).", x, y)
+            MouseController.inject(backend.mouse.move, x, y)
+
+    @classmethod
+    async def follow(cls, path, elapsed_time: float, start: Optional[tuple[int, int]] = None):
+        """ Move the mouse along a precomputed path of offsets, as returned by the trajectory module.
+
+        :param path: Cumulative (x, y) offsets from the starting point, one per step.
+        :param elapsed_time: Time in seconds to complete the movement.
+        :param start: Starting position. Defaults to the current position.
+        """
+        def move(x: int, y: int):
+            MouseController.inject(set_position, (x, y))
+
+        if start is None:
+            start = cls.get_position().tuple_int
+        await trajectory.follow_async(path, start, elapsed_time, move)
+
+    @classmethod
+    async def scroll(cls, x: int, y: int):
+        """ Scroll the mouse wheel
+
+        :param x: Horizontal scroll amount (positive for right, negative for left).
+        :param y: Vertical scroll amount (positive for down, negative for up).
+        """
+        await cls.wait(Interval.SHORT)
+        logger.info("Scrolling the mouse wheel by (%s, %s).", x, y)
+        MouseController.inject(backend.mouse.scroll, x, y)
+
+    @staticmethod
+    async def move_to(point: Point):
+        """ Move the mouse to a specific point.
+
+        :param point: Point to move the mouse to.
+        """
+        MouseController.move_to(point)
+
+    @classmethod
+    async def click_at(cls, point: Point, wait: float = 0.2):
+        """ Click at a specific point.
+
+        :param point: Point to click at.
+        :param wait: Time to wait before clicking.
+        """
+        MouseController.move_to(point)
+        await cls.wait(wait)
+        await cls.click(must_wait=False)
+
+    @classmethod
+    async def click_at_each(cls, points: Union[PointArray, list[Point]], wait: float = 0.2):
+        """ Click at each point of a sequence, in order.
+
+        :param points: Points to click at, as a PointArray or a list of Points.
+        :param wait: Time to wait before each click.
+        """
+        for point in points:
+            MouseController.move_to(point)
+            await cls.wait(wait)
+            await cls.click(must_wait=False)
+
+    @classmethod
+    async def double_click_at(cls, point: Point, wait: float = 0.2):
+        """ Double click at a specific point.
+
+        :param point: Point to double click at.
+        :param wait: Time to wait before double clicking.
+        """
+        MouseController.move_to(point)
+        await cls.wait(wait)
+        await cls.double_click(must_wait=False)
+
+    @classmethod
+    async def right_click_at(cls, point: Point, wait: float = 0.2):
+        """ Right click at a specific point.
+
+        :param point: Point to right click at.
+        :param wait: Time to wait before right clicking.
+        """
+        MouseController.move_to(point)
+        await cls.wait(wait)
+        await cls.right_click(must_wait=False)
+
+    @classmethod
+    async def drag_offset(cls, starting_point: Point, x: int, y: int, elapsed_time: float = .8, definition: int = 80,
+                          curve: Curve = Curve.LINEAR):
+        """ Drag the mouse from a starting point to a new position with a specified offset.
+
+        :param starting_point: Point to start dragging from.
+        :param x: Horizontal offset from the starting point.
+        :param y: Vertical offset from the starting point.
+        :param elapsed_time: Time in seconds to complete the drag.
+        :param definition: Number of steps to divide the drag into.
+        :param curve: Shape of the drag.
+        """
+        MouseController.move_to(starting_point)
+        await cls.press()
+        try:
+            await cls.move_by_offset(x, y, slowly=True, elapsed_time=elapsed_time, definition=definition, curve=curve)
+        finally:
+            # Also runs when the task is cancelled: release without waiting, the task may not await anymore.
+            MouseController.inject(backend.mouse.release, backend.Button.left, check=False)
+            MouseController._pressed.discard(backend.Button.left)
+
+    @classmethod
+    async def drag_to(cls, starting_point: Point, target_point: Point, elapsed_time: float = .8, definition: int = 80,
+                      curve: Curve = Curve.LINEAR):
+        """ Drag the mouse from a starting point to a target point.
+
+        :param starting_point: Point to start dragging from.
+        :param target_point: Point to drag to.
+        :param elapsed_time: Time in seconds to complete the drag.
+        :param definition: Number of steps to divide the drag into.
+        :param curve: Shape of the drag.
+        """
+        offset = target_point - starting_point
+        await cls.drag_offset(starting_point, offset.int_x, offset.int_y, elapsed_time, definition, curve)
+
+
+class AsyncKeyboardController(AsyncBaseController):
+    """ Awaitable counterpart of KeyboardController. """
+    @classmethod
+    async def press(cls, key: Union[str, Enum], must_wait: bool = True):
+        """ Press a key on the keyboard.
+
+        :param key: The key to press, e.g., 'a' or Key.enter.
+        :param must_wait: If True, it will wait for a short interval before pressing the key.
+        """
+        if must_wait:
+            await cls.wait(Interval.SHORT)
+        logger.info("Pressing the '%s' key.", key)
+        KeyboardController._press_keys(key)
+
+    @classmethod
+    async def release(cls, key: Union[str, Enum], must_wait: bool = True):
+        """ Release a key on the keyboard.
+
+        :param key: The key to release, e.g., 'a' or Key.enter.
+        :param must_wait: If True, it will wait for an instant interval after releasing the key.
+        """
+        logger.info("Releasing the '%s' key.", key)
+        KeyboardController._release_keys(key)
+        if must_wait:
+            await cls.wait(Interval.INSTANT)
+
+    @classmethod
+    async def press_and_release(cls, key: Union[str, Enum], must_wait: bool = True):
+        """ Press and release a key on the keyboard.
+
+        :param key: The key to press and release, e.g., 'a' or Key.enter.
+        :param must_wait: If True, it will wait for a short interval before pressing the key and after releasing it.
+        """
+        await cls.press(key, must_wait)
+        await cls.release(key, must_wait)
+
+    @classmethod
+    async def type(cls, text: str, strategy: Optional[TypingStrategy] = None, cps: Optional[float] = None):
+        """ Type a string of text with the fastest strategy able to produce it (see TypingEngine).
+
+        :param text: The text to type.
+        :param strategy: Strategy to use: PASTE, BATCH or FALLBACK. None lets the engine choose.
+        :param cps: Maximum characters per second, 0 for no limit. None uses TypingEngine.cps.
+        """
+        await cls.wait(Interval.INSTANT)
+        logger.info("Typing text: %s", text)
+        with closing(TypingEngine.steps(text, strategy, cps)) as steps:
+            for pause in steps:
+                await cls.wait(pause)
+
+    @classmethod
+    async def typewrite(cls, text: str, delay: float = Interval.INSTANT):
+        """ Type a string of text with a slight delay between each character.
+
+        :param text: The text to type.
+        :param delay: The delay in seconds between each character.
+        """
+        logger.info("Typewriting text: %s", text)
+        for char in text:
+            KeyboardController._stroke(char)
+            await cls.wait(delay)
+
+    @classmethod
+    async def enter(cls, must_wait: bool = True):
+        """ Press and release the Enter key. """
+        await cls.press_and_release(backend.Key.enter, must_wait)
+
+    @classmethod
+    async def delete(cls, must_wait: bool = True):
+        """ Press and release the Delete key. """
+        await cls.press_and_release(backend.Key.delete, must_wait)
+
+    @classmethod
+    async def space(cls, must_wait: bool = True):
+        """ Press and release the Space key. """
+        await cls.press_and_release(backend.Key.space, must_wait)
+
+    @classmethod
+    async def escape(cls, must_wait: bool = True):
+        """ Press and release the Escape key. """
+        await cls.press_and_release(backend.Key.esc, must_wait)
+
+    @classmethod
+    async def tab(cls, must_wait: bool = True):
+        """ Press and release the Tab key. """
+        await cls.press_and_release(backend.Key.tab, must_wait)
+
+    @classmethod
+    async def hotkey(cls, *keys: Union[Enum, str], wait: Union[Interval, float] = Interval.INSTANT):
+        """ Press a combination of keys together, then release them in reverse order.
+
+        :param keys: The keys to press, e.g., Key.ctrl, 'c'.
+        :param wait: Time to hold the keys down.
+        """
+        try:
+            KeyboardController._press_keys(*keys)
+            await cls.wait(wait)
+        finally:
+            KeyboardController._release_keys(*(key for key in reversed(keys) if key in KeyboardController._pressed))
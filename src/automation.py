@@ -1,10 +1,22 @@
-from pynput.mouse import Listener as MouseListener
-from pynput.keyboard import Key
-from typing import Union
-from threading import Thread
+import re
 from enum import Enum
+from logging import DEBUG
+from functools import partial
+from typing import Optional, Union
+from threading import Event, Lock, Thread
+from src import backend
+from src.base_controller import BaseController
+from src.clipboard_watcher import ClipboardSubscription, ClipboardWatcher
+from src.cancellation import ROOT, Cancelled, bind
+from src.dry_run import DryRun
+from src.enums import AutomationMode, OverrunPolicy, TriggerPolicy
 from src.keyboard_listener import KeyboardListener as kl
+from src.listener_hub import Binding, ListenerHub, normalize_key
 from src.logger import get_logger
+from src.metrics import AutomationMetrics, MetricsRegistry
+from src.registry import RunHandle, RunRegistry
+from src.scheduler import Schedule
+from src.trigger import Trigger
 
 logger = get_logger(__name__)
 
@@ -20,12 +32,6 @@ def _is_allowed(condition: callable, error_message: str):
     return decorator
 
 
-class AutomationMode(Enum):
-    NONE = ''
-    LOOP = 'loop'
-    KEYSTROKE = 'keystroke'
-    CLICK = 'click'
-
 class Automation:
     """
     Manages the start and control of automations.
@@ -33,185 +39,570 @@ class Automation:
     This class provides methods to execute automation functions in the following modes:
     - continuous (loop)
     - reactive to key presses (keystroke / hotkey)
+    - reactive to clipboard changes (clipboard)
     - interactive (mouse click acquisition)
 
     It is designed to ensure consistency and safety during execution, preventing conflicts between different types of automation
-    and monitoring the number of active threads.
-
-    Private attributes:
-    -------------------
-    - __att : AutomationMode
-        Active Thread Type. Identifies the type of automation currently running ('loop', 'keystroke', etc.).
-        Used to block the simultaneous start of incompatible types of automation.
+    and monitoring the number of active runs.
 
-    - __aptc : int
-        Active Parallel Thread Count. Tracks the number of currently active automations.
+    Every run is registered in the RunRegistry, which holds one slot of the parallel limit per active run
+    (default: 10) and hands back a RunHandle to stop or join the run.
 
-    - __pl : int
-        Parallel Limit (default: 10). Limits the maximum number of simultaneous keystroke-type automations.
-        Ignored when a loop-mode automation is active.
+    Pressing 'esc' triggers an emergency stop of every running automation.
     """
-    __att: AutomationMode = AutomationMode.NONE
-    __aptc: int = 0
-    __pl: int = 10
+    __esc_lock = Lock()
+    __esc: Optional[Binding] = None
 
     @classmethod
-    def get_active_thread_type(cls) -> str:
+    def get_active_thread_type(cls) -> AutomationMode:
         """Get the type of the currently active automation thread."""
-        return cls.__att
+        return RunRegistry.active_mode()
 
     @classmethod
     def get_active_parallel_thread_count(cls) -> int:
         """Get the count of currently active parallel automation threads."""
-        return cls.__aptc
+        return RunRegistry.count()
 
     @classmethod
     def get_parallel_limit(cls) -> int:
         """Get the maximum number of parallel automations allowed."""
-        return cls.__pl
+        return RunRegistry.get_parallel_limit()
 
     @classmethod
     def set_parallel_limit(cls, value: int):
         """Set the maximum number of parallel automations allowed."""
-        if value < 1:
-            raise ValueError("Parallel limit must be at least 1.")
-        cls.__pl = value
+        RunRegistry.set_parallel_limit(value)
+
+    @classmethod
+    def get_runs(cls) -> list[RunHandle]:
+        """Get the handles of the active runs, in start order."""
+        return RunRegistry.runs()
+
+    @classmethod
+    def emergency_stop(cls):
+        """
+        Stop every running automation at once.
+
+        Every wait returns within STOP_LATENCY, the keys and mouse buttons still pressed are released,
+        and the shared listener is stopped.
+        """
+        logger.warning("Emergency stop: stopping every automation.")
+        ROOT.cancel()
+        RunRegistry.stop_all()
+        BaseController.release_all()
+        ListenerHub.stop()
+        ROOT.reset()
+
+    @classmethod
+    def _log_activity(cls, name: Optional[str] = None):
+        """Log the mode and the number of the active runs, computed only when debug logging is enabled."""
+        if logger.isEnabledFor(DEBUG):
+            logger.debug("%sActive thread type set to %s. Active parallel thread count: %s.",
+                         f"Name: {name}. " if name else "", cls.get_active_thread_type(),
+                         cls.get_active_parallel_thread_count())
+
+    @classmethod
+    def _arm_emergency_stop(cls):
+        """Make sure that pressing 'esc' triggers an emergency stop."""
+        with cls.__esc_lock:
+            if cls.__esc is None or not cls.__esc.running:
+                cls.__esc = kl.exit_on_esc(cls.emergency_stop)
+
+    @classmethod
+    def get_metrics(cls) -> dict:
+        """
+        Get the metrics of every automation: trigger, run and error counts, run duration percentiles,
+        listener dispatch latency and time spent waiting versus injecting input.
+        """
+        return MetricsRegistry.snapshot()
+
+    @classmethod
+    def export_metrics(cls, path: str, interval: float = 10.0):
+        """
+        Dump the metrics to a file periodically, in the Prometheus text format or as JSON if the path ends in '.json'.
+
+        :param path: Path of the file.
+        :param interval: Time between two dumps in seconds.
+        """
+        MetricsRegistry.start_exporter(path, interval)
+
+    @classmethod
+    def dry_run(cls, name: str, automation_function: callable, *args, iterations: int = 1, **kwargs) -> DryRun:
+        """
+        Run an automation function in the current thread on a virtual clock, recording the input events
+        instead of sending them. Waits take no time, so a whole macro runs in milliseconds and needs no display.
+
+        :param name: Name of the automation.
+        :param automation_function: Function to run.
+        :param args: Positional arguments to pass to the function.
+        :param iterations: Number of times to run the function.
+        :param kwargs: Keyword arguments to pass to the function.
+        :return: The dry run, with the timestamped input events and the simulated duration.
+        """
+        metrics = AutomationMetrics(name)
+        with DryRun(name) as dry_run:
+            for _ in range(iterations):
+                metrics.run(automation_function, *args, **kwargs)
+        return dry_run
+
+    @staticmethod
+    def _wait(handle: RunHandle, join: callable):
+        """
+        Block until a run has finished, stopping it if the wait is interrupted with Ctrl+C.
+
+        :param handle: The handle of the run.
+        :param join: Function that blocks until the run has finished.
+        """
+        try:
+            join()
+        except KeyboardInterrupt:
+            message = f"Automation {handle.name} interrupted by user."
+            print(message)
+            logger.info(message)
+            handle.stop()
+            join()
 
     @classmethod
     @_is_allowed(lambda cls: cls.get_active_thread_type() == AutomationMode.NONE,
                   "Cannot start a loop automation while another is running.")
-    def loop(cls, name: str, automation_function: callable):
+    def loop(cls, name: str, automation_function: callable, blocking: bool = True, priority: int = 0,
+             timeout: Optional[float] = 0, period: Optional[float] = None, rate: Optional[float] = None,
+             overrun: OverrunPolicy = OverrunPolicy.SKIP) -> RunHandle:
         """
         Start a keyboard listener that listens for the 'esc' key to exit the loop.
 
+        Without a period or a rate the automation function is called back to back. With one of them, each iteration
+        starts on a fixed schedule against absolute deadlines, so the cadence doesn't drift over long runs,
+        and the handle's ``stats`` record jitter and overruns.
+
         :param name: Name of the automation process.
         :param automation_function: Function to be executed in the loop.
+        :param blocking: If True, block the main thread until the loop is stopped.
+        :param priority: Runs with a higher priority are admitted first when waiting for a slot.
+        :param timeout: Maximum time to wait for a slot under the parallel limit. 0 doesn't wait, None waits forever.
+        :param period: Time between the starts of two iterations, in seconds.
+        :param rate: Number of iterations per second, in Hz. Alternative to period.
+        :param overrun: What to do when an iteration ends after the next deadline (period or rate only).
+        :return: The handle of the run.
         """
+        schedule = Schedule(period, rate, overrun) if period is not None or rate is not None else None
+        handle = RunRegistry.open(name, AutomationMode.LOOP, priority, timeout)
         running = True
 
-        def stop_running():
-            nonlocal running
-            running = False
-
         message = (f"Starting automation loop for '{name}'. "
                    "Press 'esc' to stop the automation loop.")
         print(message)
         logger.info(message)
-        kl.exit_on_esc(stop_running)
+        cls._arm_emergency_stop()
+
+        def stop_running():
+            nonlocal running
+            running = False
+
+        handle.on_stop(stop_running)
+        iteration = partial(AutomationMetrics(name).run, automation_function)
 
         def thread_body():
             """
             This function runs in a separate thread to allow the main thread to continue executing.
             It will run the automation function repeatedly until the 'esc' key is pressed.
             """
-            while running:
-                try:
-                    automation_function()
-                except KeyboardInterrupt:
-                    message = f"Automation {name} interrupted by user."
-                    print(message)
-                    logger.info(message)
-                    cls.__att = AutomationMode.NONE
-                    cls.__aptc -= 1
-                    logger.debug(f"Active thread type set to {cls.__att}. Active parallel thread count: {cls.__aptc}.")
-                    break
-
-        thread = Thread(target=thread_body)
-        thread.start()
-
-        cls.__att = AutomationMode.LOOP
-        cls.__aptc += 1
-        logger.debug(f"Active thread type set to {cls.__att}. Active parallel thread count: {cls.__aptc}.")
+            try:
+                with bind(handle.token):
+                    if schedule is not None:
+                        handle.stats = schedule.stats
+                        schedule.run(iteration, lambda: running)
+                    else:
+                        while running:
+                            iteration()
+            except (KeyboardInterrupt, Cancelled):
+                message = f"Automation {name} interrupted by user."
+                print(message)
+                logger.info(message)
+            finally:
+                RunRegistry.close(handle)
+                if schedule is not None:
+                    logger.info("Automation loop '%s' finished. %s", name, schedule.stats)
+                cls._log_activity()
+
+        Thread(target=thread_body, name=f"guibot-loop-{handle.id}").start()
+        cls._log_activity()
 
-        thread.join()
+        if blocking:
+            cls._wait(handle, handle.join)
+        return handle
 
     @classmethod
     @_is_allowed(lambda cls: cls.get_active_thread_type() != AutomationMode.LOOP,
                   "Cannot start a keystroke automation while a loop automation is running.")
-    def keystroke(cls, name: str, automation_function: callable, key_activator: Union[str, Key, list[Union[str, Key]]], blocking: bool = True):
+    def keystroke(cls, name: str, automation_function: callable, key_activator: Union[str, Enum, list[Union[str, Enum]]],
+                  blocking: bool = True, policy: TriggerPolicy = TriggerPolicy.DROP, max_queue: int = 1,
+                  window: float = 0.0, edge_triggered: bool = True, priority: int = 0,
+                  timeout: Optional[float] = 0) -> RunHandle:
         """
         Start a keyboard listener that listens for a specific key or combination of keys to activate the automation
 
+        The automation function runs on the shared WorkerPool, never on the listener thread, so a slow automation
+        doesn't block the other bindings.
+
         :param name: Name of the automation process.
         :param automation_function: Function to be executed when the key is pressed.
         :param key_activator: A single character string, a Key, or a list of strings or Keys that will activate the automation function.
         :param blocking: If True, the listener will block the main thread until it is stopped. If False, it will run in the background
         and allow the main thread to continue executing.
+        :param policy: What to do when the key is pressed while the automation is still running.
+        :param max_queue: Maximum number of pending activations (TriggerPolicy.QUEUE only).
+        :param window: Time window in seconds (TriggerPolicy.THROTTLE and TriggerPolicy.DEBOUNCE only).
+        :param edge_triggered: If True, the auto-repeat presses of a key held down are ignored.
+        :param priority: Runs with a higher priority are admitted first when waiting for a slot.
+        :param timeout: Maximum time to wait for a slot under the parallel limit. 0 doesn't wait, None waits forever.
+        :return: The handle of the run. Its ``trigger`` exposes the queue depth and dropped-trigger counters.
         """
-        assert isinstance(key_activator, Key) \
+        assert isinstance(key_activator, Enum) \
             or isinstance(key_activator, str) and len(key_activator) == 1 \
-            or (isinstance(key_activator, list) and all(isinstance(k, (str, Key)) for k in key_activator)), \
+            or (isinstance(key_activator, list) and all(isinstance(k, (str, Enum)) for k in key_activator)), \
             "key_activator must be a single character string, a Key, or a list of strings or Keys."
 
-        listener = None
-
         if isinstance(key_activator, list):
-            key_activator = [(k.name if hasattr(k, 'name') else k.char) if isinstance(k, Key) else k for k in key_activator]
+            key_activator = [normalize_key(k) for k in key_activator]
             hotkeys = "+".join(key_activator)
-
             intro = (f"Starting keystroke automation for '{name}' with hotkeys '{hotkeys}'. "
                      f"Press '{hotkeys}' to activate the function or 'esc' to exit.")
-            logger.info(intro)
-            print(intro)
-
-            listener = kl.listen_for_hotkeys_then(key_activator, automation_function)
         else:
             key_name = key_activator if isinstance(key_activator, str) else key_activator.name
-
             intro = (f"Starting keystroke automation for '{name}' with activator '{key_name}'. "
-                    f"Press '{key_name}' to activate the function or 'esc' to exit.")
-            logger.info(intro)
-            print(intro)
+                     f"Press '{key_name}' to activate the function or 'esc' to exit.")
+            key_activator = [key_activator]
+        keys = frozenset(map(normalize_key, key_activator))
+
+        handle = RunRegistry.open(name, AutomationMode.KEYSTROKE, priority, timeout)
+        try:
+            handle.trigger = trigger = Trigger(name, automation_function, policy, max_queue, window, handle.token)
+            listener = ListenerHub.register(Binding(keys, trigger.fire, edge_triggered=edge_triggered))
+        except ValueError:  # e.g. an activator including 'esc'
+            RunRegistry.close(handle)
+            raise
+        logger.info(intro)
+        print(intro)
+        handle.on_stop(listener.stop)
+        cls._arm_emergency_stop()
+        cls._log_activity()
 
-            listener = kl.listen_for_key_then(key_activator, automation_function)
+        def cleanup():
+            try:
+                listener.join()
+            finally:
+                listener.stop()
+                handle.token.cancel()
+                trigger.stop()
+                trigger.join()
+                RunRegistry.close(handle)
+                cls._log_activity(name)
+
+        if blocking:
+            cls._wait(handle, cleanup)
+        else:
+            Thread(target=cleanup, daemon=True).start()
+
+        return handle
+
+    @classmethod
+    @_is_allowed(lambda cls: cls.get_active_thread_type() != AutomationMode.LOOP,
+                  "Cannot start a clipboard automation while a loop automation is running.")
+    def clipboard(cls, name: str, automation_function: callable, pattern: Union[str, re.Pattern, None] = None,
+                  predicate: Optional[callable] = None, blocking: bool = True,
+                  policy: TriggerPolicy = TriggerPolicy.DROP, max_queue: int = 1, window: float = 0.0,
+                  ignore_own: bool = True, priority: int = 0, timeout: Optional[float] = 0) -> RunHandle:
+        """
+        Run the automation function with the new text of the clipboard each time it changes.
+
+        Every clipboard automation shares the single thread of the ClipboardWatcher, which polls the clipboard with
+        an adaptive interval and debounces bursts of changes. The function runs on the shared WorkerPool.
+
+        :param name: Name of the automation process.
+        :param automation_function: Function to be executed with the new text of the clipboard.
+        :param pattern: If set, the function only runs for texts matching this regex.
+        :param predicate: If set, the function only runs for texts for which this function returns True.
+        :param blocking: If True, block the main thread until the automation is stopped.
+        :param policy: What to do when the clipboard changes while the automation is still running.
+        :param max_queue: Maximum number of pending activations (TriggerPolicy.QUEUE only).
+        :param window: Time window in seconds (TriggerPolicy.THROTTLE and TriggerPolicy.DEBOUNCE only).
+        :param ignore_own: If True, texts copied by this process through Clipboard.copy don't run the function.
+        :param priority: Runs with a higher priority are admitted first when waiting for a slot.
+        :param timeout: Maximum time to wait for a slot under the parallel limit. 0 doesn't wait, None waits forever.
+        :return: The handle of the run. Its ``trigger`` exposes the queue depth and dropped-trigger counters.
+        """
+        handle = RunRegistry.open(name, AutomationMode.CLIPBOARD, priority, timeout)
+        handle.trigger = trigger = Trigger(name, automation_function, policy, max_queue, window, handle.token)
 
-        cls.__att = AutomationMode.KEYSTROKE
-        cls.__aptc += 1
-        logger.debug(f"Active thread type set to {cls.__att}. Active parallel thread count: {cls.__aptc}.")
+        intro = f"Starting clipboard automation for '{name}'. Copy some text to activate it or press 'esc' to exit."
+        logger.info(intro)
+        print(intro)
+
+        subscription = ClipboardWatcher.subscribe(ClipboardSubscription(trigger.fire, pattern, predicate, ignore_own))
+        handle.on_stop(subscription.stop)
+        cls._arm_emergency_stop()
 
         def cleanup():
-            listener.join()
-            if cls.__att == AutomationMode.KEYSTROKE:
-                cls.__aptc -= 1
-                if cls.__aptc == 0:
-                    cls.__att = AutomationMode.NONE
-            logger.debug(f"Name: {name}. Active thread type set to {cls.__att}. Active parallel thread count: {cls.__aptc}.")
+            try:
+                subscription.join()
+            finally:
+                subscription.stop()
+                handle.token.cancel()
+                trigger.stop()
+                trigger.join()
+                RunRegistry.close(handle)
 
         if blocking:
-            cleanup()
+            cls._wait(handle, cleanup)
         else:
             Thread(target=cleanup, daemon=True).start()
 
+        return handle
 
     @classmethod
     @_is_allowed(lambda cls: True, "It's always allowed.")
-    def acquire_clicks(cls):
+    def acquire_clicks(cls, blocking: bool = True) -> RunHandle:
         """
         Start a mouse listener that logs the position of the mouse when clicked.
+
+        :param blocking: If True, block the main thread until 'esc' is pressed.
+        :return: The handle of the run.
         """
         def on_click(x, y, button, pressed):
             if pressed:
                 point = (x, y)
-                logger.info(f"Mouse clicked at {point}.")
+                logger.info("Mouse clicked at %s.", point)
                 print(f"Mouse clicked at {point}.")
 
+        handle = RunRegistry.open("acquire_clicks", AutomationMode.CLICK)
+
         intro = ("Starting mouse listener to acquire points. "
                 "Click anywhere to log the mouse position or press 'esc' to exit.")
         logger.info(intro)
         print(intro)
 
-        ml = MouseListener(on_click=on_click)
+        ml = backend.get_backend().mouse_listener(on_click=on_click)
         ml.start()
 
-        cls.__att = AutomationMode.CLICK
-        cls.__aptc += 1
-        logger.debug(f"Active thread type set to {cls.__att}. Active parallel thread count: {cls.__aptc}.")
+        stopped = Event()
+        handle.on_stop(stopped.set)
+        cls._arm_emergency_stop()
+        cls._log_activity()
+
+        def cleanup():
+            try:
+                stopped.wait()
+            finally:
+                ml.stop()
+                ml.join()
+                RunRegistry.close(handle)
+                cls._log_activity()
+
+        if blocking:
+            cls._wait(handle, cleanup)
+        else:
+            Thread(target=cleanup, daemon=True).start()
+
+        return handle
+
+    @classmethod
+    @_is_allowed(lambda cls: True, "It's always allowed.")
+    def record(cls, path: str, move_interval: float = 0.01, blocking: bool = True) -> RunHandle:
+        """
+        Record the mouse and keyboard events of the user into a binary log, until 'esc' is pressed.
+
+        :param path: Path of the log file. It is overwritten.
+        :param move_interval: Minimum time between two recorded mouse moves, in seconds. 0 keeps every move.
+        :param blocking: If True, block the main thread until the recording is stopped.
+        :return: The handle of the run. Its ``recorder`` counts the recorded events.
+        """
+        from src.recorder import Recorder
+
+        handle = RunRegistry.open(f"record {path}", AutomationMode.RECORD)
+        handle.recorder = recorder = Recorder(path, move_interval)
+
+        message = f"Recording input events to {path}. Press 'esc' to stop the recording."
+        logger.info(message)
+        print(message)
+
+        recorder.start()
+        stopped = Event()
+        handle.on_stop(stopped.set)
+        cls._arm_emergency_stop()
+
+        def cleanup():
+            try:
+                stopped.wait()
+            finally:
+                recorder.stop()
+                RunRegistry.close(handle)
+
+        if blocking:
+            cls._wait(handle, cleanup)
+        else:
+            Thread(target=cleanup, daemon=True).start()
+
+        return handle
+
+    @classmethod
+    @_is_allowed(lambda cls: cls.get_active_thread_type() != AutomationMode.LOOP,
+                 "Cannot start a replay while a loop automation is running.")
+    def replay(cls, path: str, speed: float = 1.0, max_idle: Optional[float] = None, blocking: bool = True,
+               priority: int = 0, timeout: Optional[float] = 0) -> RunHandle:
+        """
+        Play a log written by `record` back, with the timing of the recording.
+
+        :param path: Path of the log file.
+        :param speed: Speed multiplier, e.g. 2 to replay twice as fast.
+        :param max_idle: If set, idle gaps of the recording longer than this are shortened to it, in seconds.
+        :param blocking: If True, block the main thread until the replay has finished or is stopped.
+        :param priority: Runs with a higher priority are admitted first when waiting for a slot.
+        :param timeout: Maximum time to wait for a slot under the parallel limit. 0 doesn't wait, None waits forever.
+        :return: The handle of the run. Its ``stats`` record the timing error of every event sent.
+        """
+        from src.replay import Replay  # imports the controllers and NumPy, not needed by most automations
+
+        replay = Replay(path, speed, max_idle)
+        handle = RunRegistry.open(f"replay {path}", AutomationMode.REPLAY, priority, timeout)
+        handle.stats = replay.stats
+
+        message = f"Replaying {path}. Press 'esc' to stop the replay."
+        print(message)
+        logger.info(message)
+        cls._arm_emergency_stop()
+
+        def thread_body():
+            try:
+                with bind(handle.token):
+                    replay.run()
+            except (KeyboardInterrupt, Cancelled):
+                message = f"Replay of {path} interrupted by user."
+                print(message)
+                logger.info(message)
+            except Exception:
+                logger.exception("Replay of %s failed.", path)
+            finally:
+                RunRegistry.close(handle)
+
+        Thread(target=thread_body, name=f"guibot-replay-{handle.id}").start()
+        if blocking:
+            cls._wait(handle, handle.join)
+        return handle
+
+    @classmethod
+    @_is_allowed(lambda cls: cls.get_active_thread_type() == AutomationMode.NONE,
+                 "Cannot start tuning an automation while another is running.")
+    def tune(cls, name: str, automation_function: callable, verifier: callable, waits: list,
+             reset: Optional[callable] = None, confirmations: Optional[int] = None, blocking: bool = True,
+             priority: int = 0, timeout: Optional[float] = 0) -> RunHandle:
+        """
+        Run an automation function over and over to shorten its tunable waits (see AutoTuner): each wait is set to
+        the shortest value with which every run still passes the verifier. The tuned values are persisted for this
+        machine and used by the next runs of the automation.
+
+        :param name: Name of the automation.
+        :param automation_function: Function running the macro once, reading the waits with ``wait.value``.
+        :param verifier: Function called after each run, returning True if the run succeeded.
+        :param waits: The tunable waits, as returned by `AutoTuner.tunable`.
+        :param reset: Function called after a failed run, to bring the application back to its initial state.
+        :param confirmations: Runs in a row that must pass the verifier for a value to be reliable.
+        :param blocking: If True, block the main thread until the tuning has finished or is stopped.
+        :param priority: Runs with a higher priority are admitted first when waiting for a slot.
+        :param timeout: Maximum time to wait for a slot under the parallel limit. 0 doesn't wait, None waits forever.
+        :return: The handle of the run. Its ``tuner`` is the AutoTuner, with the number of runs and failures.
+        """
+        from src.autotune import AutoTuner  # imports the parameters, not needed by most automations
+
+        tuner = AutoTuner(partial(AutomationMetrics(name).run, automation_function), verifier, waits, reset,
+                          confirmations or AutoTuner.CONFIRMATIONS)
+        handle = RunRegistry.open(f"tune {name}", AutomationMode.TUNE, priority, timeout)
+        handle.tuner = tuner
+
+        message = f"Tuning the waits of '{name}'. Press 'esc' to stop the tuning."
+        print(message)
+        logger.info(message)
+        cls._arm_emergency_stop()
+
+        def thread_body():
+            try:
+                with bind(handle.token):
+                    values = tuner.tune()
+                message = f"Waits of '{name}' tuned in {tuner.trials} runs: {values}."
+                print(message)
+                logger.info(message)
+            except (KeyboardInterrupt, Cancelled):
+                message = f"Tuning of {name} interrupted by user."
+                print(message)
+                logger.info(message)
+            except Exception:
+                logger.exception("Tuning of %s failed.", name)
+            finally:
+                RunRegistry.close(handle)
+
+        Thread(target=thread_body, name=f"guibot-tune-{handle.id}").start()
+        if blocking:
+            cls._wait(handle, handle.join)
+        return handle
+
+    @classmethod
+    @_is_allowed(lambda cls: cls.get_active_thread_type() != AutomationMode.LOOP,
+                 "Cannot start a control server while a loop automation is running.")
+    def serve(cls, automations: dict[str, callable], address: Optional[str] = None, blocking: bool = True,
+              policy: TriggerPolicy = TriggerPolicy.DROP, max_queue: int = 1, window: float = 0.0, priority: int = 0,
+              timeout: Optional[float] = 0) -> RunHandle:
+        """
+        Serve automations through a local control socket, so that other programs list them, trigger them with
+        arguments, query the runs and stop them with line-delimited JSON requests (see src.control), without
+        starting a new process.
+
+        Like keystroke automations, each automation runs on the shared WorkerPool with its own Trigger, and the
+        server holds a single run, whatever the number of automations served. Over TCP, every request must carry
+        the token the server writes to an owner-only file, which ControlClient reads.
+
+        :param automations: The automation functions, by name. Requests pass their arguments to them.
+        :param address: Path of a Unix domain socket, or 'host:port' for TCP on a loopback host. None uses
+            CONTROL_ADDRESS, or ~/.guibot/control.sock.
+        :param blocking: If True, block the main thread until the server is stopped.
+        :param policy: What to do when an automation is triggered while it is still running.
+        :param max_queue: Maximum number of pending activations (TriggerPolicy.QUEUE only).
+        :param window: Time window in seconds (TriggerPolicy.THROTTLE and TriggerPolicy.DEBOUNCE only).
+        :param priority: Runs with a higher priority are admitted first when waiting for a slot.
+        :param timeout: Maximum time to wait for a slot under the parallel limit. 0 doesn't wait, None waits forever.
+        :return: The handle of the run. Its ``server`` is the ControlServer, with the trigger of each automation.
+        """
+        from src.control import ControlServer  # imports json and socket, not needed by most automations
+
+        handle = RunRegistry.open(f"control {', '.join(automations)}", AutomationMode.CONTROL, priority, timeout)
+        try:
+            triggers = {name: Trigger(name, function, policy, max_queue, window, handle.token)
+                        for name, function in automations.items()}
+            server = handle.server = ControlServer(triggers, handle, address)
+            server.start()
+        except (OSError, ValueError):
+            RunRegistry.close(handle)
+            raise
+        handle.on_stop(server.stop)
+
+        intro = f"Serving {', '.join(automations)} on {server.address}. Press 'esc' to exit."
+        logger.info(intro)
+        print(intro)
+        cls._arm_emergency_stop()
+
+        def cleanup():
+            try:
+                server.join()
+            finally:
+                server.stop()
+                handle.token.cancel()
+                for trigger in triggers.values():
+                    trigger.stop()
+                    trigger.join()
+                RunRegistry.close(handle)
 
-        kl.exit_on_esc().join()
-        ml.stop()
-        ml.join()
+        if blocking:
+            cls._wait(handle, cleanup)
+        else:
+            Thread(target=cleanup, daemon=True).start()
 
-        if cls.get_active_thread_type() == AutomationMode.CLICK:
-            cls.__att = AutomationMode.NONE
-        cls.__aptc -= 1
-        logger.debug(f"Active thread type set to {cls.__att}. Active parallel thread count: {cls.__aptc}.")
+        return handle
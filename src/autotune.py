@@ -0,0 +1,190 @@
+"""
+Auto-tuning of the waits of a macro: each tunable wait is shortened to the shortest value the macro still
+succeeds with, as judged by a verifier supplied by the user (a clipboard check, a pixel check...).
+
+The waits are tuned one at a time, the longest first, the others keeping their initial values so that a failure
+can only come from the wait being tuned. A binary search runs between the longest value known to fail (or the
+minimum) and the shortest value known to succeed (at first, the current value). A value succeeds when
+CONFIRMATIONS runs in a row pass the verifier, and fails at the first run that doesn't, so a flaky value is
+rejected quickly. The result must then pass VERIFICATIONS runs in a row, being lengthened by the MARGIN until it
+does, and the value kept is the first one passing plus the MARGIN: the first value passing is still at the edge of
+the failures. A wait never goes beyond the value the search started from. Finally, the tuned values are verified
+together the same way, and lengthened together until they pass.
+
+A value passing N runs in a row fails less than 3/N of the runs, with 95% confidence; the margin above it brings
+the failure rate of the tuned macro back to that of the hand-picked waits in practice (see benchmarks.autotune).
+Raise VERIFICATIONS or MARGIN for macros that must never fail, at the cost of a longer tuning or longer waits.
+
+Tunable waits are parameters (see `ParameterStore`), named after the machine they are tuned on: the tuned values
+are persisted and loaded on the next start, and a macro shared between machines keeps a set of values per machine.
+"""
+import platform
+from time import perf_counter
+from typing import Optional
+from src.cancellation import Cancelled
+from src.logger import get_logger
+from src.parameters import Parameter, ParameterStore
+
+logger = get_logger(__name__)
+
+
+class AutoTuner:
+    """ Binary search of the shortest reliable value of each tunable wait of a macro. """
+    CONFIRMATIONS = 3  # runs in a row that must pass the verifier for a value to be kept in the search
+    VERIFICATIONS = 100  # runs in a row for the value of a wait to be kept: it fails at most 3/100 of the runs (95%)
+    MARGIN = 0.25  # the value kept is the shortest one passing the verifications increased by this fraction
+    TOLERANCE = 0.01  # seconds: the search of a wait stops when the reliable and failing values are this close
+
+    def __init__(self, run: callable, verifier: callable, waits: list[Parameter], reset: Optional[callable] = None,
+                 confirmations: int = CONFIRMATIONS, verifications: int = VERIFICATIONS, margin: float = MARGIN,
+                 tolerance: float = TOLERANCE):
+        """
+        :param run: Function running the macro once, reading the waits with ``wait.value``.
+        :param verifier: Function called after each run, returning True if the run succeeded.
+        :param waits: The tunable waits, as returned by `AutoTuner.tunable`.
+        :param reset: Function called after a failed run, to bring the application back to its initial state.
+        :param confirmations: Runs in a row that must pass the verifier for a value to be kept in the search.
+        :param verifications: Runs in a row that must pass the verifier for the final value of a wait.
+        :param margin: The value kept is the shortest one passing the verifications increased by this fraction.
+        :param tolerance: Precision of the search, in seconds.
+        """
+        if confirmations < 1:
+            message = f"Invalid number of confirmations: {confirmations}. Must be at least 1."
+            logger.error(message)
+            raise ValueError(message)
+        self.run = run
+        self.verifier = verifier
+        self.waits = list(waits)
+        self.reset = reset
+        self.confirmations = confirmations
+        self.verifications = max(verifications, confirmations)
+        self.margin = margin
+        self.tolerance = tolerance
+        self.trials = 0
+        self.failures = 0
+        self.initial = {wait.name: wait.value for wait in self.waits}
+
+    @staticmethod
+    def tunable(name: str, default: float, minimum: float = 0.0, maximum: Optional[float] = None) -> Parameter:
+        """
+        Define a tunable wait of this machine, with its tuned value if it has been tuned already.
+
+        :param name: Name of the wait, e.g. 'power_and_click.long_wait'. The name of the machine is appended to it.
+        :param default: Value before tuning, in seconds. It must be reliable: the search never goes above it.
+        :param minimum: Shortest value the search tries, in seconds.
+        :param maximum: Longest value, or None for no bound.
+        :return: The parameter holding the wait.
+        """
+        return ParameterStore.define(f"{name}@{platform.node()}", float(default), minimum, maximum)
+
+    def tune(self) -> dict[str, float]:
+        """
+        Tune every wait in turn, the longest first, then check the tuned values together.
+
+        If the macro doesn't succeed with the current values, nothing is changed. If the search is interrupted,
+        the waits tuned so far keep their tuned value and the others their current value.
+
+        :return: The tuned value of each wait, by parameter name.
+        :raises Cancelled: If the automation is stopped during the search.
+        """
+        if not self.reliable():
+            logger.error("The macro doesn't succeed with the current waits %s: nothing to tune.", self.values())
+            return self.values()
+
+        tuned: dict[Parameter, float] = {}
+        try:
+            for wait in sorted(self.waits, key=lambda wait: wait.value, reverse=True):
+                tuned[wait] = self.__search(wait)
+        finally:
+            for wait, value in tuned.items():
+                wait.set(value)
+
+        while not self.reliable(self.verifications):
+            lengthened = {wait.name: self.__lengthen(wait.value, self.initial[wait.name]) for wait in self.waits}
+            if lengthened == self.values():
+                logger.warning("The macro fails with the initial waits too: keeping them.")
+                break
+            logger.info("The tuned waits fail together: lengthening them to %s.", lengthened)
+            for wait in self.waits:
+                wait.set(lengthened[wait.name])
+        logger.info("Tuned the waits in %d runs (%d failed): %s, from %s.",
+                    self.trials, self.failures, self.values(), self.initial)
+        return self.values()
+
+    def values(self) -> dict[str, float]:
+        """Get the current value of each wait, by parameter name."""
+        return {wait.name: wait.value for wait in self.waits}
+
+    def trial(self) -> bool:
+        """
+        Run the macro once and check it with the verifier. An exception of the macro or the verifier is a failure.
+
+        :return: True if the run succeeded.
+        :raises Cancelled: If the automation is stopped during the run.
+        """
+        self.trials += 1
+        start = perf_counter()
+        try:
+            self.run()
+            succeeded = bool(self.verifier())
+        except Cancelled:
+            raise
+        except Exception:
+            logger.exception("Run %d of the macro failed.", self.trials)
+            succeeded = False
+        logger.debug("Run %d %s in %.3f s with %s.", self.trials, "succeeded" if succeeded else "failed",
+                     perf_counter() - start, self.values())
+        if not succeeded:
+            self.failures += 1
+            if self.reset is not None:
+                self.reset()
+        return succeeded
+
+    def reliable(self, runs: Optional[int] = None) -> bool:
+        """
+        Check that the macro succeeds with the current values, a number of runs in a row.
+
+        :param runs: Number of runs, or None for the number of confirmations.
+        :return: False at the first run that fails.
+        """
+        return all(self.trial() for _ in range(runs or self.confirmations))
+
+    def __search(self, wait: Parameter) -> float:
+        """
+        Search the shortest reliable value of a wait, the others keeping their initial values, so that a failure
+        can only come from this wait. The wait is set back to its initial value afterwards.
+
+        :return: The shortest value passing the verifications, with the margin.
+        """
+        start = wait.value
+        succeeded = start
+        failed = wait.minimum if wait.minimum is not None else 0.0
+        try:
+            wait.set(failed)
+            if self.reliable():
+                succeeded = failed
+            while succeeded - failed > self.tolerance:
+                candidate = wait.set((failed + succeeded) / 2)
+                if self.reliable():
+                    succeeded = candidate
+                else:
+                    failed = candidate
+
+            # the binary search stops on the first value passing a few runs: lengthen it until it passes many more
+            value = succeeded
+            while value < start:
+                wait.set(value)
+                if self.reliable(self.verifications):
+                    break
+                value = self.__lengthen(value, start)
+            # the first value passing is still at the edge of the failures: keep the margin above it
+            value = self.__lengthen(value, start)
+        finally:
+            wait.set(start)
+        logger.info("Wait '%s' tuned to %s s (shortest value passing %d runs: %s s, from %s s).",
+                    wait.name, value, self.confirmations, succeeded, start)
+        return value
+
+    def __lengthen(self, value: float, start: float) -> float:
+        """Get a wait lengthened by the margin, or by the tolerance if that is more, never beyond its start."""
+        return min(max(value * (1 + self.margin), value + self.tolerance), start)
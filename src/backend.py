@@ -0,0 +1,409 @@
+"""
+Pluggable input backend.
+
+Controllers, listeners and the clipboard never talk to pynput or pyperclip directly: they go through the
+attributes of this module, which point to the active backend.
+
+- ``keyboard`` / ``mouse``: the controllers that send the input events.
+- ``clipboard``: an object with ``copy(text)`` and ``paste()``, and optionally ``change_count()`` returning a
+  counter that changes with the content of the clipboard, or None.
+- ``keymap``: the keycode table of the active keyboard layout, or None if the backend has none. It has
+  ``layout()``, returning a value that changes with the layout, ``build()``, returning the (keycode, modifier
+  keycodes) of each character and special key the layout types, and ``send(events)``, sending a sequence of
+  (keycode, pressed) events at once. See `src.keymap.KeyTable`.
+- ``Key`` / ``KeyCode`` / ``Button``: the key and button types of the backend.
+
+The backend is chosen on first use from the INPUT_BACKEND environment variable ('pynput' by default), or
+explicitly with `use`. The 'null' and 'recording' backends keep everything in memory and need no display.
+"""
+import string
+from enum import Enum
+from threading import RLock
+from time import perf_counter
+from typing import Optional, Union
+from src.env import get_input_backend
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+ATTRIBUTES = ('keyboard', 'mouse', 'clipboard', 'keymap', 'Key', 'KeyCode', 'Button')
+
+# Same members as pynput.keyboard.Key, so automations written for pynput run unchanged on the null backend.
+KEY_NAMES = ('alt alt_l alt_r alt_gr backspace caps_lock cmd cmd_l cmd_r ctrl ctrl_l ctrl_r delete down end enter '
+             'esc f1 f2 f3 f4 f5 f6 f7 f8 f9 f10 f11 f12 f13 f14 f15 f16 f17 f18 f19 f20 home left page_down '
+             'page_up right shift shift_l shift_r space tab up media_play_pause media_volume_mute '
+             'media_volume_down media_volume_up media_previous media_next insert menu num_lock pause '
+             'print_screen scroll_lock')
+
+
+class InputBackend:
+    """
+    Base class of the input backends.
+
+    A backend provides the ``keyboard`` and ``mouse`` controllers, the ``clipboard``, the ``keymap``, the
+    ``Key``, ``KeyCode`` and ``Button`` types, and factories for the keyboard and mouse listeners.
+    """
+    name: str = ''
+    keymap = None
+
+    def keyboard_listener(self, on_press: Optional[callable] = None, on_release: Optional[callable] = None):
+        """
+        Create a keyboard listener. The listener is not started.
+
+        :param on_press: Function called with the key when a key is pressed.
+        :param on_release: Function called with the key when a key is released.
+        :return: A listener with ``start()``, ``stop()``, ``join()`` and a ``running`` attribute.
+        """
+        raise NotImplementedError
+
+    def mouse_listener(self, on_click: Optional[callable] = None, on_move: Optional[callable] = None,
+                       on_scroll: Optional[callable] = None):
+        """
+        Create a mouse listener. The listener is not started.
+
+        :param on_click: Function called with (x, y, button, pressed) when a button is pressed or released.
+        :param on_move: Function called with (x, y) when the pointer moves.
+        :param on_scroll: Function called with (x, y, dx, dy) when the wheel is scrolled.
+        :return: A listener with ``start()``, ``stop()``, ``join()`` and a ``running`` attribute.
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class PynputBackend(InputBackend):
+    """ Sends real input events through pynput, and uses pyperclip for the clipboard. """
+    name = 'pynput'
+
+    def __init__(self):
+        # Imported here: pynput connects to the display as soon as it is imported.
+        from pynput import keyboard, mouse
+        from src.system_clipboard import SystemClipboard
+        from src.system_keymap import get_system_keymap
+
+        self.__keyboard = keyboard
+        self.__mouse = mouse
+        self.keyboard = keyboard.Controller()
+        self.mouse = mouse.Controller()
+        self.clipboard = SystemClipboard()
+        self.keymap = get_system_keymap(self.keyboard, keyboard.Key)
+        self.Key = keyboard.Key
+        self.KeyCode = keyboard.KeyCode
+        self.Button = mouse.Button
+
+    def keyboard_listener(self, on_press: Optional[callable] = None, on_release: Optional[callable] = None):
+        return self.__keyboard.Listener(on_press=on_press, on_release=on_release)
+
+    def mouse_listener(self, on_click: Optional[callable] = None, on_move: Optional[callable] = None,
+                       on_scroll: Optional[callable] = None):
+        return self.__mouse.Listener(on_click=on_click, on_move=on_move, on_scroll=on_scroll)
+
+
+NullKey = Enum('Key', KEY_NAMES)
+NullButton = Enum('Button', 'unknown left middle right')
+
+
+class NullKeyCode:
+    """ Key of the null backend, identified by its character, or by its virtual key code if it has none. """
+    __slots__ = ('char', 'vk')
+
+    def __init__(self, char: Optional[str] = None, vk: Optional[int] = None):
+        self.char = char
+        self.vk = vk
+
+    @classmethod
+    def from_char(cls, char: str) -> 'NullKeyCode':
+        """ Create a key from its character. """
+        return cls(char)
+
+    @classmethod
+    def from_vk(cls, vk: int) -> 'NullKeyCode':
+        """ Create a key from its virtual key code. """
+        return cls(vk=vk)
+
+    def __eq__(self, other):
+        return isinstance(other, NullKeyCode) and other.char == self.char and other.vk == self.vk
+
+    def __hash__(self):
+        return hash((self.char, self.vk))
+
+    def __repr__(self):
+        return repr(self.char) if self.vk is None else f"<{self.vk}>"
+
+
+class NullKeyboard:
+    """ Keyboard controller that sends nothing, only keeping track of the pressed keys. """
+    def __init__(self):
+        self.pressed: set = set()
+
+    def press(self, key: Union[str, Enum, NullKeyCode]):
+        self.pressed.add(key)
+
+    def release(self, key: Union[str, Enum, NullKeyCode]):
+        self.pressed.discard(key)
+
+    def type(self, text: str):
+        pass
+
+
+class NullMouse:
+    """ Mouse controller that sends nothing, only keeping track of the position and of the pressed buttons. """
+    def __init__(self):
+        self.position: tuple[float, float] = (0, 0)
+        self.pressed: set = set()
+
+    def press(self, button: Enum):
+        self.pressed.add(button)
+
+    def release(self, button: Enum):
+        self.pressed.discard(button)
+
+    def click(self, button: Enum, count: int = 1):
+        pass
+
+    def move(self, dx: float, dy: float):
+        self.position = (self.position[0] + dx, self.position[1] + dy)
+
+    def scroll(self, dx: int, dy: int):
+        pass
+
+
+class NullKeymap:
+    """
+    Keymap of a US layout, with made-up keycodes. Sending the events presses and releases the keys on a keyboard,
+    so the null keyboard keeps track of them and the recording backend records them as keyboard events.
+    """
+    SHIFTED = frozenset('~!@#$%^&*()_+{}|:"<>?' + string.ascii_uppercase)
+
+    def __init__(self, keyboard):
+        """
+        :param keyboard: The keyboard pressing and releasing the keys.
+        """
+        self.keyboard = keyboard
+        self.name = 'us'  # change it to simulate a change of layout
+        self.__keys = [*NullKey, *(chr(code) for code in range(0x20, 0x7f))]
+
+    def layout(self) -> str:
+        return self.name
+
+    def build(self) -> dict[Union[str, Enum], tuple[int, tuple[int, ...]]]:
+        shift = (self.__keys.index(NullKey.shift),)
+        table = {key: (keycode, shift if key in self.SHIFTED else ()) for keycode, key in enumerate(self.__keys)}
+        table.update({'\n': table[NullKey.enter], '\t': table[NullKey.tab]})
+        return table
+
+    def send(self, events):
+        for keycode, pressed in events:
+            key = self.__keys[keycode]
+            if pressed:
+                self.keyboard.press(key)
+            else:
+                self.keyboard.release(key)
+
+
+class MemoryClipboard:
+    """ Clipboard kept in memory. """
+    def __init__(self):
+        self.text = ''
+        self.changes = 0
+
+    def copy(self, text: str):
+        self.text = text
+        self.changes += 1
+
+    def paste(self) -> str:
+        return self.text
+
+    def change_count(self) -> int:
+        return self.changes
+
+
+class NullListener:
+    """
+    Listener that never receives events from the system.
+
+    Events can be injected with `press`, `release`, `click`, `move` and `scroll`, which call the handlers directly.
+    """
+    def __init__(self, on_press: Optional[callable] = None, on_release: Optional[callable] = None,
+                 on_click: Optional[callable] = None, on_move: Optional[callable] = None,
+                 on_scroll: Optional[callable] = None):
+        self.on_press = on_press
+        self.on_release = on_release
+        self.on_click = on_click
+        self.on_move = on_move
+        self.on_scroll = on_scroll
+        self.running = False
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def join(self, timeout: Optional[float] = None):
+        pass
+
+    def press(self, key):
+        """ Simulate a key press. """
+        if self.running and self.on_press is not None and self.on_press(key) is False:
+            self.stop()
+
+    def release(self, key):
+        """ Simulate a key release. """
+        if self.running and self.on_release is not None:
+            self.on_release(key)
+
+    def click(self, x: float, y: float, button: Enum, pressed: bool):
+        """ Simulate a mouse button press or release. """
+        if self.running and self.on_click is not None and self.on_click(x, y, button, pressed) is False:
+            self.stop()
+
+    def move(self, x: float, y: float):
+        """ Simulate a pointer movement. """
+        if self.running and self.on_move is not None and self.on_move(x, y) is False:
+            self.stop()
+
+    def scroll(self, x: float, y: float, dx: int, dy: int):
+        """ Simulate a wheel scroll. """
+        if self.running and self.on_scroll is not None and self.on_scroll(x, y, dx, dy) is False:
+            self.stop()
+
+
+class NullBackend(InputBackend):
+    """ Backend that sends nothing and keeps the clipboard in memory. Needs no display. """
+    name = 'null'
+    Key = NullKey
+    KeyCode = NullKeyCode
+    Button = NullButton
+
+    def __init__(self):
+        self.keyboard = NullKeyboard()
+        self.mouse = NullMouse()
+        self.clipboard = MemoryClipboard()
+        self.keymap = NullKeymap(self.keyboard)
+        self.listeners: list[NullListener] = []
+
+    def keyboard_listener(self, on_press: Optional[callable] = None, on_release: Optional[callable] = None):
+        listener = NullListener(on_press=on_press, on_release=on_release)
+        self.listeners.append(listener)
+        return listener
+
+    def mouse_listener(self, on_click: Optional[callable] = None, on_move: Optional[callable] = None,
+                       on_scroll: Optional[callable] = None):
+        listener = NullListener(on_click=on_click, on_move=on_move, on_scroll=on_scroll)
+        self.listeners.append(listener)
+        return listener
+
+
+class _Recorder:
+    """ Wraps a null device, appending every call to the event log of the backend. """
+    def __init__(self, device: str, target, events: list, clock: callable):
+        self.__device = device
+        self.__target = target
+        self.__events = events
+        self.__clock = clock
+
+    @property
+    def position(self):
+        return self.__target.position
+
+    @position.setter
+    def position(self, position: tuple[float, float]):
+        self.__events.append((self.__clock(), self.__device, 'position', tuple(position)))
+        self.__target.position = position
+
+    @property
+    def pressed(self) -> set:
+        return self.__target.pressed
+
+    def change_count(self):
+        return self.__target.change_count()  # a query, not an input event: not recorded
+
+    def __getattr__(self, action: str):
+        method = getattr(self.__target, action)
+
+        def record(*args):
+            self.__events.append((self.__clock(), self.__device, action, args))
+            return method(*args)
+        return record
+
+
+class RecordingBackend(NullBackend):
+    """
+    Null backend that also records every input event.
+
+    Events are (time, device, action, args) tuples, e.g. (12.5, 'mouse', 'click', (Button.left, 1)),
+    where device is 'keyboard', 'mouse' or 'clipboard'.
+    """
+    name = 'recording'
+
+    def __init__(self, clock: callable = perf_counter):
+        """
+        :param clock: Function returning the timestamp of the events, in seconds.
+        """
+        super().__init__()
+        self.events: list[tuple[float, str, str, tuple]] = []
+        self.keyboard = _Recorder('keyboard', self.keyboard, self.events, clock)
+        self.mouse = _Recorder('mouse', self.mouse, self.events, clock)
+        self.clipboard = _Recorder('clipboard', self.clipboard, self.events, clock)
+        self.keymap = NullKeymap(self.keyboard)  # its events are recorded as keyboard events
+
+
+BACKENDS: dict[str, type[InputBackend]] = {
+    PynputBackend.name: PynputBackend,
+    NullBackend.name: NullBackend,
+    RecordingBackend.name: RecordingBackend,
+}
+
+_lock = RLock()  # reentrant: get_backend calls use while holding it
+_current: Optional[InputBackend] = None
+
+
+def use(backend: Union[InputBackend, str, None]) -> Optional[InputBackend]:
+    """
+    Make a backend the active one. Listeners already running keep the backend they were created with.
+
+    :param backend: A backend instance, the name of a backend ('pynput', 'null' or 'recording'), or None to go
+        back to the backend named by INPUT_BACKEND, created on next use.
+    :return: The active backend, or None.
+    """
+    global _current
+    if isinstance(backend, str):
+        if backend not in BACKENDS:
+            message = f"Unknown input backend: '{backend}'. Available backends: {', '.join(BACKENDS)}."
+            logger.error(message)
+            raise ValueError(message)
+        backend = BACKENDS[backend]()
+
+    with _lock:
+        _current = backend
+        for attribute in ATTRIBUTES:
+            if backend is not None:
+                globals()[attribute] = getattr(backend, attribute)
+            else:
+                globals().pop(attribute, None)
+    if backend is not None:
+        logger.info("Using the %s input backend.", backend.name)
+    return backend
+
+
+def get_backend(create: bool = True) -> Optional[InputBackend]:
+    """
+    Get the active backend.
+
+    :param create: If True and no backend is active, create the one named by INPUT_BACKEND.
+    :return: The active backend, or None if there is none and create is False.
+    """
+    with _lock:  # held while creating, so that threads racing on first use share one backend
+        if _current is None and create:
+            use(get_input_backend())
+        return _current
+
+
+def __getattr__(name: str):
+    # Only called until a backend is active: `use` then sets the attributes as module globals.
+    if name in ATTRIBUTES:
+        get_backend()
+        return globals()[name]
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
@@ -1,29 +1,89 @@
-from time import sleep
+from logging import INFO
+from time import perf_counter
 from typing import Union
 
+from src import clock
+from src.cancellation import current_token
 from src.enums import Interval
 from src.logger import get_logger
+from src.metrics import MetricsRegistry
+from src.tracer import traced
 
 logger = get_logger(__name__)
+wait_seconds = MetricsRegistry.counter('guibot_wait_seconds_total')
+input_seconds = MetricsRegistry.counter('guibot_input_seconds_total')
+inputs = MetricsRegistry.counter('guibot_inputs_total')
 
+@traced('wait', 'inject')
 class BaseController:
     @staticmethod
     def wait(time: Union[Interval, float]):
         """
         Wait for a specified interval.
 
+        The wait returns as soon as the cancellation token of the current thread is cancelled.
+
         :param time: Interval to wait.
+        :raises Cancelled: If the automation is stopped during the wait.
         """
         if isinstance(time, Interval):
-            logger.info(f"Waiting for a {time.name} interval: {time.value} seconds.")
-            sleep(time.value)
+            if logger.isEnabledFor(INFO):
+                logger.info("Waiting for a %s interval: %s seconds.", time.name, time.value)
+            BaseController.__sleep(time.value)
         elif isinstance(time, (int, float)):
             if time > 0:
-                logger.info(f"Waiting for {time} seconds.")
-                sleep(time)
+                logger.info("Waiting for %s seconds.", time)
+                BaseController.__sleep(time)
             else:
-                logger.debug(f"Received non-positive wait time or zero: {time}. No waiting will occur.")
+                logger.debug("Received non-positive wait time or zero: %s. No waiting will occur.", time)
         else:
             message = f"Invalid type for time: {type(time)}. Must be Interval, int, or float."
             logger.error(message)
             raise TypeError(message)
+
+    @staticmethod
+    def __sleep(seconds: float):
+        """Sleep on the active clock and the token of the current thread, accounting the time spent waiting."""
+        start = clock.now()
+        try:
+            clock.sleep(seconds)
+        finally:
+            wait_seconds.inc(clock.now() - start)
+
+    @staticmethod
+    def inject(function: callable, *args, check: bool = True):
+        """
+        Send an input event through the backend, accounting the time spent injecting it.
+
+        :param function: Backend function sending the event, e.g. ``mouse.click``.
+        :param args: Arguments to pass to the function.
+        :param check: If True, check the cancellation token first. Releases pass False, so they always go through.
+        :raises Cancelled: If check is True and the automation has been stopped.
+        """
+        if check:
+            current_token().raise_if_cancelled()
+        start = perf_counter()
+        try:
+            return function(*args)
+        finally:
+            input_seconds.inc(perf_counter() - start)
+            inputs.inc()
+
+    @staticmethod
+    def check_cancelled():
+        """
+        Check the cancellation token of the current thread before injecting an input event.
+
+        :raises Cancelled: If the automation has been stopped.
+        """
+        current_token().raise_if_cancelled()
+
+    @classmethod
+    def release_pressed(cls):
+        """Release the keys or buttons pressed through this controller and not released yet."""
+
+    @staticmethod
+    def release_all():
+        """Release every key and button still pressed through any controller."""
+        for controller in BaseController.__subclasses__():
+            controller.release_pressed()
@@ -0,0 +1,96 @@
+from contextlib import contextmanager
+from threading import Event, Lock, local
+from typing import Optional
+from weakref import WeakSet
+
+# Guaranteed upper bound between a cancellation and the moment every wait has returned, in seconds.
+STOP_LATENCY = 0.05
+
+
+class Cancelled(Exception):
+    """Raised inside an automation when its cancellation token is cancelled."""
+
+
+class CancellationToken:
+    """
+    Event-based cancellation token.
+
+    Waiting on a token returns as soon as it is cancelled, so a stop takes effect immediately instead of at the
+    end of the current sleep. Cancelling a token also cancels its children.
+    """
+    def __init__(self, parent: Optional['CancellationToken'] = None):
+        """
+        :param parent: Token whose cancellation also cancels this one.
+        """
+        self._event = Event()
+        self._children: WeakSet[CancellationToken] = WeakSet()
+        self._lock = Lock()
+        if parent is not None:
+            with parent._lock:
+                parent._children.add(self)
+            if parent.cancelled:
+                self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """True once the token has been cancelled."""
+        return self._event.is_set()
+
+    def cancel(self):
+        """Cancel the token and its children, waking up everything waiting on them."""
+        self._event.set()
+        with self._lock:
+            children = list(self._children)
+        for child in children:
+            child.cancel()
+
+    def reset(self):
+        """Make the token usable again. Children that have already been cancelled stay cancelled."""
+        self._event.clear()
+
+    def raise_if_cancelled(self):
+        """
+        :raises Cancelled: If the token has been cancelled.
+        """
+        if self._event.is_set():
+            raise Cancelled()
+
+    def sleep(self, seconds: float):
+        """
+        Sleep for the given time, returning early if the token is cancelled.
+
+        :param seconds: Time to sleep in seconds.
+        :raises Cancelled: If the token is cancelled before or during the sleep.
+        """
+        if self._event.wait(seconds if seconds > 0 else 0):
+            raise Cancelled()
+
+
+ROOT = CancellationToken()
+
+
+class _Local(local):
+    token: Optional[CancellationToken] = None  # class attribute: no AttributeError on threads without a token
+
+
+_local = _Local()
+
+
+def current_token() -> CancellationToken:
+    """Get the token bound to the current thread, or the root token if none is bound."""
+    return _local.token or ROOT
+
+
+@contextmanager
+def bind(token: CancellationToken):
+    """
+    Bind a token to the current thread for the duration of the block.
+
+    :param token: The token that the waits in the block will check.
+    """
+    previous = _local.token
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
@@ -1,17 +1,85 @@
 import re
-from pyperclip import copy, paste
+from functools import lru_cache
+from threading import Lock
+from typing import Iterable, Optional
+from src import backend
+from src.tracer import traced
 
+
+@lru_cache(maxsize=256)
+def _keyword_matcher(keywords: tuple[str, ...], case_sensitive: bool) -> tuple[re.Pattern, dict[str, str]]:
+    """
+    Compile keywords into one alternation, longest first, so one search finds any of them.
+
+    Case-insensitive matchers are compiled from the lowercase keywords and run on the lowercase text: much faster
+    than re.IGNORECASE, and the same comparison as ``str.lower`` in `Clipboard.contains`.
+
+    :return: The pattern, and the keyword of each text the pattern can match.
+    """
+    found = {(keyword if case_sensitive else keyword.lower()): keyword for keyword in reversed(keywords)}
+    alternation = '|'.join(re.escape(text) for text in sorted(found, key=len, reverse=True))
+    return re.compile(alternation), found
+
+
+@lru_cache(maxsize=256)
+def _pattern_matcher(patterns: tuple[str, ...]) -> tuple[re.Pattern, ...]:
+    """
+    Compile regex patterns into as few patterns as possible: one alternation of the patterns without groups,
+    which can be combined without changing their meaning, and the others on their own.
+    """
+    compiled = [re.compile(pattern) for pattern in patterns]
+    combinable = [pattern.pattern for pattern in compiled if not pattern.groups and not pattern.flags & ~re.UNICODE]
+    others = tuple(pattern for pattern in compiled if pattern.pattern not in combinable)
+    if len(combinable) < 2:
+        return tuple(compiled)
+    return (re.compile('|'.join(f'(?:{pattern})' for pattern in combinable)),) + others
+
+
+@traced()
 class Clipboard:
-    @staticmethod
-    def copy(text: str):
+    """
+    Access to the clipboard of the input backend.
+
+    Queries read the clipboard once and run every keyword or pattern against that snapshot. When the backend
+    has a change counter, the snapshot is reused until the content changes, so repeated queries don't read
+    the clipboard again. Keyword and pattern lists are compiled once into a single matcher and cached.
+    """
+    __lock = Lock()
+    __snapshot: tuple = (None, None, '')  # (clipboard, change count, text)
+    __copied: Optional[str] = None
+
+    @classmethod
+    def copy(cls, text: str):
         """Copy text to the clipboard."""
-        copy(text)
+        clipboard = backend.clipboard
+        clipboard.copy(text)
+        count = cls.__change_count(clipboard)
+        with cls.__lock:
+            cls.__snapshot = (clipboard, count, text) if count is not None else (None, None, '')
+            cls.__copied = text
+
+    @classmethod
+    def copied(cls) -> Optional[str]:
+        """Get the text copied last by this process, or None if nothing has been copied."""
+        return cls.__copied
+
+    @classmethod
+    def paste(cls) -> str:
+        """Paste text from the clipboard. Without change since the last read, the text read last is returned."""
+        clipboard = backend.clipboard
+        count = cls.__change_count(clipboard)
+        if count is not None:
+            with cls.__lock:
+                cached_clipboard, cached_count, text = cls.__snapshot
+            if cached_clipboard is clipboard and cached_count == count:
+                return text
+
+        text = clipboard.paste()
+        if count is not None:
+            with cls.__lock:
+                cls.__snapshot = (clipboard, count, text)
+        return text
 
-    @staticmethod
-    def paste() -> str:
-        """Paste text from the clipboard."""
-        return paste()
-    
     @classmethod
     def clear(cls):
         """Clear the clipboard."""
@@ -21,7 +89,7 @@ class Clipboard:
     def contains(cls, text: str, case_sensitive: bool = False) -> bool:
         """
         Check if the clipboard contains the specified text.
-        
+
         :param text: The text to check for in the clipboard.
         :param case_sensitive: If True, the check is case-sensitive; otherwise, it is case-insensitive.
         :return: True if the clipboard contains the text, False otherwise.
@@ -31,29 +99,62 @@ class Clipboard:
             text = text.lower()
             clipboard_text = clipboard_text.lower()
         return text in clipboard_text
-    
+
     @classmethod
-    def contains_any(cls, keywords: list[str], case_sensitive: bool = False) -> bool:
+    def contains_any(cls, keywords: Iterable[str], case_sensitive: bool = False) -> bool:
         """
         Check if the clipboard contains any of the specified keywords.
-        
+
         :param keywords: A list of keywords to check for in the clipboard.
         :param case_sensitive: If True, the check is case-sensitive; otherwise, it is case-insensitive.
         :return: True if any keyword is found in the clipboard, False otherwise.
         """
-        for keyword in keywords:
-            if cls.contains(keyword, case_sensitive):
-                return True
-        return False
-    
+        return cls.find_any(keywords, case_sensitive) is not None
+
+    @classmethod
+    def find_any(cls, keywords: Iterable[str], case_sensitive: bool = False) -> Optional[str]:
+        """
+        Find which of the specified keywords the clipboard contains.
+
+        :param keywords: A list of keywords to look for in the clipboard.
+        :param case_sensitive: If True, the search is case-sensitive; otherwise, it is case-insensitive.
+        :return: The keyword appearing first in the clipboard text, or None if there is none.
+        """
+        keywords = tuple(keywords)
+        if not keywords:
+            return None
+        pattern, found = _keyword_matcher(keywords, case_sensitive)
+        content = cls.paste()
+        match = pattern.search(content if case_sensitive else content.lower())
+        return found[match.group()] if match else None
+
     @classmethod
     def matches(cls, pattern: str | re.Pattern) -> bool:
         """
         Check if the clipboard content matches the specified regex pattern.
-        
+
         :param pattern: A regex pattern or string to match against the clipboard content.
         :return: True if the clipboard content matches the pattern, False otherwise."""
-        content = cls.paste()
         if isinstance(pattern, str):
-            pattern = re.compile(pattern)
-        return bool(pattern.search(content))
+            pattern = _pattern_matcher((pattern,))[0]
+        return bool(pattern.search(cls.paste()))
+
+    @classmethod
+    def matches_any(cls, patterns: Iterable[str | re.Pattern]) -> bool:
+        """
+        Check if the clipboard content matches any of the specified regex patterns.
+
+        :param patterns: Regex patterns or strings to match against the clipboard content.
+        :return: True if the clipboard content matches at least one pattern, False otherwise.
+        """
+        patterns = tuple(patterns)
+        strings = tuple(pattern for pattern in patterns if isinstance(pattern, str))
+        compiled = [pattern for pattern in patterns if not isinstance(pattern, str)]
+        content = cls.paste()
+        return any(pattern.search(content) for pattern in (*_pattern_matcher(strings), *compiled))
+
+    @staticmethod
+    def __change_count(clipboard) -> Optional[int]:
+        """Get the change counter of a clipboard, or None if it has none."""
+        change_count = getattr(clipboard, 'change_count', None)
+        return change_count() if change_count is not None else None
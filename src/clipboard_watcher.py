@@ -0,0 +1,188 @@
+import re
+from threading import Event, Lock, Thread
+from time import monotonic
+from typing import Optional, Union
+from src.clipboard import Clipboard
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ClipboardSubscription:
+    """
+    A handler registered on the ClipboardWatcher, called with the new text of the clipboard when it changes.
+
+    It exposes the same ``stop()`` / ``join()`` interface as a Binding.
+    """
+    def __init__(self, callback: callable, pattern: Union[str, re.Pattern, None] = None,
+                 predicate: Optional[callable] = None, ignore_own: bool = True):
+        """
+        :param callback: Function called with the new text.
+        :param pattern: If set, only texts matching this regex are delivered.
+        :param predicate: If set, only texts for which this function returns True are delivered.
+        :param ignore_own: If True, texts copied by this process through Clipboard.copy are not delivered.
+        """
+        self.callback = callback
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.predicate = predicate
+        self.ignore_own = ignore_own
+        self._stopped = Event()
+
+    @property
+    def running(self) -> bool:
+        """True while the subscription is registered on the watcher."""
+        return not self._stopped.is_set()
+
+    def accepts(self, text: str, own: bool) -> bool:
+        """
+        Check if a new text of the clipboard must be delivered to the subscription.
+
+        :param text: The new text.
+        :param own: True if the text has been copied by this process.
+        """
+        return (not (own and self.ignore_own)
+                and (self.pattern is None or self.pattern.search(text) is not None)
+                and (self.predicate is None or bool(self.predicate(text))))
+
+    def stop(self):
+        """Remove the subscription from the watcher."""
+        ClipboardWatcher.unsubscribe(self)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the subscription is stopped.
+
+        :param timeout: Maximum time to wait in seconds. None waits forever.
+        :return: True if the subscription has been stopped, False if the timeout expired.
+        """
+        return self._stopped.wait(timeout)
+
+    def __repr__(self):
+        return f"ClipboardSubscription({getattr(self.callback, '__name__', self.callback)})"
+
+
+class ClipboardWatcher:
+    """
+    Single thread watching the clipboard for every clipboard automation.
+
+    The clipboard is polled with an adaptive interval: MIN_INTERVAL after a change, growing by BACKOFF at every
+    poll without change up to MAX_INTERVAL, so an idle clipboard costs about one read per MAX_INTERVAL. On
+    backends with a change counter a poll only reads the counter (see Clipboard.paste). Failed reads back off the
+    same way, and are logged once per streak of failures.
+
+    A change is delivered once the text has been stable for DEBOUNCE seconds, so a burst of copies is delivered
+    once, with its last text. Every change is delivered once to each subscription accepting it, on the watcher
+    thread: subscriptions must return quickly (clipboard automations fire a Trigger).
+    """
+    MIN_INTERVAL = 0.05  # seconds
+    MAX_INTERVAL = 1.0  # seconds
+    BACKOFF = 1.5
+    DEBOUNCE = 0.1  # seconds
+
+    __lock = Lock()
+    __subscriptions: tuple[ClipboardSubscription, ...] = ()
+    __thread: Optional[Thread] = None
+    __stopped = Event()
+
+    @classmethod
+    def subscribe(cls, subscription: ClipboardSubscription) -> ClipboardSubscription:
+        """
+        Add a subscription, starting the watcher thread if needed.
+
+        :param subscription: The subscription to add.
+        :return: The registered subscription.
+        """
+        with cls.__lock:
+            cls.__subscriptions = cls.__subscriptions + (subscription,)
+            if cls.__thread is None or not cls.__thread.is_alive():
+                cls.__stopped = Event()
+                cls.__thread = Thread(target=cls.__watch, args=(cls.__stopped,), name="guibot-clipboard",
+                                      daemon=True)
+                cls.__thread.start()
+        logger.debug("Subscribed %s to clipboard changes.", subscription)
+        return subscription
+
+    @classmethod
+    def unsubscribe(cls, subscription: ClipboardSubscription):
+        """
+        Remove a subscription. The watcher thread stops with the last one.
+
+        :param subscription: The subscription to remove.
+        """
+        with cls.__lock:
+            cls.__subscriptions = tuple(s for s in cls.__subscriptions if s is not subscription)
+            if not cls.__subscriptions:
+                cls.__stopped.set()
+        subscription._stopped.set()
+        logger.debug("Unsubscribed %s from clipboard changes.", subscription)
+
+    @classmethod
+    def subscriptions(cls) -> list[ClipboardSubscription]:
+        """Get every registered subscription."""
+        return list(cls.__subscriptions)
+
+    @classmethod
+    def is_running(cls) -> bool:
+        """Check if the watcher thread is running."""
+        return cls.__thread is not None and cls.__thread.is_alive()
+
+    @classmethod
+    def __watch(cls, stopped: Event):
+        """Poll the clipboard until stopped, delivering the debounced changes."""
+        last = cls.__read(failing=False)  # None until a first read succeeds: that one is not a change
+        failing = last is None
+        pending: Optional[str] = None
+        changed_at = 0.0
+        interval = cls.MIN_INTERVAL
+        logger.info("Clipboard watcher started.")
+
+        while not stopped.wait(interval):
+            text = cls.__read(failing)
+            if text is None:
+                failing = True
+                interval = min(interval * cls.BACKOFF, cls.MAX_INTERVAL)
+                continue
+            if failing:
+                failing = False
+                logger.info("Clipboard watcher can read the clipboard again.")
+            if last is None:
+                last = text
+            elif text != (last if pending is None else pending):
+                pending, changed_at = text, monotonic()
+                interval = cls.MIN_INTERVAL
+            elif pending is not None:
+                if monotonic() - changed_at >= cls.DEBOUNCE:
+                    if pending != last:
+                        cls.__deliver(pending)
+                    last, pending = pending, None
+            else:
+                interval = min(interval * cls.BACKOFF, cls.MAX_INTERVAL)
+        logger.info("Clipboard watcher stopped.")
+
+    @staticmethod
+    def __read(failing: bool) -> Optional[str]:
+        """
+        Read the clipboard, or None if it can't be read right now.
+
+        :param failing: True if the previous read failed too: the failure is logged once per streak of failures.
+        """
+        try:
+            return Clipboard.paste()
+        except Exception:
+            if failing:
+                logger.debug("Clipboard watcher still fails to read the clipboard.")
+            else:
+                logger.warning("Clipboard watcher failed to read the clipboard, retrying at most every %s s.",
+                               ClipboardWatcher.MAX_INTERVAL, exc_info=True)
+            return None
+
+    @classmethod
+    def __deliver(cls, text: str):
+        """Call every subscription accepting the new text."""
+        own = Clipboard.copied() == text
+        for subscription in cls.__subscriptions:
+            try:
+                if subscription.accepts(text, own):
+                    subscription.callback(text)
+            except Exception:
+                logger.exception("Clipboard subscription %s raised an exception.", subscription)
@@ -0,0 +1,116 @@
+"""
+Clock used by every wait of guibot: controller waits, scheduled loops and mouse movements.
+
+The real clock reads ``perf_counter`` and sleeps on the cancellation token. The virtual clock only advances a
+counter, so a dry run goes through every wait of an automation instantly while keeping track of the time
+it would have taken.
+"""
+from threading import Lock
+from time import perf_counter
+from typing import Optional
+from src.cancellation import CancellationToken, current_token
+
+
+class Clock:
+    """ Real clock. """
+    def now(self) -> float:
+        """Get the current time in seconds, from an arbitrary origin."""
+        return perf_counter()
+
+    def sleep(self, seconds: float, token: CancellationToken):
+        """
+        Sleep for the given time, returning early if the token is cancelled.
+
+        :param seconds: Time to sleep in seconds. Non-positive values don't sleep.
+        :param token: Cancellation token to wait on.
+        :raises Cancelled: If the token is cancelled before or during the sleep.
+        """
+        token.sleep(seconds)
+
+    async def sleep_async(self, seconds: float):
+        """
+        Sleep for the given time without blocking the event loop. Cancel the task to interrupt the sleep.
+
+        :param seconds: Time to sleep in seconds. Non-positive values only yield to the event loop.
+        """
+        import asyncio  # only async automations need it, and it is slow to import
+        await asyncio.sleep(seconds if seconds > 0 else 0)
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class VirtualClock(Clock):
+    """
+    Simulated clock: sleeping advances the time instantly instead of waiting.
+
+    The time is shared by every thread, so it is only meaningful for automations that don't run concurrently.
+    """
+    def __init__(self, start: float = 0.0):
+        """
+        :param start: Initial time in seconds.
+        """
+        self._lock = Lock()
+        self._now = start
+
+    def now(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float, token: CancellationToken):
+        token.raise_if_cancelled()
+        self.advance(seconds)
+
+    async def sleep_async(self, seconds: float):
+        import asyncio
+        self.advance(seconds)
+        await asyncio.sleep(0)
+
+    def advance(self, seconds: float):
+        """
+        Move the time forward.
+
+        :param seconds: Time to add, in seconds. Non-positive values are ignored.
+        """
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+
+    def __repr__(self):
+        return f"VirtualClock(now={self._now:.3f})"
+
+
+REAL = Clock()
+_current: Clock = REAL
+
+
+def get_clock() -> Clock:
+    """Get the active clock. Callers waiting in a loop should get it once, before the loop."""
+    return _current
+
+
+def use(clock: Clock) -> Clock:
+    """
+    Make a clock the active one.
+
+    :param clock: The clock, e.g. REAL or a VirtualClock.
+    :return: The clock that was active before.
+    """
+    global _current
+    previous, _current = _current, clock
+    return previous
+
+
+def now() -> float:
+    """Get the current time of the active clock, in seconds."""
+    return _current.now()
+
+
+def sleep(seconds: float, token: Optional[CancellationToken] = None):
+    """
+    Sleep on the active clock.
+
+    :param seconds: Time to sleep in seconds.
+    :param token: Cancellation token to wait on. Defaults to the token of the current thread.
+    :raises Cancelled: If the token is cancelled before or during the sleep.
+    """
+    _current.sleep(seconds, token or current_token())
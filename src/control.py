@@ -0,0 +1,427 @@
+"""
+Control endpoint of a resident guibot process: other programs trigger its preloaded automations through a local
+socket instead of starting a new Python process, which costs hundreds of milliseconds of imports.
+
+The endpoint is a Unix domain socket (readable by the owner only) or, where there are none or when the address is
+'host:port', a TCP socket bound to the loopback interface. The protocol is line-delimited JSON: each request is a
+JSON object on one line, answered by a JSON object on one line, on a connection kept open for as many requests as
+needed. An 'id' given in a request is copied to its response. A line that isn't a JSON object, like the request
+line of an HTTP request sent by a web page, closes the connection without running anything.
+
+Any local process, web pages included, can connect to a TCP port of the loopback interface: over TCP, every
+request must carry the "token" written by the server to an owner-only file (see token_file), which
+`ControlClient` reads and adds to each request.
+
+Requests:
+- {"command": "list"}: the automations served, with their trigger counters;
+- {"command": "trigger", "name": "...", "args": [...], "kwargs": {...}, "wait": false, "timeout": null}: run an
+  automation with these arguments, according to the TriggerPolicy of the server. With "wait", the response is
+  sent once the automation is idle again, or after "timeout" seconds, its "running" field telling which;
+- {"command": "status"}: the active runs, or {"command": "status", "run": 3} for one of them;
+- {"command": "stop", "run": 3}: stop a run, {"command": "stop", "name": "..."}: stop the current run of an
+  automation served, {"command": "stop"}: stop this server and its automations,
+  {"command": "stop", "all": true}: stop every run of the process.
+
+Responses are {"ok": true, ...} or {"ok": false, "error": "..."}.
+
+Usage from a shell: echo '{"command": "trigger", "name": "greet"}' | nc -U ~/.guibot/control.sock
+"""
+import hmac
+import json
+import math
+import os
+import secrets
+import socket
+from threading import Lock, Thread
+from typing import Optional
+from src.cancellation import CancellationToken
+from src.env import get_control_address
+from src.logger import get_logger
+from src.registry import RunHandle, RunRegistry
+from src.trigger import Trigger
+
+logger = get_logger(__name__)
+
+DEFAULT_UNIX_ADDRESS = "~/.guibot/control.sock"
+DEFAULT_TCP_ADDRESS = "127.0.0.1:47800"
+LOOPBACK_HOSTS = frozenset({'localhost', '127.0.0.1', '::1'})
+MAX_LINE = 64 * 1024  # bytes: longer requests are refused and their connection closed
+WAIT_STEP = 0.1  # seconds: a trigger request waiting for its automation checks this often if the server stopped
+HTTP_METHODS = (b'GET ', b'HEAD ', b'POST ', b'PUT ', b'DELETE ', b'CONNECT ', b'OPTIONS ', b'TRACE ', b'PATCH ')
+
+
+def resolve_address(address: Optional[str] = None) -> tuple[int, object]:
+    """
+    Get the socket family and the address to bind or connect to.
+
+    :param address: Path of a Unix domain socket, or 'host:port' for TCP on a loopback host. None or '' for
+        CONTROL_ADDRESS, or a Unix domain socket in ~/.guibot where the system has them, TCP port 47800 otherwise.
+    :return: (socket family, path or (host, port)).
+    :raises ValueError: If the host isn't a loopback host: the endpoint is never exposed to the network.
+    """
+    address = address or get_control_address() or (DEFAULT_UNIX_ADDRESS if hasattr(socket, 'AF_UNIX')
+                                                    else DEFAULT_TCP_ADDRESS)
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit() and '/' not in address and '\\' not in address:
+        host = host.strip('[]')
+        if host not in LOOPBACK_HOSTS:
+            message = f"Invalid control address: {address}. The host must be one of {sorted(LOOPBACK_HOSTS)}."
+            logger.error(message)
+            raise ValueError(message)
+        return (socket.AF_INET6 if ':' in host else socket.AF_INET), (host, int(port))
+    return socket.AF_UNIX, os.path.expanduser(address)
+
+
+def token_file(family: int, address: object) -> Optional[str]:
+    """
+    Get the path of the file holding the token of a TCP endpoint: next to the default Unix domain socket, named
+    after the port, e.g. ~/.guibot/control-47800.token.
+
+    :param family: Socket family, as returned by resolve_address.
+    :param address: Address, as returned by resolve_address.
+    :return: The path, or None for a Unix domain socket, which needs no token.
+    """
+    if family == getattr(socket, 'AF_UNIX', None):
+        return None
+    directory = os.path.dirname(os.path.expanduser(DEFAULT_UNIX_ADDRESS))
+    return os.path.join(directory, f"control-{address[1]}.token")
+
+
+class ControlServer:
+    """ Serves automations through a local socket. Start it with `Automation.serve`. """
+    def __init__(self, triggers: dict[str, Trigger], handle: RunHandle, address: Optional[str] = None):
+        """
+        :param triggers: The trigger of each automation served, by name.
+        :param handle: The run of the server: stopping it stops the server.
+        :param address: Address of the socket (see resolve_address).
+        """
+        self.triggers = triggers
+        self.handle = handle
+        self.family, self.address = resolve_address(address)
+        self.token_file = token_file(self.family, self.address)
+        self.__token: Optional[str] = None
+        self.__lock = Lock()
+        self.__listener: Optional[socket.socket] = None
+        self.__connections: set[socket.socket] = set()
+        self.__thread: Optional[Thread] = None
+        self.__tokens: dict[str, CancellationToken] = {}
+        for name in triggers:
+            self.__renew_token(name)
+
+    def start(self):
+        """
+        Bind the socket and accept connections on a background thread.
+
+        :raises OSError: If the address is in use by another process.
+        """
+        listener = socket.socket(self.family, socket.SOCK_STREAM)
+        try:
+            if self.family == socket.AF_UNIX:
+                self.__remove_stale_socket()
+                os.makedirs(os.path.dirname(self.address) or '.', exist_ok=True)
+                previous_umask = os.umask(0o177)  # created with owner-only permissions: no window for others
+                try:
+                    listener.bind(self.address)
+                finally:
+                    os.umask(previous_umask)
+            else:
+                listener.bind(self.address)
+                self.__write_token()
+            listener.listen()
+        except OSError:
+            listener.close()
+            logger.exception("Cannot listen for control requests on %s.", self.address)
+            raise
+        self.__listener = listener
+        self.__thread = Thread(target=self.__accept, name=f"guibot-control-{self.handle.id}", daemon=True)
+        self.__thread.start()
+        logger.info("Listening for control requests on %s.", self.address)
+
+    def stop(self):
+        """
+        Stop accepting connections and requests. The requests being handled are still answered.
+        """
+        listener, self.__listener = self.__listener, None
+        if listener is None:
+            return
+        with self.__lock:
+            connections = list(self.__connections)
+        for sock in [listener, *connections]:
+            try:
+                sock.shutdown(socket.SHUT_RD)  # wakes up accept and recv, leaving the responses to be written
+            except OSError:
+                pass
+        listener.close()
+        for path in (self.address if self.family == socket.AF_UNIX else None, self.token_file):
+            if path is not None:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+        logger.info("Stopped listening for control requests on %s.", self.address)
+
+    def join(self, timeout: Optional[float] = None):
+        """
+        Block until the server has stopped accepting connections.
+
+        :param timeout: Maximum time to wait in seconds. None waits forever.
+        """
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+
+    def handle_request(self, request: dict) -> dict:
+        """
+        Handle a request of the protocol.
+
+        :param request: The decoded request.
+        :return: The response, to be encoded.
+        """
+        command = request.get('command')
+        logged = {key: value for key, value in request.items() if key != 'token'}
+        try:
+            if not self.authorized(request):
+                raise PermissionError("Missing or invalid token.")
+            if command == 'list':
+                response = {'automations': [self.__describe(name, trigger)
+                                            for name, trigger in self.triggers.items()]}
+            elif command == 'trigger':
+                response = self.__trigger(request)
+            elif command == 'status':
+                response = self.__status(request)
+            elif command == 'stop':
+                response = self.__stop(request)
+            else:
+                raise ValueError(f"Unknown command: {command!r}. Use 'list', 'trigger', 'status' or 'stop'.")
+            response = {'ok': True, **response}
+        except (KeyError, TypeError, ValueError) as error:
+            message = f"Missing field: {error}." if isinstance(error, KeyError) else str(error)
+            logger.warning("Invalid control request %r: %s", logged, message)
+            response = {'ok': False, 'error': message}
+        except PermissionError as error:
+            logger.warning("Refused control request of command %r: %s", command, error)
+            response = {'ok': False, 'error': str(error)}
+        except Exception as error:
+            logger.exception("Control request %r failed.", logged)
+            response = {'ok': False, 'error': f"{type(error).__name__}: {error}"}
+        if 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    def authorized(self, request: dict) -> bool:
+        """
+        Check the token of a request. Requests through a Unix domain socket need none.
+
+        :param request: The decoded request.
+        :return: True if the request may run.
+        """
+        if self.__token is None:
+            return self.family == socket.AF_UNIX
+        token = request.get('token')
+        return isinstance(token, str) and hmac.compare_digest(token.encode(), self.__token.encode())
+
+    def __trigger(self, request: dict) -> dict:
+        name = request['name']
+        trigger = self.triggers.get(name)
+        if trigger is None:
+            raise ValueError(f"Unknown automation: {name!r}.")
+        args, kwargs = request.get('args', []), request.get('kwargs', {})
+        if not isinstance(args, list) or not isinstance(kwargs, dict):
+            raise TypeError("'args' must be a list and 'kwargs' an object.")
+        timeout = request.get('timeout')
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float))
+                                    or not 0 <= timeout < math.inf):
+            raise ValueError("'timeout' must be a non-negative number of seconds.")
+        trigger.fire(*args, **kwargs)
+        if request.get('wait'):
+            self.__wait(trigger, timeout)
+        return self.__describe(name, trigger)
+
+    def __wait(self, trigger: Trigger, timeout: Optional[float]):
+        """Wait until a trigger is idle, the timeout has expired or the server is stopped."""
+        remaining = math.inf if timeout is None else timeout
+        while not trigger.join(min(WAIT_STEP, remaining)) and not self.handle.token.cancelled:
+            remaining -= WAIT_STEP
+            if remaining <= 0:
+                return
+
+    def __status(self, request: dict) -> dict:
+        if 'run' not in request:
+            return {'runs': [self.__describe_run(handle) for handle in RunRegistry.runs()]}
+        handle = RunRegistry.get(self.__run_id(request))
+        if handle is None:
+            raise ValueError(f"No active run with id {request['run']}.")
+        return {'run': self.__describe_run(handle)}
+
+    def __stop(self, request: dict) -> dict:
+        if 'name' in request:
+            name = request['name']
+            if name not in self.triggers:
+                raise ValueError(f"Unknown automation: {name!r}.")
+            logger.info("Stopping the current run of '%s' on control request.", name)
+            self.triggers[name].stop()
+            self.__renew_token(name).cancel()
+            return {'stopped': [name]}
+        if 'run' in request:
+            handles = [RunRegistry.get(self.__run_id(request))]
+            if handles[0] is None:
+                raise ValueError(f"No active run with id {request['run']}.")
+        elif request.get('all') is True:
+            handles = RunRegistry.runs()
+        else:
+            handles = [self.handle]
+        for handle in handles:
+            handle.stop()
+        return {'stopped': [handle.id for handle in handles]}
+
+    @staticmethod
+    def __run_id(request: dict) -> int:
+        """Get the run id of a request, which must be an integer."""
+        run = request['run']
+        if isinstance(run, bool) or not isinstance(run, int):
+            raise TypeError(f"'run' must be an integer, not {run!r}.")
+        return run
+
+    def __renew_token(self, name: str) -> Optional[CancellationToken]:
+        """Give the trigger of an automation a new token, returning the previous one, to stop its current run."""
+        with self.__lock:
+            previous = self.__tokens.get(name)
+            self.__tokens[name] = self.triggers[name].token = CancellationToken(parent=self.handle.token)
+        return previous
+
+    @staticmethod
+    def __describe(name: str, trigger: Trigger) -> dict:
+        return {'name': name, 'running': trigger.running, 'queue_depth': trigger.queue_depth,
+                'triggered': trigger.triggered, 'completed': trigger.completed, 'errors': trigger.errors,
+                'dropped': trigger.dropped}
+
+    @staticmethod
+    def __describe_run(handle: RunHandle) -> dict:
+        return {'id': handle.id, 'name': handle.name, 'mode': handle.mode.value, 'state': handle.state.value,
+                'started_at': handle.started_at}
+
+    def __write_token(self):
+        """Write a new random token to the owner-only token file of a TCP endpoint."""
+        os.makedirs(os.path.dirname(self.token_file), exist_ok=True)
+        token = secrets.token_hex(32)
+        try:
+            os.unlink(self.token_file)  # a file left by another server could have other permissions
+        except FileNotFoundError:
+            pass
+        descriptor = os.open(self.token_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            file.write(token)
+        self.__token = token
+
+    def __remove_stale_socket(self):
+        """Remove the socket file of a server that didn't stop cleanly, refusing to take over a running one."""
+        if not os.path.exists(self.address):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.address)
+        except OSError:
+            os.unlink(self.address)
+            logger.info("Removed the stale control socket %s.", self.address)
+        else:
+            raise OSError(f"Another process is listening for control requests on {self.address}.")
+        finally:
+            probe.close()
+
+    def __accept(self):
+        """Accept connections until the server stops, each served on its own thread."""
+        listener = self.__listener
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                return
+            if self.family != socket.AF_UNIX:
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self.__lock:
+                self.__connections.add(connection)
+            Thread(target=self.__serve, args=(connection,), name=f"guibot-control-{self.handle.id}-client",
+                   daemon=True).start()
+
+    def __serve(self, connection: socket.socket):
+        """
+        Answer the requests of a connection, one line each, until the client or the server closes it.
+        The connection is closed at the first line that isn't a JSON object: nothing after it is run.
+        """
+        try:
+            with connection, connection.makefile('rb') as lines:
+                while line := lines.readline(MAX_LINE + 1):
+                    if len(line) > MAX_LINE:
+                        connection.sendall(b'{"ok":false,"error":"Request too long."}\n')
+                        return
+                    if not line.strip():
+                        continue
+                    if line.lstrip().startswith(HTTP_METHODS):
+                        logger.warning("Refused an HTTP request on the control socket: %r.", line[:80])
+                        return
+                    try:
+                        request = json.loads(line)
+                        if not isinstance(request, dict):
+                            raise ValueError("A request must be a JSON object.")
+                    except ValueError as error:
+                        logger.warning("Closing a control connection after an invalid request: %s", error)
+                        response = {'ok': False, 'error': f"Invalid request: {error}"}
+                        connection.sendall(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+                        return
+                    response = self.handle_request(request)
+                    connection.sendall(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+        except OSError:
+            logger.debug("Control connection closed.", exc_info=True)
+        finally:
+            with self.__lock:
+                self.__connections.discard(connection)
+
+
+class ControlClient:
+    """ Client of a control endpoint, keeping its connection open across requests. """
+    def __init__(self, address: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        :param address: Address of the socket (see resolve_address).
+        :param timeout: Maximum time to wait for a response, in seconds. None waits forever.
+        :raises OSError: If the server isn't running, or its token file can't be read over TCP.
+        """
+        family, target = resolve_address(address)
+        path = token_file(family, target)
+        self.__token = None
+        if path is not None:
+            with open(path, encoding='utf-8') as file:
+                self.__token = file.read().strip()
+        self.__socket = socket.socket(family, socket.SOCK_STREAM)
+        self.__socket.settimeout(timeout)
+        self.__socket.connect(target)
+        if family != socket.AF_UNIX:
+            self.__socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.__lines = self.__socket.makefile('rb')
+
+    def request(self, command: str, **fields) -> dict:
+        """
+        Send a request and wait for its response.
+
+        :param command: 'list', 'trigger', 'status' or 'stop'.
+        :param fields: The other fields of the request, e.g. name='greet', args=['world'].
+        :return: The response.
+        :raises ConnectionError: If the server closed the connection.
+        """
+        request = {'command': command, **fields}
+        if self.__token is not None:
+            request['token'] = self.__token
+        self.__socket.sendall(json.dumps(request, separators=(',', ':')).encode() + b'\n')
+        line = self.__lines.readline()
+        if not line:
+            raise ConnectionError("The control server closed the connection.")
+        return json.loads(line)
+
+    def close(self):
+        """Close the connection."""
+        self.__lines.close()
+        self.__socket.close()
+
+    def __enter__(self) -> 'ControlClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
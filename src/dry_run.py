@@ -0,0 +1,78 @@
+from time import perf_counter
+from typing import Optional
+from src import backend, clock
+from src.backend import RecordingBackend
+from src.cancellation import ROOT, CancellationToken, bind
+from src.clock import VirtualClock
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class DryRun:
+    """
+    Context manager running the code in its block on a virtual clock and a recording backend.
+
+    Every wait returns immediately while advancing the simulated time, and every input event is recorded with
+    its simulated timestamp instead of being sent. The previous clock and backend are restored on exit.
+
+    Attributes:
+    -----------
+    - events : list[tuple[float, str, str, tuple]]
+        Recorded input events as (time, device, action, args), time being in simulated seconds from the start.
+
+    - duration : float
+        Simulated time spent in the block, in seconds: how long the automation would take for real,
+        input events excluded.
+
+    - elapsed : float
+        Real time spent in the block, in seconds.
+    """
+    def __init__(self, name: str = "dry_run"):
+        """
+        :param name: Name of the dry run, used in log messages.
+        """
+        self.name = name
+        self.clock = VirtualClock()
+        self.backend = RecordingBackend(clock=self.clock.now)
+        self.token = CancellationToken(parent=ROOT)
+        self.duration = 0.0
+        self.elapsed = 0.0
+        self.__previous_clock: Optional[clock.Clock] = None
+        self.__previous_backend: Optional[backend.InputBackend] = None
+        self.__binding = None
+        self.__start = 0.0
+
+    @property
+    def events(self) -> list[tuple[float, str, str, tuple]]:
+        return self.backend.events
+
+    def __enter__(self) -> 'DryRun':
+        self.__previous_backend = backend.get_backend(create=False)
+        self.__previous_clock = clock.use(self.clock)
+        backend.use(self.backend)
+        self.__binding = bind(self.token)
+        self.__binding.__enter__()
+        self.__start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = perf_counter() - self.__start
+        self.duration = self.clock.now()
+        self.__binding.__exit__(*exc_info)
+        backend.use(self.__previous_backend)
+        clock.use(self.__previous_clock)
+        logger.info("Dry run '%s': %s input events, %.3f s simulated in %.3f ms.",
+                    self.name, len(self.events), self.duration, self.elapsed * 1000)
+
+    def log(self) -> list[str]:
+        """Get the recorded input events as human-readable lines, e.g. '    1.200 s  mouse     click Button.left'."""
+        lines = []
+        for time, device, action, args in self.events:
+            arguments = " ".join(str(argument) for argument in args)
+            lines.append(f"{time:9.3f} s  {device:<9} {action} {arguments}".rstrip())
+        return lines
+
+    def __repr__(self):
+        return (f"DryRun(name={self.name!r}, events={len(self.events)}, duration={self.duration:.3f} s, "
+                f"elapsed={self.elapsed * 1000:.3f} ms)")
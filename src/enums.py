@@ -6,3 +6,55 @@ class Interval(Enum):
     SHORT = 0.3
     MEDIUM = 0.5
     LONG = 1.0
+
+
+class TriggerPolicy(Enum):
+    """ Enum for what to do with a trigger that arrives while its automation is already running. """
+    DROP = 'drop'          # ignore the trigger
+    QUEUE = 'queue'        # queue it, up to a maximum number of pending triggers
+    LATEST = 'latest'      # keep only the most recent pending trigger
+    THROTTLE = 'throttle'  # run at most once per time window, dropping the rest
+    DEBOUNCE = 'debounce'  # run once, after no trigger has arrived for a time window
+
+
+class AutomationMode(Enum):
+    """ Enum for the modes an automation can run in. """
+    NONE = ''
+    LOOP = 'loop'
+    KEYSTROKE = 'keystroke'
+    CLICK = 'click'
+    CLIPBOARD = 'clipboard'
+    ASYNC_LOOP = 'async_loop'
+    ASYNC_KEYSTROKE = 'async_keystroke'
+    RECORD = 'record'
+    REPLAY = 'replay'
+    TUNE = 'tune'
+    CONTROL = 'control'
+
+
+class RunState(Enum):
+    """ Enum for the lifecycle states of an automation run. """
+    PENDING = 'pending'      # waiting for a free slot under the parallel limit
+    RUNNING = 'running'
+    STOPPING = 'stopping'    # stop requested, waiting for the run to finish
+    FINISHED = 'finished'
+
+
+class OverrunPolicy(Enum):
+    """ Enum for what a scheduled loop does when an iteration runs past the next deadline. """
+    CATCH_UP = 'catch_up'  # run the missed iterations back to back until the schedule is met again
+    SKIP = 'skip'          # drop the missed iterations and wait for the next deadline on the original grid
+
+
+class Curve(Enum):
+    """ Enum for the shapes of a simulated mouse movement. """
+    LINEAR = 'linear'  # straight line at constant speed
+    EASE = 'ease'      # straight line, accelerating at the start and decelerating at the end
+    BEZIER = 'bezier'  # gentle arc along a cubic Bezier curve, eased
+
+
+class TypingStrategy(Enum):
+    """ Enum for the ways the typing engine can send a text. """
+    PASTE = 'paste'        # copy the text to the clipboard and paste it, restoring the clipboard afterwards
+    BATCH = 'batch'        # press and release a key per character, in batches without waits
+    FALLBACK = 'fallback'  # let the backend type the text, for characters no key of the layout produces
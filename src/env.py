@@ -7,3 +7,52 @@ def get_logging_level() -> str:
     :return: Logging level as a string.
     """
     return getenv("LOG", "NONE")
+
+def get_log_file() -> str:
+    """
+    Get the path of the JSON-lines log file from the environment variable 'LOG_FILE'.
+    If the variable is not set, it defaults to '' and no log file is written.
+    :return: Path of the log file, or an empty string.
+    """
+    return getenv("LOG_FILE", "")
+
+def get_trace_file() -> str:
+    """
+    Get the path of the Chrome trace file from the environment variable 'TRACE_FILE'.
+    If the variable is set, tracing starts on import and the trace is written there when the process exits.
+    :return: Path of the trace file, or an empty string.
+    """
+    return getenv("TRACE_FILE", "")
+
+def get_input_backend() -> str:
+    """
+    Get the name of the input backend from the environment variable 'INPUT_BACKEND'.
+    If the variable is not set, it defaults to 'pynput'. Use 'null' or 'recording' to run without a display.
+    :return: Name of the input backend.
+    """
+    return getenv("INPUT_BACKEND", "pynput")
+
+def get_typing_cps() -> float:
+    """
+    Get the maximum typing speed, in characters per second, from the environment variable 'TYPING_CPS'.
+    If the variable is not set, it defaults to 0, meaning no limit.
+    :return: Maximum number of characters typed per second, or 0.
+    """
+    return float(getenv("TYPING_CPS", "0"))
+
+def get_parameters_file() -> str:
+    """
+    Get the path of the file keeping the tuned parameters from the environment variable 'PARAMETERS_FILE'.
+    If the variable is not set, it defaults to '~/.guibot/parameters.json'. Set it to '' to keep them in memory only.
+    :return: Path of the parameters file, or an empty string.
+    """
+    return getenv("PARAMETERS_FILE", "~/.guibot/parameters.json")
+
+def get_control_address() -> str:
+    """
+    Get the address of the control socket of `Automation.serve` from the environment variable 'CONTROL_ADDRESS':
+    the path of a Unix domain socket, or 'host:port' for TCP on a loopback host.
+    If the variable is not set, a Unix domain socket in ~/.guibot is used where the system has them.
+    :return: Address of the control socket, or an empty string.
+    """
+    return getenv("CONTROL_ADDRESS", "")
@@ -1,15 +1,22 @@
-from typing import Union
+from typing import Optional, Union
+from enum import Enum
+from src import backend
 from src.base_controller import BaseController
-from pynput.keyboard import Key, Controller
-from src.enums import Interval
+from src.enums import Interval, TypingStrategy
+from src.keymap import KeyTable
 from src.logger import get_logger
+from src.tracer import traced
+from src.typing_engine import TypingEngine
 
 
 logger = get_logger(__name__)
-keyboard = Controller()
 
 
+@traced()
 class KeyboardController(BaseController):
+    _pressed: set[Union[Enum, str]] = set()
+    _keycodes: dict[Union[Enum, str], int] = {}  # keys pressed through the keycode table, released the same way
+
     @classmethod
     def press(cls, key: str, must_wait: bool = True):
         """ Press a key on the keyboard. 
@@ -20,8 +27,8 @@ class KeyboardController(BaseController):
         if must_wait:
             cls.wait(Interval.SHORT)
 
-        logger.info(f"Pressing the '{key}' key.")
-        keyboard.press(key)
+        logger.info("Pressing the '%s' key.", key)
+        cls._press_keys(key)
 
     @classmethod
     def release(cls, key: str, must_wait: bool = True):
@@ -30,20 +37,80 @@ class KeyboardController(BaseController):
         :param key: The key to release, e.g., 'a', 'b', 'c', etc.
         :param must_wait: If True, it will wait for an instant interval after releasing the key.
         """
-        logger.info(f"Releasing the '{key}' key.")
-        keyboard.release(key)
+        logger.info("Releasing the '%s' key.", key)
+        cls._release_keys(key)
 
         if must_wait:
             cls.wait(Interval.INSTANT)
 
     @classmethod
-    def type(cls, text: str):
-        """ Type a string of text. 
-        
-        :param text: The text to type."""
+    def release_pressed(cls):
+        """ Release the keys pressed and not released yet. """
+        keys = list(cls._pressed)
+        for key in keys:
+            logger.info("Releasing the '%s' key.", key)
+        cls._release_keys(*keys)
+
+    @classmethod
+    def _press_keys(cls, *keys: Union[Enum, str]):
+        """
+        Press keys, in one call of the backend when the keycode table has all of them without modifiers.
+
+        :param keys: The keys to press.
+        :raises Cancelled: If the automation has been stopped.
+        """
+        keycodes = [KeyTable.keycode(key) for key in keys]
+        if keys and None not in keycodes:
+            cls.inject(KeyTable.send, [(keycode, True) for keycode in keycodes])
+            cls._keycodes.update(zip(keys, keycodes))
+            cls._pressed.update(keys)
+            return
+        for key in keys:
+            cls.inject(backend.keyboard.press, key)
+            cls._pressed.add(key)
+
+    @classmethod
+    def _stroke(cls, key: Union[Enum, str]):
+        """
+        Press and release a key, with its modifiers, in one call of the backend when the keycode table has it.
+
+        :param key: The key to press and release.
+        :raises Cancelled: If the automation has been stopped.
+        """
+        events = KeyTable.strokes((key,))
+        if events is not None:
+            cls.inject(KeyTable.send, events)
+        else:
+            cls.inject(backend.keyboard.press, key)
+            cls.inject(backend.keyboard.release, key, check=False)
+
+    @classmethod
+    def _release_keys(cls, *keys: Union[Enum, str]):
+        """
+        Release keys the way they were pressed: through the keycode table, in one call, or through the backend.
+        Releases always go through, even when the automation has been stopped.
+
+        :param keys: The keys to release.
+        """
+        tabled = [key for key in keys if key in cls._keycodes]
+        if tabled:
+            cls.inject(KeyTable.send, [(cls._keycodes.pop(key), False) for key in tabled], check=False)
+        for key in keys:
+            if key not in tabled:
+                cls.inject(backend.keyboard.release, key, check=False)
+            cls._pressed.discard(key)
+
+    @classmethod
+    def type(cls, text: str, strategy: Optional[TypingStrategy] = None, cps: Optional[float] = None):
+        """ Type a string of text with the fastest strategy able to produce it (see TypingEngine).
+
+        :param text: The text to type.
+        :param strategy: Strategy to use: PASTE, BATCH or FALLBACK. None lets the engine choose.
+        :param cps: Maximum characters per second, 0 for no limit. None uses TypingEngine.cps.
+        """
         cls.wait(Interval.INSTANT)
-        logger.info(f"Typing text: {text}")
-        keyboard.type(text)
+        logger.info("Typing text: %s", text)
+        TypingEngine.type(text, strategy, cps)
 
     @classmethod
     def typewrite(cls, text: str, delay: float = Interval.INSTANT):
@@ -52,16 +119,15 @@ class KeyboardController(BaseController):
         :param text: The text to type.
         :param delay: The delay in seconds between each character. Default is 0.1 seconds (an instant).
         """
-        logger.info(f"Typewriting text: {text}")
+        logger.info("Typewriting text: %s", text)
 
         for char in text:
-            keyboard.press(char)
-            keyboard.release(char)
+            cls._stroke(char)
             cls.wait(delay)
 
 
     @classmethod
-    def press_key(cls, key: Key, must_wait: bool = True):
+    def press_key(cls, key: Enum, must_wait: bool = True):
         """ Press a special key on the keyboard.
 
         :param key: The special key to press, e.g., Key.enter, Key.space, etc.
@@ -70,18 +136,18 @@ class KeyboardController(BaseController):
         if must_wait:
             cls.wait(Interval.SHORT)
 
-        logger.info(f"Pressing the '{key}' key.")
-        keyboard.press(key)
+        logger.info("Pressing the '%s' key.", key)
+        cls._press_keys(key)
 
     @classmethod
-    def release_key(cls, key: Key, must_wait: bool = True):
+    def release_key(cls, key: Enum, must_wait: bool = True):
         """ Release a special key on the keyboard.
 
         :param key: The special key to release, e.g., Key.enter, Key.space, etc.
         :param must_wait: If True, it will wait for an instant interval after releasing the key.
         """
-        logger.info(f"Releasing the '{key}' key.")
-        keyboard.release(key)
+        logger.info("Releasing the '%s' key.", key)
+        cls._release_keys(key)
 
         if must_wait:
             cls.wait(Interval.INSTANT)
@@ -97,7 +163,7 @@ class KeyboardController(BaseController):
         cls.release(key, must_wait)
 
     @classmethod
-    def press_and_release_key(cls, key: Key, must_wait: bool = True):
+    def press_and_release_key(cls, key: Enum, must_wait: bool = True):
         """ Press and release a special key on the keyboard.
 
         :param key: The special key to press and release, e.g., Key.enter, Key.space, etc.
@@ -112,8 +178,8 @@ class KeyboardController(BaseController):
 
         :param must_wait: If True, it will wait for a short interval before pressing the key.
         """
-        cls.press_key(Key.enter, must_wait)
-        cls.release_key(Key.enter, must_wait)
+        cls.press_key(backend.Key.enter, must_wait)
+        cls.release_key(backend.Key.enter, must_wait)
 
     @classmethod
     def delete(cls, must_wait: bool = True):
@@ -121,8 +187,8 @@ class KeyboardController(BaseController):
 
         :param must_wait: If True, it will wait for a short interval before pressing the key.
         """
-        cls.press_key(Key.delete, must_wait)
-        cls.release_key(Key.delete, must_wait)
+        cls.press_key(backend.Key.delete, must_wait)
+        cls.release_key(backend.Key.delete, must_wait)
 
     @classmethod
     def space(cls, must_wait: bool = True):
@@ -130,8 +196,8 @@ class KeyboardController(BaseController):
 
         :param must_wait: If True, it will wait for a short interval before pressing the key.
         """
-        cls.press_key(Key.space, must_wait)
-        cls.release_key(Key.space, must_wait)
+        cls.press_key(backend.Key.space, must_wait)
+        cls.release_key(backend.Key.space, must_wait)
 
     @classmethod
     def escape(cls, must_wait: bool = True):
@@ -139,8 +205,8 @@ class KeyboardController(BaseController):
 
         :param must_wait: If True, it will wait for a short interval before pressing the key.
         """
-        cls.press_key(Key.esc, must_wait)
-        cls.release_key(Key.esc, must_wait)
+        cls.press_key(backend.Key.esc, must_wait)
+        cls.release_key(backend.Key.esc, must_wait)
 
     @classmethod
     def tab(cls, must_wait: bool = True):
@@ -148,15 +214,18 @@ class KeyboardController(BaseController):
 
         :param must_wait: If True, it will wait for a short interval before pressing the key.
         """
-        cls.press_key(Key.tab, must_wait)
-        cls.release_key(Key.tab, must_wait)
+        cls.press_key(backend.Key.tab, must_wait)
+        cls.release_key(backend.Key.tab, must_wait)
 
     @classmethod
-    def hotkey(cls, *keys: Union[Key, str], wait: Union[Interval, float] = Interval.INSTANT):
-        for key in keys:
-            keyboard.press(key)
-
-        cls.wait(wait)
+    def hotkey(cls, *keys: Union[Enum, str], wait: Union[Interval, float] = Interval.INSTANT):
+        """ Press a combination of keys together, then release them in reverse order.
 
-        for key in reversed(keys):
-            keyboard.release(key)
+        :param keys: The keys to press, e.g., Key.ctrl, 'c'.
+        :param wait: Time to hold the keys down.
+        """
+        try:
+            cls._press_keys(*keys)
+            cls.wait(wait)
+        finally:
+            cls._release_keys(*(key for key in reversed(keys) if key in cls._pressed))
@@ -1,30 +1,15 @@
+from enum import Enum
 from typing import Union
-from pynput.keyboard import Key, Listener
+from src import backend
+from src.listener_hub import ESC, Binding, ListenerHub, normalize_key
 from src.logger import get_logger
-from time import sleep
 
 
 logger = get_logger(__name__)
 
 class KeyboardListener:
     @staticmethod
-    def safe_start_listener(*args, **kwargs) -> Listener:
-        """ Start a keyboard listener with a slight delay to ensure safe synchronization of AXIsProcessTrusted.
-        This is useful to avoid issues with the listener starting before the system is ready.
-
-        :param args: Positional arguments to pass to the Listener.
-        :param kwargs: Keyword arguments to pass to the Listener.
-        :return: An instance of Listener that has been started.
-        """
-        syncro_time = 0.1  # seconds
-        logger.info(f"Starting listener with a synchronization delay of {syncro_time} seconds.")
-        sleep(syncro_time) # allow safe synchronization of AXIsProcessTrusted
-        listener = Listener(*args, **kwargs)
-        listener.start()
-        return listener
-
-    @staticmethod
-    def check_for_esc(key: Union[str, Key], callback: callable = lambda: None, *args, **kwargs) -> bool:
+    def check_for_esc(key: Union[str, Enum], callback: callable = lambda: None, *args, **kwargs) -> bool:
         """
         Check if the pressed key is 'esc' and call the callback function if it is.
 
@@ -35,33 +20,30 @@ class KeyboardListener:
         :return: True if the key is not 'esc', False otherwise.
         If False is returned, the listener will stop. Else, it will continue listening.
         """
-        if key == Key.esc:
+        if normalize_key(key) == ESC:
             callback(*args, **kwargs)
-            message = "Exiting listener due to 'esc' keystroke."
-            logger.info(message)
+            logger.info("Exiting listener due to 'esc' keystroke.")
             return False
         return True
 
     @classmethod
-    def exit_on_esc(cls, callback: callable = lambda: None, *args, **kwargs) -> Listener:
+    def exit_on_esc(cls, callback: callable = lambda: None, *args, **kwargs) -> Binding:
         """
-        Start a keyboard listener that exits when 'esc' is pressed and calls the callback function.
+        Register a callback on the shared listener that is called when 'esc' is pressed.
 
         Note that this method will not block the main thread, allowing other operations to continue.
 
         :param callback: Function to call when 'esc' is pressed.
         :param args: Additional arguments to pass to the callback function.
         :param kwargs: Additional keyword arguments to pass to the callback function.
+        :return: The binding, which is stopped when 'esc' is pressed.
         """
-        def on_press(key: Union[str, Key]):
-            return cls.check_for_esc(key, callback, *args, **kwargs)
-
-        return cls.safe_start_listener(on_press=on_press)
+        return ListenerHub.register(Binding(frozenset(), callback, args, kwargs, on_esc=True))
 
     @classmethod
-    def listen_for_key_then(cls, key: Union[str, Key], callback: callable, *args, **kwargs) -> Listener:
+    def listen_for_key_then(cls, key: Union[str, Enum], callback: callable, *args, **kwargs) -> Binding:
         """
-        Start a keyboard listener that listens for a specific key to trigger the callback function.
+        Register a binding on the shared listener that triggers the callback function when a specific key is pressed.
         Use 'esc' to exit the listener.
 
         Note that this method will not block the main thread, allowing other operations to continue.
@@ -70,75 +52,36 @@ class KeyboardListener:
         :param callback: Function to call when the specified key is pressed.
         :param args: Additional arguments to pass to the callback function.
         :param kwargs: Additional keyword arguments to pass to the callback function.
+        :return: The binding, which is stopped when 'esc' is pressed.
         """
-        def on_press(pressed_key: Union[str, Key]):
-            """
-            Callback function that is called when a key is pressed.
-            It checks if the pressed key matches the specified key and calls the callback function if it does.
-            It also checks for the 'esc' key to stop the listener.
-
-            :param pressed_key: The key that was pressed.
-            :return: True if the listener should continue, False if it should stop.
-            """
-            if isinstance(key, str):
-                try:
-                    if pressed_key.char == key:
-                        callback(*args, **kwargs)
-                except AttributeError:
-                    pass  # non è un tasto con `.char`, ignora
-            elif isinstance(key, Key):
-                if pressed_key == key:
-                    callback(*args, **kwargs)
-            else:
-                logger.error(f"Unsupported key type: {type(key)}. Expected str or Key.")
-                raise TypeError(f"Unsupported key type: {type(key)}. Expected str or Key.")
-
-            return cls.check_for_esc(pressed_key)
-        
-        message = f"Listening for key: {key}. Press it to trigger the callback. Press 'esc' to stop listening."
-        logger.info(message)
-
-        return cls.safe_start_listener(on_press=on_press)
+        if not isinstance(key, (str, Enum)):
+            logger.error("Unsupported key type: %s. Expected str or Key.", type(key))
+            raise TypeError(f"Unsupported key type: {type(key)}. Expected str or Key.")
+
+        logger.info("Listening for key: %s. Press it to trigger the callback. Press 'esc' to stop listening.", key)
+
+        return ListenerHub.register(Binding(frozenset({normalize_key(key)}), callback, args, kwargs))
 
 
     @classmethod
-    def listen_for_hotkeys_then(cls, keys: list[Union[str, Key]], callback: callable, *args, **kwargs) -> Listener:
+    def listen_for_hotkeys_then(cls, keys: list[Union[str, Enum]], callback: callable, *args, **kwargs) -> Binding:
         """
         Listen for a specific hotkey (combination of keys) and trigger callback when all are pressed together.
-        """
-        def normalize(key: Union[str, Key]) -> str:
-            if isinstance(key, str):
-                return key
-            else:
-                return key.name if hasattr(key, 'name') else key.char
 
-        expected = set(map(normalize, keys))
-        pressed = set()
-
-        def on_press(pressed_key):
-            if not cls.check_for_esc(pressed_key):
-                return False
-
-            try:
-                pressed.add(normalize(pressed_key))
-            except AttributeError:
-                pass  # Ignore keys without .name or .char
-
-            if pressed == expected:
-                callback(*args, **kwargs)
-
-            return True
-
-        def on_release(released_key):
-            try:
-                pressed.discard(normalize(released_key))
-            except AttributeError:
-                pass
+        :param keys: The keys that must be pressed together.
+        :param callback: Function to call when the hotkey is pressed.
+        :param args: Additional arguments to pass to the callback function.
+        :param kwargs: Additional keyword arguments to pass to the callback function.
+        :return: The binding, which is stopped when 'esc' is pressed.
+        """
+        expected = frozenset(map(normalize_key, keys))
+        if len(expected) < len(keys):
+            logger.warning("Hotkey %s has repeated keys once normalized: it is %s.", keys, " + ".join(expected))
 
-        log_keys = " + ".join(expected)
-        logger.info(f"Listening for hotkey: {log_keys}. Press all to trigger callback. Press 'esc' to stop.")
+        logger.info("Listening for hotkey: %s. Press all to trigger callback. Press 'esc' to stop.",
+                    " + ".join(expected))
 
-        return cls.safe_start_listener(on_press=on_press, on_release=on_release)
+        return ListenerHub.register(Binding(expected, callback, args, kwargs))
 
 
 def __blocking_loop():
@@ -168,6 +111,6 @@ if __name__ == "__main__" and __test == 'hotkeys':
     def hotkey_callback():
         print("cmd + ctrl + 1 pressed!")
 
-    KeyboardListener.listen_for_hotkeys_then([Key.cmd, Key.ctrl, '1'], hotkey_callback)
+    KeyboardListener.listen_for_hotkeys_then([backend.Key.cmd, backend.Key.ctrl, '1'], hotkey_callback)
 
     __blocking_loop()
@@ -0,0 +1,121 @@
+"""
+Keycode table of the active keyboard layout, shared by the keyboard controllers and the typing engine.
+
+The table maps each character and special key the layout types to its keycode and to the keycodes of the
+modifiers to hold, like shift or AltGr. It is built once per layout from the keymap of the backend, and checked
+against the layout at most every CHECK_INTERVAL seconds, so a change of layout is picked up within that time.
+
+With the table, a whole sequence of key events is sent in one call of the backend (one flush on X11) instead of
+one call per event, each resolving its key again.
+"""
+from enum import Enum
+from threading import Lock
+from time import monotonic
+from typing import Hashable, Iterable, Optional, Union
+from src import backend
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+Entry = tuple[int, tuple[int, ...]]  # (keycode, keycodes of the modifiers)
+
+
+class KeyTable:
+    """ Cached keycode table of the active layout. Every method returns None when the backend has no keymap. """
+    CHECK_INTERVAL = 1.0  # seconds between two checks of the layout
+
+    __lock = Lock()
+    __layout: Optional[Hashable] = None
+    __state: tuple = (None, {}, float('-inf'))  # (keymap, table, time of the last check), replaced as a whole
+
+    @classmethod
+    def get(cls) -> Optional[dict[Union[str, Enum], Entry]]:
+        """
+        Get the table of the active layout, building it if the backend or the layout changed.
+
+        :return: The (keycode, modifier keycodes) of each character and special key, or None without keymap.
+        """
+        keymap = backend.keymap
+        if keymap is None:
+            return None
+        now = monotonic()
+        cached, table, checked_at = cls.__state
+        if keymap is cached and now - checked_at < cls.CHECK_INTERVAL:
+            return table
+
+        with cls.__lock:
+            layout = keymap.layout()
+            if keymap is not cached or layout != cls.__layout:
+                table = keymap.build()
+                cls.__layout = layout
+                logger.info("Built the keycode table of the keyboard layout: %d keys in %.1f ms.",
+                            len(table), (monotonic() - now) * 1000)
+            cls.__state = (keymap, table, now)
+            return table
+
+    @classmethod
+    def invalidate(cls):
+        """Check the layout again on next use, rebuilding the table if it changed."""
+        with cls.__lock:
+            keymap, table, _ = cls.__state
+            cls.__state = (keymap, table, float('-inf'))
+
+    @classmethod
+    def lookup(cls, key: Union[str, Enum]) -> Optional[Entry]:
+        """
+        Get the keycode of a key and of the modifiers it needs.
+
+        :param key: A character or a special key.
+        :return: The (keycode, modifier keycodes), or None if the layout or the backend can't type the key.
+        """
+        table = cls.get()
+        return table.get(key) if table is not None else None
+
+    @classmethod
+    def keycode(cls, key: Union[str, Enum]) -> Optional[int]:
+        """
+        Get the keycode of a key typed without modifiers.
+
+        :param key: A character or a special key.
+        :return: The keycode, or None if the key needs modifiers or can't be typed from the table.
+        """
+        entry = cls.lookup(key)
+        return entry[0] if entry is not None and not entry[1] else None
+
+    @classmethod
+    def strokes(cls, keys: Iterable[Union[str, Enum]]) -> Optional[list[tuple[int, bool]]]:
+        """
+        Get the key events pressing and releasing each key in turn.
+
+        The modifiers are held across consecutive keys needing the same ones: "ABC" presses shift once.
+
+        :param keys: Characters or special keys.
+        :return: The (keycode, pressed) events, or None if a key isn't in the table.
+        """
+        table = cls.get()
+        if table is None:
+            return None
+        events: list[tuple[int, bool]] = []
+        held: tuple[int, ...] = ()
+        for key in keys:
+            entry = table.get(key)
+            if entry is None:
+                return None
+            keycode, modifiers = entry
+            if modifiers != held:
+                events.extend((modifier, False) for modifier in reversed(held))
+                events.extend((modifier, True) for modifier in modifiers)
+                held = modifiers
+            events.append((keycode, True))
+            events.append((keycode, False))
+        events.extend((modifier, False) for modifier in reversed(held))
+        return events
+
+    @staticmethod
+    def send(events: list[tuple[int, bool]]):
+        """
+        Send key events through the keymap of the backend, in one call.
+
+        :param events: The (keycode, pressed) events.
+        """
+        backend.keymap.send(events)
@@ -0,0 +1,333 @@
+from enum import Enum
+from threading import Event, RLock
+from typing import Optional
+from src import backend
+from src.logger import get_logger
+from src.metrics import MetricsRegistry
+from time import perf_counter, sleep
+
+
+logger = get_logger(__name__)
+dispatch_latency = MetricsRegistry.histogram('guibot_listener_dispatch_seconds')
+
+ESC = 'esc'
+
+# Left and right variants of the modifiers are the same key for the bindings: 'ctrl_l' + 'c' matches 'ctrl' + 'c'.
+# 'alt_gr' stays distinct: on most layouts it selects characters rather than acting as a modifier.
+MODIFIER_ALIASES = {'ctrl_l': 'ctrl', 'ctrl_r': 'ctrl', 'shift_l': 'shift', 'shift_r': 'shift',
+                    'alt_l': 'alt', 'alt_r': 'alt', 'cmd_l': 'cmd', 'cmd_r': 'cmd'}
+# With ctrl held, some platforms report letters as control characters: '\x03' for ctrl+c.
+# Tab, line feed and carriage return are left alone, they are real keys too.
+CONTROL_CHARACTERS = {chr(i): chr(i + 96) for i in range(1, 27) if chr(i) not in '\t\n\r'}
+
+
+def normalize_key(key) -> Optional[str]:
+    """
+    Normalize a key to the string used to index the bindings.
+
+    Special keys are identified by their name (e.g. 'esc', 'f5', 'ctrl'), printable keys by their character.
+    Left and right modifiers are merged (see MODIFIER_ALIASES), and control characters are mapped back to their
+    letter.
+
+    :param key: A single character string, a Key or a KeyCode as received by a listener of the input backend.
+    :return: The normalized key, or None if the key can't be identified.
+    """
+    if isinstance(key, Enum):
+        key = key.name
+    elif not isinstance(key, str):
+        key = getattr(key, 'char', None)
+        if key is None:
+            return None
+    return MODIFIER_ALIASES.get(key) or CONTROL_CHARACTERS.get(key, key)
+
+
+def key_identity(key, name: str):
+    """
+    Identify a physical key, whatever the modifiers held: shift+a may be pressed as 'A' and released as 'a'.
+
+    :param key: The key as received by a listener of the input backend.
+    :param name: Its normalized name, used for the keys that carry no virtual key code.
+    :return: The Key member, the virtual key code, or the name.
+    """
+    if isinstance(key, Enum):
+        return key
+    vk = getattr(key, 'vk', None)
+    return name if vk is None else vk
+
+
+class Binding:
+    """
+    A handler registered on the ListenerHub.
+
+    A binding stays active until it is stopped explicitly or until 'esc' is pressed.
+    It exposes the same ``stop()`` / ``join()`` interface as a pynput Listener, so it can be used in its place.
+    """
+    def __init__(self, keys: frozenset[str], callback: callable, args: tuple = (), kwargs: Optional[dict] = None,
+                 on_esc: bool = False, edge_triggered: bool = False):
+        """
+        :param keys: Normalized keys that must be pressed together to trigger the binding.
+        :param callback: Function to call when the binding is triggered.
+        :param args: Positional arguments to pass to the callback.
+        :param kwargs: Keyword arguments to pass to the callback.
+        :param on_esc: If True, the binding is triggered by 'esc' instead of by its keys.
+        :param edge_triggered: If True, the binding ignores the auto-repeat presses of a key held down.
+        """
+        self.keys = keys
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.on_esc = on_esc
+        self.edge_triggered = edge_triggered
+        self._stopped = Event()
+
+    @property
+    def running(self) -> bool:
+        """True while the binding is registered on the hub."""
+        return not self._stopped.is_set()
+
+    def trigger(self):
+        """Call the bound callback with its arguments."""
+        self.callback(*self.args, **self.kwargs)
+
+    def stop(self):
+        """Remove the binding from the hub."""
+        ListenerHub.unregister(self)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the binding is stopped.
+
+        :param timeout: Maximum time to wait in seconds. None waits forever.
+        :return: True if the binding has been stopped, False if the timeout expired.
+        """
+        return self._stopped.wait(timeout)
+
+    def __repr__(self):
+        return f"Binding({'+'.join(sorted(self.keys)) or ESC}, {getattr(self.callback, '__name__', self.callback)})"
+
+
+class ListenerHub:
+    """
+    Process-wide keyboard listener shared by every binding.
+
+    A single listener of the input backend is started on the first registration, so the synchronization delay is paid once
+    no matter how many bindings exist. Key presses are dispatched through a dict indexed by normalized key,
+    so the cost of a press does not grow with the number of registered bindings.
+
+    A chord takes precedence over the single keys it is made of: while 'ctrl' is held, 'c' runs the 'ctrl+c'
+    bindings instead of the 'c' ones, if there are any. Registering a binding reports the bindings it conflicts
+    with (same keys) or shadows (see `conflicts`).
+
+    'esc' is handled centrally: it calls the esc handlers, stops every binding and shuts the listener down.
+    The next registration starts a new listener.
+
+    Private attributes:
+    -------------------
+    - __index : dict[str, tuple[Binding, ...]]
+        Single-key bindings indexed by normalized key.
+
+    - __chords : dict[frozenset[str], tuple[Binding, ...]]
+        Multi-key bindings indexed by the set of keys that must be pressed together.
+
+    - __esc : tuple[Binding, ...]
+        Bindings to call when 'esc' is pressed.
+
+    - __pressed : dict[object, str]
+        Normalized name of the keys held down, by key identity (see `key_identity`). Only used by the listener thread.
+
+    The tuples are replaced, never mutated, so the listener thread can read them without taking the lock.
+    """
+    SYNC_DELAY: float = 0.1  # seconds
+
+    __lock = RLock()
+    __listener = None
+    __index: dict[str, tuple[Binding, ...]] = {}
+    __chords: dict[frozenset[str], tuple[Binding, ...]] = {}
+    __esc: tuple[Binding, ...] = ()
+    __pressed: dict[object, str] = {}
+
+    @classmethod
+    def start(cls):
+        """
+        Start the shared listener if it isn't running yet.
+
+        :return: The running listener of the input backend.
+        """
+        with cls.__lock:
+            if cls.__listener is None or not cls.__listener.running:
+                logger.info("Starting shared listener with a synchronization delay of %s seconds.", cls.SYNC_DELAY)
+                sleep(cls.SYNC_DELAY)  # allow safe synchronization of AXIsProcessTrusted
+                cls.__listener = backend.get_backend().keyboard_listener(on_press=cls._on_press,
+                                                                        on_release=cls._on_release)
+                cls.__listener.start()
+            return cls.__listener
+
+    @classmethod
+    def stop(cls):
+        """Stop every binding and the shared listener."""
+        with cls.__lock:
+            bindings = cls.bindings()
+            cls.__index = {}
+            cls.__chords = {}
+            cls.__esc = ()
+            cls.__pressed = {}
+            listener, cls.__listener = cls.__listener, None
+
+        for binding in bindings:
+            binding._stopped.set()
+        if listener is not None:
+            listener.stop()
+        logger.info("Shared listener stopped. %s bindings removed.", len(bindings))
+
+    @classmethod
+    def register(cls, binding: Binding, start: bool = True) -> Binding:
+        """
+        Add a binding to the hub.
+
+        :param binding: The binding to add.
+        :param start: If True, the shared listener is started if needed.
+        :return: The registered binding.
+        :raises ValueError: If the binding includes 'esc' without being an esc handler: it could never run.
+        """
+        if not binding.on_esc and ESC in binding.keys:
+            message = f"{binding} can never run: 'esc' stops every binding. Use KeyboardListener.exit_on_esc instead."
+            logger.error(message)
+            raise ValueError(message)
+
+        with cls.__lock:
+            if not binding.on_esc:
+                for conflict in cls.conflicts(binding.keys):
+                    logger.warning("%s: %s", binding, conflict)
+            if binding.on_esc:
+                cls.__esc = cls.__esc + (binding,)
+            elif len(binding.keys) == 1:
+                key, = binding.keys
+                cls.__index = {**cls.__index, key: cls.__index.get(key, ()) + (binding,)}
+            else:
+                cls.__chords = {**cls.__chords, binding.keys: cls.__chords.get(binding.keys, ()) + (binding,)}
+            logger.debug("Registered %s.", binding)
+
+            if start:
+                cls.start()
+        return binding
+
+    @classmethod
+    def unregister(cls, binding: Binding):
+        """
+        Remove a binding from the hub. Removing a binding that isn't registered has no effect.
+
+        :param binding: The binding to remove.
+        """
+        with cls.__lock:
+            if binding.on_esc:
+                cls.__esc = tuple(b for b in cls.__esc if b is not binding)
+            elif len(binding.keys) == 1:
+                key, = binding.keys
+                cls.__index = cls.__without(cls.__index, key, binding)
+            else:
+                cls.__chords = cls.__without(cls.__chords, binding.keys, binding)
+            logger.debug("Unregistered %s.", binding)
+        binding._stopped.set()
+
+    @staticmethod
+    def __without(index: dict, key, binding: Binding) -> dict:
+        """Return a copy of the index without the binding."""
+        remaining = tuple(b for b in index.get(key, ()) if b is not binding)
+        index = dict(index)
+        if remaining:
+            index[key] = remaining
+        else:
+            index.pop(key, None)
+        return index
+
+    @classmethod
+    def conflicts(cls, keys: frozenset[str]) -> list[str]:
+        """
+        Find the registered bindings that a binding on these keys would conflict with or shadow.
+
+        - conflict: a binding on the same keys. Both run on every press.
+        - shadowed: for a single key, the chords including it. The key doesn't run its bindings when it completes
+          one of those chords.
+        - shadows: for a chord, the bindings on one of its keys. They don't run when that key completes the chord.
+
+        :param keys: Normalized keys of the binding.
+        :return: A description of each conflict, empty if there is none.
+        """
+        with cls.__lock:
+            index, chords = cls.__index, cls.__chords
+        problems = []
+        same = index.get(next(iter(keys))) if len(keys) == 1 else chords.get(keys)
+        if same:
+            problems.append(f"conflicts with {', '.join(map(repr, same))}: both run on every press.")
+        if len(keys) == 1:
+            key, = keys
+            shadowing = sorted('+'.join(sorted(chord)) for chord in chords if key in chord)
+            if shadowing:
+                problems.append(f"shadowed by the chords {', '.join(shadowing)}: "
+                                f"'{key}' doesn't run it when it completes one of them.")
+        else:
+            shadowed = [binding for key in sorted(keys) for binding in index.get(key, ())]
+            if shadowed:
+                problems.append(f"shadows {', '.join(map(repr, shadowed))}: "
+                                f"they don't run when their key completes the chord.")
+        return problems
+
+    @classmethod
+    def bindings(cls) -> list[Binding]:
+        """Get every registered binding."""
+        with cls.__lock:
+            return [*cls.__esc,
+                    *(b for bs in cls.__index.values() for b in bs),
+                    *(b for bs in cls.__chords.values() for b in bs)]
+
+    @classmethod
+    def is_running(cls) -> bool:
+        """Check if the shared listener is running."""
+        return cls.__listener is not None and cls.__listener.running
+
+    @classmethod
+    def _on_press(cls, key) -> bool:
+        """
+        Dispatch a key press to the bindings registered on that key.
+
+        :param key: The key that was pressed.
+        :return: False if the listener should stop ('esc'), True otherwise.
+        """
+        start = perf_counter()
+        name = normalize_key(key)
+        if name is None:
+            return True
+
+        if name == ESC:
+            for binding in cls.__esc:
+                binding.trigger()
+            logger.info("Exiting listener due to 'esc' keystroke.")
+            cls.stop()
+            return False
+
+        identity = key_identity(key, name)
+        repeat = identity in cls.__pressed  # a key held down sends presses without releases
+        cls.__pressed[identity] = name
+
+        chord = cls.__chords.get(frozenset(cls.__pressed.values()), ()) if len(cls.__pressed) > 1 else ()
+        for binding in chord or cls.__index.get(name, ()):
+            if not (repeat and binding.edge_triggered):
+                binding.trigger()
+
+        dispatch_latency.record(perf_counter() - start)
+        return True
+
+    @classmethod
+    def _on_release(cls, key):
+        """
+        Track key releases to keep the set of pressed keys up to date.
+
+        :param key: The key that was released.
+        """
+        name = normalize_key(key)
+        if name is None or cls.__pressed.pop(key_identity(key, name), None) is not None:
+            return
+        # Backends whose key codes depend on the modifiers (keysyms on X): 'A' is released as 'a' once shift is up.
+        for identity, pressed in list(cls.__pressed.items()):
+            if pressed.lower() == name.lower():
+                del cls.__pressed[identity]
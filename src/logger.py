@@ -1,35 +1,146 @@
-__all__ = ['get_logger']
+__all__ = ['get_logger', 'configure', 'forward']
 
+import atexit
 import logging
-from colored import Fore, Style
-from src.env import get_logging_level
+from queue import SimpleQueue
+from typing import Optional, TextIO
+from src.env import get_log_file, get_logging_level
 
-# Get the logging level from the environment variable
-logging_level = getattr(logging, get_logging_level().upper(), None)
-if logging_level is not None and not isinstance(logging_level, int):
-    raise ValueError(f"Invalid logging level: {get_logging_level()}")
+# logging.handlers, colored and json are imported on first use: they add tens of milliseconds to every start,
+# and most runs never configure a sink.
 
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+LOG_FILE_BACKUPS = 5
+
+_listener = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """ Formats each record as one JSON object per line. """
+    def format(self, record: logging.LogRecord) -> str:
+        import json
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'line': record.lineno,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _InProcessQueueHandler(logging.Handler):
+    """ Puts records on a queue consumed in the same process: records are not copied nor pre-formatted. """
+    def __init__(self, queue: SimpleQueue):
+        super().__init__()
+        self.queue = queue
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            # Merge the arguments now, so later changes to mutable arguments don't alter the message.
+            record.msg = record.getMessage()
+            record.args = None
+            self.queue.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
+
+def configure(level: Optional[int], log_file: str = "", stream: Optional[TextIO] = None):
+    """
+    Configure the logging sink.
+
+    Records are handed to a QueueHandler on the caller's thread; formatting, colouring and writing happen
+    on a background QueueListener thread. Calling this function again replaces the previous configuration.
+
+    :param level: Logging level, or None to disable logging (only warnings and errors reach stderr).
+    :param log_file: Path of an optional rotating JSON-lines log file.
+    :param stream: Stream for the coloured console output. Defaults to stderr.
+    """
+    global _listener, _queue_handler
+
+    root = logging.getLogger()
+    if _listener is not None:
+        _listener.stop()
+        root.removeHandler(_queue_handler)
+        _listener = _queue_handler = None
+
+    if level is None:
+        root.setLevel(logging.WARNING)
+        return
+
+    from logging.handlers import QueueListener, RotatingFileHandler
+    from colored import Fore, Style
 
-# Configure the logging settings
-if isinstance(logging_level, int):
     format = (f'{Fore.cyan}%(asctime)s {Style.reset}- '
               f'{Fore.magenta}%(name)s {{%(lineno)s}} {Style.reset}- '
               f'{Fore.green}%(levelname)s {Style.reset}- '
               f'{Fore.yellow}%(message)s{Style.reset}')
+    console = logging.StreamHandler(stream)
+    console.setFormatter(logging.Formatter(format, datefmt='%Y-%m-%d %H:%M:%S'))
+    handlers = [console]
+
+    if log_file:
+        file = RotatingFileHandler(log_file, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS,
+                                   encoding='utf-8')
+        file.setFormatter(JsonLinesFormatter())
+        handlers.append(file)
+
+    queue = SimpleQueue()
+    _queue_handler = _InProcessQueueHandler(queue)
+    _listener = QueueListener(queue, *handlers, respect_handler_level=True)
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+    _listener.start()
+
+
+def forward(queue, level: int, prefix: str = ""):
+    """
+    Send every record to a queue instead of handling it, e.g. for a supervisor process to log it.
+
+    :param queue: Queue shared with the process handling the records, e.g. a multiprocessing Queue.
+    :param level: Logging level.
+    :param prefix: Prefix added to the logger name of every record, e.g. the name of the worker.
+    """
+    from logging.handlers import QueueHandler
+
+    configure(None)
+    handler = QueueHandler(queue)
+    if prefix:
+        handler.addFilter(lambda record: setattr(record, 'name', f"{prefix}:{record.name}") or True)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+
 
-    print(f"Logging level set to: {logging_level}")
+@atexit.register
+def _flush():
+    """Write the records still in the queue before the process exits."""
+    if _listener is not None:
+        _listener.stop()
 
-    logging.basicConfig(
-        level=logging_level,
-        format=format,
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+
+# Get the logging level from the environment variable
+logging_level = getattr(logging, get_logging_level().upper(), None)
+if logging_level is not None and not isinstance(logging_level, int):
+    raise ValueError(f"Invalid logging level: {get_logging_level()}")
+
+
+# Configure the logging settings
+if isinstance(logging_level, int):
+    configure(logging_level, get_log_file())
 
 
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger with the specified name.
 
+    Use lazy %-style arguments (``logger.info("Moving to %s", point)``) so that nothing is formatted
+    when the level is disabled, and guard expensive arguments with ``logger.isEnabledFor``.
+
     :param name: Name of the logger.
     :return: Configured logger instance.
     """
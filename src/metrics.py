@@ -0,0 +1,279 @@
+import os
+from bisect import bisect_left
+from threading import Event, Lock, Thread
+from time import perf_counter
+from typing import Optional, Union
+from src.cancellation import Cancelled
+from src.logger import get_logger
+from src.tracer import Tracer
+
+logger = get_logger(__name__)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Counter:
+    """ Monotonic counter. """
+    def __init__(self):
+        self._lock = Lock()
+        self.value: Union[int, float] = 0
+
+    def inc(self, amount: Union[int, float] = 1):
+        """
+        Increase the counter.
+
+        :param amount: Amount to add, 1 by default.
+        """
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """
+    Histogram with fixed, logarithmically spaced buckets from 1 µs to about 160 s.
+
+    Recording is a binary search and an increment, so it costs the same whatever the number of samples.
+    Quantiles are estimated from the bucket bounds, with a relative error below 19%.
+    """
+    BOUNDS = tuple(1e-6 * 2 ** (i / 4) for i in range(110))
+
+    def __init__(self):
+        self._lock = Lock()
+        self.buckets = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def record(self, value: float):
+        """
+        Record a sample.
+
+        :param value: The sample, in seconds.
+        """
+        i = bisect_left(self.BOUNDS, value)
+        with self._lock:
+            self.buckets[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile of the recorded samples.
+
+        :param q: The quantile, between 0 and 1 (e.g. 0.95 for p95).
+        :return: Upper bound of the bucket holding the quantile, or 0 if nothing has been recorded.
+        """
+        with self._lock:
+            buckets, count = list(self.buckets), self.count
+        if count == 0:
+            return 0.0
+
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(buckets):
+            seen += n
+            if seen >= rank and n:
+                return self.BOUNDS[min(i, len(self.BOUNDS) - 1)]
+        return self.BOUNDS[-1]
+
+
+class MetricsRegistry:
+    """
+    Process-wide store of counters and histograms, identified by name and labels.
+
+    Metrics are created on first use. Callers on hot paths should keep a reference to the metric
+    instead of looking it up on every call.
+    """
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    __lock = Lock()
+    __counters: dict[tuple[str, Labels], Counter] = {}
+    __histograms: dict[tuple[str, Labels], Histogram] = {}
+    __exporter: Optional['MetricsExporter'] = None
+
+    @classmethod
+    def counter(cls, name: str, **labels: str) -> Counter:
+        """
+        Get or create a counter.
+
+        :param name: Name of the metric, e.g. 'guibot_runs_total'.
+        :param labels: Labels of the metric, e.g. automation='resize_image'.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with cls.__lock:
+            return cls.__counters.setdefault(key, Counter())
+
+    @classmethod
+    def histogram(cls, name: str, **labels: str) -> Histogram:
+        """
+        Get or create a histogram.
+
+        :param name: Name of the metric, e.g. 'guibot_run_duration_seconds'.
+        :param labels: Labels of the metric, e.g. automation='resize_image'.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with cls.__lock:
+            return cls.__histograms.setdefault(key, Histogram())
+
+    @classmethod
+    def snapshot(cls) -> dict:
+        """
+        Get the current value of every metric.
+
+        :return: A dictionary with a 'counters' and a 'histograms' list.
+        """
+        with cls.__lock:
+            counters = list(cls.__counters.items())
+            histograms = list(cls.__histograms.items())
+
+        return {
+            'counters': [{'name': name, 'labels': dict(labels), 'value': counter.value}
+                         for (name, labels), counter in counters],
+            'histograms': [{'name': name, 'labels': dict(labels), 'count': histogram.count, 'sum': histogram.sum,
+                            **{f'p{round(q * 100)}': histogram.quantile(q) for q in cls.QUANTILES}}
+                           for (name, labels), histogram in histograms],
+        }
+
+    @classmethod
+    def to_prometheus(cls) -> str:
+        """Render every metric in the Prometheus text exposition format. Histograms are rendered as summaries."""
+        def render(labels: dict) -> str:
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}" if labels else ""
+
+        snapshot = cls.snapshot()
+        lines = []
+        for name in sorted({c['name'] for c in snapshot['counters']}):
+            lines.append(f"# TYPE {name} counter")
+            lines += [f"{name}{render(c['labels'])} {c['value']}" for c in snapshot['counters'] if c['name'] == name]
+        for name in sorted({h['name'] for h in snapshot['histograms']}):
+            lines.append(f"# TYPE {name} summary")
+            for h in (h for h in snapshot['histograms'] if h['name'] == name):
+                lines += [f"{name}{render({**h['labels'], 'quantile': str(q)})} {h[f'p{round(q * 100)}']}"
+                          for q in cls.QUANTILES]
+                lines.append(f"{name}_sum{render(h['labels'])} {h['sum']}")
+                lines.append(f"{name}_count{render(h['labels'])} {h['count']}")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def dump(cls, path: str):
+        """
+        Write every metric to a file, atomically. Files ending in '.json' are written as JSON,
+        any other file in the Prometheus text format.
+
+        :param path: Path of the file.
+        """
+        import json
+        content = json.dumps(cls.snapshot(), indent=2) if path.endswith('.json') else cls.to_prometheus()
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(temporary, path)
+
+    @classmethod
+    def start_exporter(cls, path: str, interval: float = 10.0) -> 'MetricsExporter':
+        """
+        Dump the metrics to a file periodically, replacing the running exporter if any.
+
+        :param path: Path of the file, see `dump`.
+        :param interval: Time between two dumps in seconds.
+        :return: The running exporter.
+        """
+        with cls.__lock:
+            previous, cls.__exporter = cls.__exporter, MetricsExporter(path, interval)
+            exporter = cls.__exporter
+        if previous is not None:
+            previous.stop()
+        exporter.start()
+        return exporter
+
+
+class AutomationMetrics:
+    """ Metrics of a single automation: triggers, dropped triggers, runs, errors and run duration. """
+    def __init__(self, name: str):
+        """
+        :param name: Name of the automation, used as the 'automation' label.
+        """
+        self.triggers = MetricsRegistry.counter('guibot_triggers_total', automation=name)
+        self.dropped = MetricsRegistry.counter('guibot_dropped_triggers_total', automation=name)
+        self.runs = MetricsRegistry.counter('guibot_runs_total', automation=name)
+        self.errors = MetricsRegistry.counter('guibot_errors_total', automation=name)
+        self.duration = MetricsRegistry.histogram('guibot_run_duration_seconds', automation=name)
+        self.span = f"automation:{name}"
+
+    def run(self, function: callable, *args, **kwargs):
+        """
+        Run the automation function, recording its duration and whether it raised an exception.
+        While tracing, the run is also recorded as a span that the controller calls nest under.
+
+        :param function: The automation function.
+        :param args: Positional arguments to pass to the function.
+        :param kwargs: Keyword arguments to pass to the function.
+        :return: The result of the function.
+        """
+        tracing = Tracer.enabled
+        if tracing:
+            Tracer.begin(self.span)
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except Cancelled:
+            raise
+        except Exception:
+            self.errors.inc()
+            raise
+        finally:
+            self.duration.record(perf_counter() - start)
+            self.runs.inc()
+            if tracing:
+                Tracer.end(self.span)
+
+    async def run_async(self, function: callable, *args, **kwargs):
+        """
+        Await an async automation function, recording its duration and whether it raised an exception.
+        Async runs are not traced: spans of tasks sharing a thread would not nest.
+
+        :param function: The async automation function.
+        :param args: Positional arguments to pass to the function.
+        :param kwargs: Keyword arguments to pass to the function.
+        :return: The result of the function.
+        """
+        start = perf_counter()
+        try:
+            return await function(*args, **kwargs)
+        except Cancelled:
+            raise
+        except Exception:
+            self.errors.inc()
+            raise
+        finally:
+            self.duration.record(perf_counter() - start)
+            self.runs.inc()
+
+
+class MetricsExporter(Thread):
+    """ Background thread dumping the metrics to a file at a fixed interval, and once more when stopped. """
+    def __init__(self, path: str, interval: float):
+        """
+        :param path: Path of the file, see `MetricsRegistry.dump`.
+        :param interval: Time between two dumps in seconds.
+        """
+        super().__init__(name="guibot-metrics", daemon=True)
+        self.path = path
+        self.interval = interval
+        self._stopped = Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.dump()
+        self.dump()
+
+    def dump(self):
+        """Dump the metrics, logging instead of raising on failure."""
+        try:
+            MetricsRegistry.dump(self.path)
+        except OSError:
+            logger.exception("Cannot write the metrics to %s.", self.path)
+
+    def stop(self):
+        """Stop the exporter after a last dump."""
+        self._stopped.set()
+        self.join()
@@ -1,38 +1,62 @@
+from typing import Optional, Union
 from src.base_controller import BaseController
-from pynput.mouse import Button, Controller
 from src.point import Point
-from src.enums import Interval
+from src.point_array import PointArray
+from src.enums import Curve, Interval
+from src import backend, trajectory
 from src.logger import get_logger
+from src.tracer import traced
 
 logger = get_logger(__name__)
-mouse = Controller()
 
 
+def set_position(position: tuple[float, float]):
+    """ Set the absolute position of the mouse pointer. """
+    backend.mouse.position = position
+
+
+@traced()
 class MouseController(BaseController):
-    @staticmethod
-    def get_position() -> Point:
+    _pressed: set = set()
+    _position: Optional[Point] = None  # last position read, reused while the pointer doesn't move
+
+    @classmethod
+    def get_position(cls) -> Point:
         """ Get the current mouse position.
 
         :return: Point representing the current mouse position.
         """
-        position = mouse.position
-        logger.debug(f"Current mouse position: {position}")
-        return Point(*position)
+        position = tuple(backend.mouse.position)
+        logger.debug("Current mouse position: %s", position)
+        point = cls._position
+        if point is None or point.tuple != position:
+            point = cls._position = Point(*position)
+        return point
 
     @classmethod
     def press(cls):
         """ Press the left mouse button. """
         cls.wait(Interval.SHORT)
         logger.info("Pressing the left mouse button.")
-        mouse.press(Button.left)
+        cls.inject(backend.mouse.press, backend.Button.left)
+        cls._pressed.add(backend.Button.left)
 
     @classmethod
     def release(cls):
         """ Release the left mouse button. """
         logger.info("Releasing the left mouse button.")
-        mouse.release(Button.left)
+        cls.inject(backend.mouse.release, backend.Button.left, check=False)
+        cls._pressed.discard(backend.Button.left)
         cls.wait(Interval.INSTANT)
 
+    @classmethod
+    def release_pressed(cls):
+        """ Release the mouse buttons pressed and not released yet. """
+        for button in list(cls._pressed):
+            logger.info("Releasing the %s mouse button.", button.name)
+            cls.inject(backend.mouse.release, button, check=False)
+            cls._pressed.discard(button)
+
     @classmethod
     def click(cls, must_wait: bool = True):
         """ Click the left mouse button.
@@ -41,7 +65,7 @@ class MouseController(BaseController):
         if must_wait:
             cls.wait(Interval.SHORT)
         logger.info("Clicking the left mouse button.")
-        mouse.click(Button.left)
+        cls.inject(backend.mouse.click, backend.Button.left)
 
     @classmethod
     def double_click(cls, must_wait: bool = True):
@@ -51,7 +75,7 @@ class MouseController(BaseController):
         if must_wait:
             cls.wait(Interval.SHORT)
         logger.info("Double clicking the left mouse button.")
-        mouse.click(Button.left, 2)
+        cls.inject(backend.mouse.click, backend.Button.left, 2)
 
     @classmethod
     def right_click(cls, must_wait: bool = True):
@@ -61,10 +85,11 @@ class MouseController(BaseController):
         if must_wait:
             cls.wait(Interval.SHORT)
         logger.info("Right clicking the mouse button.")
-        mouse.click(Button.right)
+        cls.inject(backend.mouse.click, backend.Button.right)
 
     @classmethod
-    def move_by_offset(cls, x: int, y: int, slowly: bool = False, elapsed_time: float = .8, definition: int = 80):
+    def move_by_offset(cls, x: int, y: int, slowly: bool = False, elapsed_time: float = .8, definition: int = 80,
+                       curve: Curve = Curve.LINEAR):
         """ Move the mouse of x and y pixels.
 
         :param x: Horizontal movement in pixels.
@@ -73,29 +98,53 @@ class MouseController(BaseController):
         :param elapsed_time: Time in seconds to complete the movement. (Slowly must be True)
         :param definition: Number of steps to divide the movement into. A higher value means smoother movement but slower execution.
         (Slowly must be True)
+        :param curve: Shape of the simulated movement. (Slowly must be True)
         """
         if slowly:
-            logger.info(f"Moving the mouse slowly to ({x}, {y}) over {elapsed_time} seconds with {definition} steps.")
+            logger.info("Moving the mouse slowly by (%s, %s) over %s seconds with %s steps.", x, y, elapsed_time, definition)
 
-            if not elapsed_time > 0 and definition > 0:
+            if not (elapsed_time > 0 and definition > 0):
                 message = (f"Elapsed time and definition must be greater than zero. "
                            f"Elapsed time: {elapsed_time}, Definition: {definition}")
                 logger.error(message)
                 raise ValueError(message)
 
-            part_x = round(x / definition)
-            part_y = round(y / definition)
-
-            for _ in range(definition):
-                logger.debug(f"Moving mouse by ({part_x}, {part_y})")
-                mouse.move(part_x, part_y)
-                logger.debug(f"Mouse position after move: {mouse.position}")
-                logger.debug(f"Sleeping for {elapsed_time / definition} seconds")
-                cls.wait(elapsed_time / definition)
+            cls.follow(trajectory.offsets(int(x), int(y), definition, curve), elapsed_time)
         else:
             cls.wait(Interval.SHORT)
-            logger.info(f"Moving the mouse instantly to ({x}, {y}).")
-            mouse.move(x, y)
+            logger.info("Moving the mouse instantly to (%s, %s).", x, y)
+            cls.inject(backend.mouse.move, x, y)
+
+    @classmethod
+    def move_along(cls, waypoints: Union[PointArray, list[Point]], elapsed_time: float = .8, definition: int = 80,
+                   curve: Curve = Curve.LINEAR):
+        """ Move the mouse through a sequence of points, reaching each of them exactly.
+
+        :param waypoints: Points to move through, in order, as a PointArray or a list of Points.
+        :param elapsed_time: Time in seconds to complete the whole movement.
+        :param definition: Total number of steps, shared among the segments in proportion to their length.
+        :param curve: Shape of each segment.
+        """
+        logger.info("Moving the mouse through %s waypoints over %s seconds.", len(waypoints), elapsed_time)
+        x0, y0 = cls.get_position().tuple_int
+        points = waypoints if isinstance(waypoints, PointArray) else PointArray(waypoints)
+        relative = tuple((x - x0, y - y0) for x, y in points.tuples_int)
+        cls.follow(trajectory.waypoint_offsets(relative, definition, curve), elapsed_time, (x0, y0))
+
+    @classmethod
+    def follow(cls, path, elapsed_time: float, start: Optional[tuple[int, int]] = None):
+        """ Move the mouse along a precomputed path of offsets, as returned by the trajectory module.
+
+        :param path: Cumulative (x, y) offsets from the starting point, one per step.
+        :param elapsed_time: Time in seconds to complete the movement.
+        :param start: Starting position. Defaults to the current position.
+        """
+        def move(x: int, y: int):
+            cls.inject(set_position, (x, y))
+
+        if start is None:
+            start = cls.get_position().tuple_int
+        trajectory.follow(path, start, elapsed_time, move)
 
     @classmethod
     def scroll(cls, x: int, y: int):
@@ -105,17 +154,17 @@ class MouseController(BaseController):
         :param y: Vertical scroll amount (positive for down, negative for up).
         """
         cls.wait(Interval.SHORT)
-        logger.info(f"Scrolling the mouse wheel by ({x}, {y}).")
-        mouse.scroll(x, y)
+        logger.info("Scrolling the mouse wheel by (%s, %s).", x, y)
+        cls.inject(backend.mouse.scroll, x, y)
 
-    @staticmethod
-    def move_to(point: Point):
+    @classmethod
+    def move_to(cls, point: Point):
         """ Move the mouse to a specific point.
 
         :param point: Point to move the mouse to.
         """
-        logger.info(f"Moving the mouse to point: {point}")
-        mouse.position = point.tuple
+        logger.info("Moving the mouse to point: %s", point)
+        cls.inject(set_position, point.tuple)
 
     @classmethod
     def click_at(cls, point: Point, wait: float = 0.2):
@@ -124,11 +173,24 @@ class MouseController(BaseController):
         :param point: Point to click at.
         :param wait: Time to wait before clicking.
         """
-        logger.info(f"Preparing to click at: {point} in {wait} seconds.")
+        logger.info("Preparing to click at: %s in %s seconds.", point, wait)
         cls.move_to(point)
         cls.wait(wait)
         cls.click(must_wait=False)
 
+    @classmethod
+    def click_at_each(cls, points: Union[PointArray, list[Point]], wait: float = 0.2):
+        """ Click at each point of a sequence, in order.
+
+        :param points: Points to click at, as a PointArray or a list of Points.
+        :param wait: Time to wait before each click.
+        """
+        logger.info("Preparing to click at %s points, %s seconds apart.", len(points), wait)
+        for point in points:
+            cls.move_to(point)
+            cls.wait(wait)
+            cls.click(must_wait=False)
+
     @classmethod
     def double_click_at(cls, point: Point, wait: float = 0.2):
         """ Double click at a specific point.
@@ -136,7 +198,7 @@ class MouseController(BaseController):
         :param point: Point to double click at.
         :param wait: Time to wait before double clicking.
         """
-        logger.info(f"Preparing to double click at: {point} in {wait} seconds.")
+        logger.info("Preparing to double click at: %s in %s seconds.", point, wait)
         cls.move_to(point)
         cls.wait(wait)
         cls.double_click(must_wait=False)
@@ -148,13 +210,14 @@ class MouseController(BaseController):
         :param point: Point to right click at.
         :param wait: Time to wait before right clicking.
         """
-        logger.info(f"Preparing to right click at: {point} in {wait} seconds.")
+        logger.info("Preparing to right click at: %s in %s seconds.", point, wait)
         cls.move_to(point)
         cls.wait(wait)
         cls.right_click(must_wait=False)
 
     @classmethod
-    def drag_offset(cls, starting_point: Point, x: int, y: int, elapsed_time: float = .8, definition: int = 80):
+    def drag_offset(cls, starting_point: Point, x: int, y: int, elapsed_time: float = .8, definition: int = 80,
+                    curve: Curve = Curve.LINEAR):
         """ Drag the mouse from a starting point to a new position with a specified offset.
 
         :param starting_point: Point to start dragging from.
@@ -162,23 +225,28 @@ class MouseController(BaseController):
         :param y: Vertical offset from the starting point.
         :param elapsed_time: Time in seconds to complete the drag.
         :param definition: Number of steps to divide the drag into. A higher value means smoother movement but slower execution.
+        :param curve: Shape of the drag.
         """
-        logger.info(f"Dragging from {starting_point} to ({x}, {y}) over {elapsed_time} seconds with {definition} steps.")
+        logger.info("Dragging from %s to (%s, %s) over %s seconds with %s steps.", starting_point, x, y, elapsed_time, definition)
         cls.move_to(starting_point)
         cls.press()
-        cls.move_by_offset(x, y, slowly=True, elapsed_time=elapsed_time, definition=definition)
-        cls.release()
+        try:
+            cls.move_by_offset(x, y, slowly=True, elapsed_time=elapsed_time, definition=definition, curve=curve)
+        finally:
+            cls.release()  # never leave the button held down, even if the drag is cancelled
 
     @classmethod
-    def drag_to(cls, starting_point: Point, target_point: Point, elapsed_time: float = .8, definition: int = 80):
+    def drag_to(cls, starting_point: Point, target_point: Point, elapsed_time: float = .8, definition: int = 80,
+                curve: Curve = Curve.LINEAR):
         """ Drag the mouse from a starting point to a target point.
 
         :param starting_point: Point to start dragging from.
         :param target_point: Point to drag to.
         :param elapsed_time: Time in seconds to complete the drag.
         :param definition: Number of steps to divide the drag into. A higher value means smoother movement but slower execution.
+        :param curve: Shape of the drag.
         """
-        logger.info(f"Dragging from {starting_point} to {target_point} over {elapsed_time} seconds with {definition} steps.")
-        x_offset = target_point.int_x - starting_point.int_x
-        y_offset = target_point.int_y - starting_point.int_y
-        cls.drag_offset(starting_point, x_offset, y_offset, elapsed_time=elapsed_time, definition=definition)
+        logger.info("Dragging from %s to %s over %s seconds with %s steps.", starting_point, target_point, elapsed_time, definition)
+        offset = target_point - starting_point
+        cls.drag_offset(starting_point, offset.int_x, offset.int_y, elapsed_time=elapsed_time, definition=definition,
+                        curve=curve)
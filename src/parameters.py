@@ -0,0 +1,317 @@
+"""
+Live-tunable parameters: named, typed values with bounds, changed by hotkeys while automations run.
+
+Reading a parameter is a plain attribute read (``parameter.value``), with no lock: updates replace the value in
+one assignment, under the lock of the store, so readers see either the old or the new value. `ParameterStore.values`
+returns an immutable snapshot of every value, replaced the same way.
+
+Changed values are written to the parameters file (PARAMETERS_FILE) by a background thread, at most once per
+FLUSH_DELAY whatever the number of changes, and once more when the process exits. They are loaded again when the
+parameters are defined on the next start.
+"""
+import atexit
+import os
+from pathlib import Path
+from threading import Event, Lock, Thread
+from time import sleep
+from types import MappingProxyType
+from typing import Mapping, Optional, Union
+from src.env import get_parameters_file
+from src.keyboard_listener import KeyboardListener
+from src.listener_hub import Binding
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+Value = Union[int, float, bool, str]
+
+
+class Parameter:
+    """ Named value of a fixed type, kept within bounds. Create parameters with `ParameterStore.define`. """
+    def __init__(self, name: str, default: Value, minimum: Optional[Value] = None, maximum: Optional[Value] = None):
+        """
+        :param name: Name of the parameter, unique in the store and used as key in the parameters file.
+        :param default: Value when nothing has been persisted. Its type is the type of the parameter.
+        :param minimum: Lowest value, or None for no bound.
+        :param maximum: Highest value, or None for no bound.
+        """
+        self.name = name
+        self.type = type(default)
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.value: Value = self._convert(default)
+        self._observers: tuple[callable, ...] = ()
+
+    def set(self, value: Value) -> Value:
+        """
+        Set the value, atomically. It is converted to the type of the parameter and clamped within its bounds.
+
+        :param value: The new value.
+        :return: The value set.
+        """
+        return ParameterStore._update(self, lambda _: value)
+
+    def increment(self, step: Union[Value, 'Parameter']) -> Value:
+        """
+        Add a step to the value, atomically.
+
+        :param step: The step, or a parameter whose value is the step.
+        :return: The value set.
+        """
+        return ParameterStore._update(self, lambda value: value + _value_of(step))
+
+    def decrement(self, step: Union[Value, 'Parameter']) -> Value:
+        """
+        Subtract a step from the value, atomically.
+
+        :param step: The step, or a parameter whose value is the step.
+        :return: The value set.
+        """
+        return ParameterStore._update(self, lambda value: value - _value_of(step))
+
+    def scale(self, factor: Union[float, 'Parameter']) -> Value:
+        """
+        Multiply the value by a factor, atomically.
+
+        :param factor: The factor, or a parameter whose value is the factor.
+        :return: The value set.
+        """
+        return ParameterStore._update(self, lambda value: value * _value_of(factor))
+
+    def reset(self) -> Value:
+        """
+        Set the default value back.
+
+        :return: The value set.
+        """
+        return self.set(self.default)
+
+    def bind_increment(self, key: str, step: Union[Value, 'Parameter']) -> Binding:
+        """
+        Increment the value each time a key is pressed.
+
+        :param key: The key, e.g. 'p'.
+        :param step: The step, or a parameter whose value is the step when the key is pressed.
+        :return: The binding, which is stopped when 'esc' is pressed.
+        """
+        return KeyboardListener.listen_for_key_then(key, self.increment, step)
+
+    def bind_decrement(self, key: str, step: Union[Value, 'Parameter']) -> Binding:
+        """
+        Decrement the value each time a key is pressed.
+
+        :param key: The key, e.g. 'm'.
+        :param step: The step, or a parameter whose value is the step when the key is pressed.
+        :return: The binding, which is stopped when 'esc' is pressed.
+        """
+        return KeyboardListener.listen_for_key_then(key, self.decrement, step)
+
+    def bind_scale(self, key: str, factor: Union[float, 'Parameter']) -> Binding:
+        """
+        Multiply the value by a factor each time a key is pressed.
+
+        :param key: The key, e.g. 'd'.
+        :param factor: The factor, or a parameter whose value is the factor when the key is pressed.
+        :return: The binding, which is stopped when 'esc' is pressed.
+        """
+        return KeyboardListener.listen_for_key_then(key, self.scale, factor)
+
+    def on_change(self, callback: callable):
+        """
+        Call a function with the parameter each time its value changes, in the thread changing it.
+
+        :param callback: Function called with the parameter.
+        """
+        self._observers = self._observers + (callback,)
+
+    def _convert(self, value: Value) -> Value:
+        """Convert a value to the type of the parameter and clamp it within the bounds."""
+        if self.type is int and isinstance(value, float):
+            value = round(value)
+        value = self.type(value)
+        if self.minimum is not None and value < self.minimum:
+            logger.warning("Parameter '%s' cannot be lower than %s: %s is clamped.", self.name, self.minimum, value)
+            value = self.type(self.minimum)
+        if self.maximum is not None and value > self.maximum:
+            logger.warning("Parameter '%s' cannot be higher than %s: %s is clamped.", self.name, self.maximum, value)
+            value = self.type(self.maximum)
+        return value
+
+    def __repr__(self):
+        return f"Parameter({self.name!r}, {self.value!r})"
+
+
+def _value_of(operand: Union[Value, Parameter]) -> Value:
+    """Get the value of an operand: a parameter or a value."""
+    return operand.value if isinstance(operand, Parameter) else operand
+
+
+class ParameterStore:
+    """
+    Registry of the parameters of the process, and their persistence.
+
+    Class attributes:
+    - __parameters : dict[str, Parameter]
+    - __values : immutable snapshot of the value of every parameter, replaced at each update
+    - __persisted : values read from the parameters file, including those of parameters not defined yet
+    """
+    FLUSH_DELAY = 1.0  # seconds: changes made within this delay are written together
+
+    __lock = Lock()
+    __write_lock = Lock()  # one writer of the file at a time: the background thread or a flush
+    __parameters: dict[str, Parameter] = {}
+    __values: Mapping[str, Value] = MappingProxyType({})
+    __persisted: Optional[dict[str, Value]] = None
+    __path: Optional[str] = None
+    __dirty = Event()
+    __writer: Optional[Thread] = None
+    __writes = 0
+
+    @classmethod
+    def define(cls, name: str, default: Value, minimum: Optional[Value] = None,
+               maximum: Optional[Value] = None) -> Parameter:
+        """
+        Define a parameter, with its persisted value if there is one. Defining it again returns the same parameter,
+        so a reloaded script keeps the tuned value.
+
+        :param name: Name of the parameter, e.g. 'power_and_click.long_wait'.
+        :param default: Value when nothing has been persisted. Its type is the type of the parameter.
+        :param minimum: Lowest value, or None for no bound.
+        :param maximum: Highest value, or None for no bound.
+        :return: The parameter.
+        """
+        with cls.__lock:
+            parameter = cls.__parameters.get(name)
+            if parameter is not None:
+                return parameter
+
+            parameter = Parameter(name, default, minimum, maximum)
+            persisted = cls.__load().get(name)
+            if persisted is not None:
+                try:
+                    parameter.value = parameter._convert(persisted)
+                except (TypeError, ValueError):
+                    logger.warning("Ignoring the persisted value of parameter '%s': %r.", name, persisted)
+            cls.__parameters[name] = parameter
+            cls.__values = MappingProxyType({**cls.__values, name: parameter.value})
+        logger.info("Parameter '%s' defined with value %s.", name, parameter.value)
+        return parameter
+
+    @classmethod
+    def get(cls, name: str) -> Optional[Parameter]:
+        """Get a parameter by name, or None if it isn't defined."""
+        return cls.__parameters.get(name)
+
+    @classmethod
+    def parameters(cls) -> list[Parameter]:
+        """Get every defined parameter."""
+        with cls.__lock:
+            return list(cls.__parameters.values())
+
+    @classmethod
+    def values(cls) -> Mapping[str, Value]:
+        """Get an immutable snapshot of the value of every parameter, without taking a lock."""
+        return cls.__values
+
+    @classmethod
+    def use(cls, path: Optional[str]):
+        """
+        Use another parameters file. Parameters defined afterwards load their value from it.
+
+        :param path: Path of the file, '' to keep the values in memory only, or None for PARAMETERS_FILE.
+        """
+        cls.flush()
+        with cls.__lock:
+            cls.__path = path
+            cls.__persisted = None
+
+    @classmethod
+    def flush(cls):
+        """Write the changed values to the parameters file now, if there are any."""
+        with cls.__write_lock:
+            if not cls.__dirty.is_set():
+                return
+            with cls.__lock:
+                cls.__dirty.clear()
+                persisted = dict(cls.__load())
+                path = cls.__file()
+            if not path:
+                return
+            try:
+                cls.__write(path, persisted)
+            except OSError:
+                logger.exception("Cannot write the parameters to %s.", path)
+
+    @classmethod
+    def writes(cls) -> int:
+        """Get the number of times the parameters file has been written."""
+        return cls.__writes
+
+    @classmethod
+    def _update(cls, parameter: Parameter, update: callable) -> Value:
+        """Replace the value of a parameter with the result of update(value), atomically."""
+        with cls.__lock:
+            previous = parameter.value
+            value = parameter._convert(update(previous))
+            if value == previous:
+                return value
+            parameter.value = value
+            cls.__values = MappingProxyType({**cls.__values, parameter.name: value})
+            cls.__load()[parameter.name] = value
+            cls.__dirty.set()
+            if cls.__writer is None and cls.__file():
+                cls.__writer = Thread(target=cls.__write_changes, name="guibot-parameters", daemon=True)
+                cls.__writer.start()
+
+        logger.info("Parameter '%s' changed from %s to %s.", parameter.name, previous, value)
+        for observer in parameter._observers:
+            try:
+                observer(parameter)
+            except Exception:
+                logger.exception("Observer of parameter '%s' raised an exception.", parameter.name)
+        return value
+
+    @classmethod
+    def __file(cls) -> str:
+        """Get the path of the parameters file, or '' if the values are kept in memory only."""
+        path = get_parameters_file() if cls.__path is None else cls.__path
+        return os.path.expanduser(path) if path else ''
+
+    @classmethod
+    def __load(cls) -> dict[str, Value]:
+        """Get the persisted values, reading the parameters file the first time. Call it with the lock held."""
+        if cls.__persisted is None:
+            cls.__persisted = {}
+            path = cls.__file()
+            if path and os.path.exists(path):
+                import json
+                try:
+                    with open(path, encoding='utf-8') as file:
+                        cls.__persisted = dict(json.load(file))
+                except (OSError, ValueError, TypeError):
+                    logger.exception("Cannot read the parameters from %s: starting from the defaults.", path)
+        return cls.__persisted
+
+    @classmethod
+    def __write(cls, path: str, persisted: dict[str, Value]):
+        """Write the values to a file, atomically."""
+        import json
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(persisted, file, indent=2, sort_keys=True)
+        os.replace(temporary, path)
+        cls.__writes += 1
+        logger.debug("Wrote %d parameters to %s.", len(persisted), path)
+
+    @classmethod
+    def __write_changes(cls):
+        """Write the changes in batches: wait for a change, let more changes come for FLUSH_DELAY, then write."""
+        while True:
+            cls.__dirty.wait()
+            sleep(cls.FLUSH_DELAY)
+            cls.flush()
+
+
+atexit.register(ParameterStore.flush)
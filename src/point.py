@@ -1,12 +1,27 @@
+from math import hypot
+
+
 class Point:
-    """ Represents a point in 2D space with x and y coordinates."""
+    """ Represents an immutable point in 2D space with x and y coordinates.
+
+    Points are hashable and compare by value, so they can be used as dictionary keys and shared freely.
+    They support + and - with another point, * and / by a number, and unpacking: x, y = point.
+    """
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: float, y: float):
         """ Initializes a Point with x and y coordinates.
         :param x: The x-coordinate of the point.
         :param y: The y-coordinate of the point.
         """
-        self.x = x
-        self.y = y
+        object.__setattr__(self, 'x', x)
+        object.__setattr__(self, 'y', y)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Point is immutable: can't set '{name}'.")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Point is immutable: can't delete '{name}'.")
 
     @property
     def tuple(self):
@@ -28,5 +43,51 @@ class Point:
         """ Returns the y-coordinate as an integer. """
         return int(self.y)
 
+    def distance(self, other: 'Point') -> float:
+        """ Returns the Euclidean distance to another point.
+        :param other: The other point.
+        """
+        return hypot(self.x - other.x, self.y - other.y)
+
+    def __add__(self, other: 'Point') -> 'Point':
+        if not isinstance(other, Point):
+            return NotImplemented
+        return Point(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other: 'Point') -> 'Point':
+        if not isinstance(other, Point):
+            return NotImplemented
+        return Point(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, factor: float) -> 'Point':
+        if not isinstance(factor, (int, float)):
+            return NotImplemented
+        return Point(self.x * factor, self.y * factor)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, divisor: float) -> 'Point':
+        if not isinstance(divisor, (int, float)):
+            return NotImplemented
+        return Point(self.x / divisor, self.y / divisor)
+
+    def __neg__(self) -> 'Point':
+        return Point(-self.x, -self.y)
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __eq__(self, other):
+        if not isinstance(other, Point):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __reduce__(self):
+        return Point, (self.x, self.y)
+
     def __repr__(self):
         return f"Point({{x: {self.x}, y: {self.y}}})"
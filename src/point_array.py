@@ -0,0 +1,134 @@
+from typing import Iterable, Union
+import numpy as np
+from src.point import Point
+
+
+class PointArray:
+    """
+    An immutable sequence of points, stored as a single (n, 2) float array.
+
+    Meant for large coordinate libraries: thousands of points take a few kilobytes instead of one object each,
+    and transforms (translate, scale, DPI conversion) apply to all of them in one vectorized call, returning a
+    new PointArray. Indexing returns a Point, slicing a PointArray.
+    """
+    __slots__ = ('_xy',)
+
+    def __init__(self, points: Union[Iterable[Union[Point, tuple[float, float]]], np.ndarray] = ()):
+        """
+        :param points: Points, (x, y) pairs, or an array of shape (n, 2).
+        """
+        if isinstance(points, PointArray):
+            xy = points._xy
+        elif isinstance(points, np.ndarray):
+            xy = np.array(points, dtype=float).reshape(-1, 2)
+        else:
+            xy = np.array([tuple(point) for point in points], dtype=float).reshape(-1, 2)
+        xy.flags.writeable = False
+        object.__setattr__(self, '_xy', xy)
+
+    @classmethod
+    def from_xy(cls, xs: Iterable[float], ys: Iterable[float]) -> 'PointArray':
+        """
+        Create a PointArray from separate sequences of coordinates.
+
+        :param xs: The x-coordinates.
+        :param ys: The y-coordinates.
+        """
+        return cls(np.column_stack((np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"PointArray is immutable: can't set '{name}'.")
+
+    @property
+    def array(self) -> np.ndarray:
+        """ The read-only (n, 2) array of coordinates. """
+        return self._xy
+
+    @property
+    def tuples_int(self) -> tuple[tuple[int, int], ...]:
+        """ The coordinates as a tuple of integer (x, y) pairs, truncated like Point.tuple_int. """
+        return tuple(map(tuple, self._xy.astype(np.int64).tolist()))
+
+    def translate(self, dx: float, dy: float) -> 'PointArray':
+        """
+        Move every point by the same offset.
+
+        :param dx: Horizontal offset in pixels.
+        :param dy: Vertical offset in pixels.
+        """
+        return PointArray(self._xy + (dx, dy))
+
+    def scale(self, factor: float, origin: Point = Point(0, 0)) -> 'PointArray':
+        """
+        Scale the distances of every point from an origin.
+
+        :param factor: Scale factor, e.g. 0.5 to halve the distances.
+        :param origin: Point that stays in place.
+        """
+        origin = np.array(origin.tuple, dtype=float)
+        return PointArray((self._xy - origin) * factor + origin)
+
+    def convert_dpi(self, from_dpi: float, to_dpi: float) -> 'PointArray':
+        """
+        Convert coordinates recorded on a screen with a DPI to a screen with another one.
+
+        :param from_dpi: DPI of the screen the coordinates were recorded on, e.g. 96.
+        :param to_dpi: DPI of the target screen, e.g. 144.
+        """
+        return PointArray(self._xy * (to_dpi / from_dpi))
+
+    def relative_to(self, origin: Point) -> 'PointArray':
+        """
+        Get the offsets of every point from an origin.
+
+        :param origin: The origin.
+        """
+        return self.translate(-origin.x, -origin.y)
+
+    def distances(self) -> np.ndarray:
+        """ Get the distances between consecutive points, as an array of n - 1 values. """
+        return np.hypot(*np.diff(self._xy, axis=0).T)
+
+    def __add__(self, other: Point) -> 'PointArray':
+        if not isinstance(other, Point):
+            return NotImplemented
+        return self.translate(other.x, other.y)
+
+    def __sub__(self, other: Point) -> 'PointArray':
+        if not isinstance(other, Point):
+            return NotImplemented
+        return self.translate(-other.x, -other.y)
+
+    def __mul__(self, factor: float) -> 'PointArray':
+        if not isinstance(factor, (int, float)):
+            return NotImplemented
+        return PointArray(self._xy * factor)
+
+    __rmul__ = __mul__
+
+    def __len__(self) -> int:
+        return len(self._xy)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Point, 'PointArray']:
+        if isinstance(index, slice):
+            return PointArray(self._xy[index])
+        x, y = self._xy[index].tolist()
+        return Point(x, y)
+
+    def __iter__(self):
+        return (Point(x, y) for x, y in self._xy.tolist())
+
+    def __eq__(self, other):
+        if not isinstance(other, PointArray):
+            return NotImplemented
+        return np.array_equal(self._xy, other._xy)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return PointArray, (self._xy,)
+
+    def __repr__(self):
+        if len(self) > 6:
+            return f"PointArray({len(self)} points: {self[0]}, {self[1]}, ..., {self[-1]})"
+        return f"PointArray({list(self)})"
@@ -0,0 +1,256 @@
+"""
+Recording of mouse and keyboard events into compact binary logs.
+
+A log is a 16-byte header followed by fixed-size records, written as they arrive:
+
+- header: magic b'GBRL', format version, record size, wall-clock start time in nanoseconds since the epoch.
+- record: time since the start in nanoseconds (perf_counter_ns), event kind, code, and two signed 32-bit
+  arguments a and b. 18 bytes per event, so an hour of continuous mouse movement at 100 Hz takes about 6.5 MB.
+
+- MOVE: a, b = x, y.
+- BUTTON_PRESS / BUTTON_RELEASE: code = index of the button in BUTTON_NAMES, a, b = x, y.
+- SCROLL: a, b = dx, dy, at the position of the move recorded just before.
+- KEY_PRESS / KEY_RELEASE: code = KeyEncoding, a = character code point, index in KEY_NAMES or virtual key code.
+"""
+import struct
+from enum import Enum, IntEnum
+from pathlib import Path
+from threading import Lock
+from time import perf_counter_ns, time_ns
+from typing import BinaryIO, Iterator, Optional, Union
+from src import backend
+from src.backend import KEY_NAMES
+from src.listener_hub import ESC, normalize_key
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b'GBRL'
+VERSION = 1
+HEADER = struct.Struct('<4sHHq')
+RECORD = struct.Struct('<QBBii')
+
+BUTTON_NAMES = ('unknown', 'left', 'middle', 'right')
+KEYS = KEY_NAMES.split()
+
+Event = tuple[int, int, int, int, int]  # (time in ns, kind, code, a, b)
+
+
+class EventKind(IntEnum):
+    """ Kinds of the recorded events. """
+    MOVE = 0
+    BUTTON_PRESS = 1
+    BUTTON_RELEASE = 2
+    SCROLL = 3
+    KEY_PRESS = 4
+    KEY_RELEASE = 5
+
+
+class KeyEncoding(IntEnum):
+    """ How the key of a key event is identified. """
+    CHAR = 0     # printable key: a is the code point of its character
+    SPECIAL = 1  # special key: a is the index of its name in KEY_NAMES
+    VK = 2       # key without character: a is its virtual key code
+
+
+class Recorder:
+    """
+    Records the mouse and keyboard events of the user into a binary log, streamed to disk.
+
+    Events are packed into a preallocated buffer, written to the file every BUFFER_EVENTS events and on stop,
+    so memory use doesn't grow with the length of the session. Mouse moves closer than move_interval to the
+    previous one are coalesced: only the last of them is kept, and written before the next event.
+    The 'esc' key is not recorded: it stops the recording.
+    """
+    BUFFER_EVENTS = 4096
+
+    def __init__(self, path: Union[str, Path], move_interval: float = 0.01):
+        """
+        :param path: Path of the log file. It is overwritten.
+        :param move_interval: Minimum time between two recorded mouse moves, in seconds. 0 keeps every move.
+        """
+        self.path = Path(path)
+        self.move_interval_ns = int(move_interval * 1e9)
+        self.count = 0
+        self.coalesced = 0
+        self.__lock = Lock()
+        self.__file: Optional[BinaryIO] = None
+        self.__buffer = bytearray(RECORD.size * self.BUFFER_EVENTS)
+        self.__offset = 0
+        self.__start = 0
+        self.__last_move = -self.move_interval_ns
+        self.__pending_move: Optional[tuple[int, int, int]] = None
+        self.__listeners = []
+
+    @property
+    def running(self) -> bool:
+        """True while the recorder is listening."""
+        return self.__file is not None
+
+    @property
+    def size(self) -> int:
+        """Size of the log in bytes, once flushed."""
+        return HEADER.size + self.count * RECORD.size
+
+    def start(self) -> 'Recorder':
+        """
+        Open the log and start listening to the mouse and the keyboard.
+
+        :return: The recorder.
+        """
+        self.__file = self.path.open('wb')
+        self.__start = perf_counter_ns()
+        self.__file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, time_ns()))
+
+        source = backend.get_backend()
+        self.__listeners = [source.mouse_listener(on_click=self._on_click, on_move=self._on_move,
+                                                  on_scroll=self._on_scroll),
+                            source.keyboard_listener(on_press=self._on_press, on_release=self._on_release)]
+        for listener in self.__listeners:
+            listener.start()
+        logger.info("Recording input events to %s.", self.path)
+        return self
+
+    def stop(self):
+        """Stop listening, write the buffered events and close the log."""
+        for listener in self.__listeners:
+            listener.stop()
+        with self.__lock:
+            if self.__file is None:
+                return
+            self.__flush_move()
+            self.__flush()
+            self.__file.close()
+            self.__file = None
+        logger.info("Recorded %s input events to %s (%.1f kB, %s moves coalesced).",
+                    self.count, self.path, self.size / 1000, self.coalesced)
+
+    def __enter__(self) -> 'Recorder':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _on_move(self, x: float, y: float):
+        with self.__lock:
+            t = perf_counter_ns() - self.__start
+            if t - self.__last_move < self.move_interval_ns:
+                if self.__pending_move is not None:
+                    self.coalesced += 1
+                self.__pending_move = (t, int(x), int(y))
+                return
+            self.__pending_move = None
+            self.__last_move = t
+            self.__append(t, EventKind.MOVE, 0, int(x), int(y))
+
+    def _on_click(self, x: float, y: float, button: Enum, pressed: bool):
+        kind = EventKind.BUTTON_PRESS if pressed else EventKind.BUTTON_RELEASE
+        code = BUTTON_NAMES.index(button.name) if button.name in BUTTON_NAMES else 0
+        self.__record(kind, code, int(x), int(y))
+
+    def _on_scroll(self, x: float, y: float, dx: int, dy: int):
+        with self.__lock:
+            t = perf_counter_ns() - self.__start
+            self.__flush_move()
+            self.__append(t, EventKind.MOVE, 0, int(x), int(y))
+            self.__append(t, EventKind.SCROLL, 0, int(dx), int(dy))
+
+    def _on_press(self, key):
+        if normalize_key(key) == ESC:
+            return
+        encoded = encode_key(key)
+        if encoded is not None:
+            self.__record(EventKind.KEY_PRESS, *encoded)
+
+    def _on_release(self, key):
+        if normalize_key(key) == ESC:
+            return
+        encoded = encode_key(key)
+        if encoded is not None:
+            self.__record(EventKind.KEY_RELEASE, *encoded)
+
+    def __record(self, kind: EventKind, code: int, a: int, b: int):
+        """Append an event timestamped now, after the pending move."""
+        with self.__lock:
+            t = perf_counter_ns() - self.__start
+            self.__flush_move()
+            self.__append(t, kind, code, a, b)
+
+    def __flush_move(self):
+        """Append the last coalesced move, if any. Called with the lock held."""
+        if self.__pending_move is not None:
+            t, x, y = self.__pending_move
+            self.__pending_move = None
+            self.__last_move = t
+            self.__append(t, EventKind.MOVE, 0, x, y)
+
+    def __append(self, t: int, kind: int, code: int, a: int, b: int):
+        """Pack an event into the buffer, writing the buffer to the file when it is full. Called with the lock held."""
+        if self.__file is None:
+            return
+        RECORD.pack_into(self.__buffer, self.__offset, t, kind, code, a, b)
+        self.__offset += RECORD.size
+        self.count += 1
+        if self.__offset == len(self.__buffer):
+            self.__flush()
+
+    def __flush(self):
+        """Write the buffered events to the file. Called with the lock held."""
+        self.__file.write(memoryview(self.__buffer)[:self.__offset])
+        self.__offset = 0
+
+    def __repr__(self):
+        return f"Recorder(path={str(self.path)!r}, events={self.count}, running={self.running})"
+
+
+def encode_key(key) -> Optional[tuple[int, int, int]]:
+    """
+    Encode a key received by a listener.
+
+    :param key: A Key or a KeyCode of the input backend, or a single character string.
+    :return: The (code, a, b) fields of the record, or None if the key can't be encoded.
+    """
+    if isinstance(key, Enum):
+        return (KeyEncoding.SPECIAL, KEYS.index(key.name), 0) if key.name in KEYS else None
+    char = key if isinstance(key, str) else getattr(key, 'char', None)
+    if char is not None:
+        return KeyEncoding.CHAR, ord(char), 0
+    vk = getattr(key, 'vk', None)
+    return (KeyEncoding.VK, vk, 0) if vk is not None else None
+
+
+def decode_key(code: int, a: int):
+    """
+    Decode the key of a key event for the active input backend.
+
+    :param code: KeyEncoding of the record.
+    :param a: First argument of the record.
+    :return: A Key or a KeyCode of the active backend.
+    """
+    if code == KeyEncoding.SPECIAL:
+        return backend.Key[KEYS[a]]
+    if code == KeyEncoding.VK:
+        return backend.KeyCode.from_vk(a)
+    return backend.KeyCode.from_char(chr(a))
+
+
+def read_events(path: Union[str, Path], chunk_events: int = 4096) -> Iterator[Event]:
+    """
+    Read the events of a log, a chunk at a time.
+
+    :param path: Path of the log file.
+    :param chunk_events: Number of events read from the file at once.
+    :return: Iterator over the (time in ns, kind, code, a, b) events, in order.
+    :raises ValueError: If the file is not a log of a supported version.
+    """
+    with Path(path).open('rb') as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{path} is not an input event log: header too short.")
+        magic, version, record_size, _ = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{path} is not an input event log of version {VERSION}.")
+
+        while chunk := file.read(RECORD.size * chunk_events):
+            complete = len(chunk) - len(chunk) % RECORD.size  # a log cut short ends with a partial record
+            yield from RECORD.iter_unpack(memoryview(chunk)[:complete])
@@ -0,0 +1,252 @@
+import heapq
+from itertools import count
+from threading import Condition, Event, Lock
+from time import time
+from typing import Optional
+from src.cancellation import ROOT, CancellationToken
+from src.enums import AutomationMode, RunState
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Admission:
+    """
+    Counting semaphore that enforces the parallel limit, admitting waiters by priority.
+
+    Waiters with a higher priority are admitted first; waiters with the same priority are admitted in arrival order.
+    """
+    def __init__(self, limit: int):
+        """
+        :param limit: Maximum number of slots that can be held at the same time.
+        """
+        self._condition = Condition(Lock())
+        self._limit = limit
+        self._held = 0
+        self._waiters: list[tuple[int, int]] = []
+        self._sequence = count()
+
+    @property
+    def limit(self) -> int:
+        """Maximum number of slots that can be held at the same time."""
+        return self._limit
+
+    @limit.setter
+    def limit(self, value: int):
+        with self._condition:
+            self._limit = value
+            self._condition.notify_all()
+
+    @property
+    def held(self) -> int:
+        """Number of slots currently held."""
+        return self._held
+
+    def acquire(self, priority: int = 0, timeout: Optional[float] = None) -> bool:
+        """
+        Acquire a slot.
+
+        :param priority: Waiters with a higher priority are admitted first.
+        :param timeout: Maximum time to wait in seconds. 0 doesn't wait, None waits forever.
+        :return: True if a slot has been acquired, False if the timeout expired.
+        """
+        with self._condition:
+            entry = (-priority, next(self._sequence))
+            heapq.heappush(self._waiters, entry)
+            try:
+                admitted = self._condition.wait_for(
+                    lambda: self._held < self._limit and self._waiters[0] == entry, timeout)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if admitted:
+                self._held += 1
+            self._condition.notify_all()
+            return admitted
+
+    def release(self):
+        """Release a slot."""
+        with self._condition:
+            self._held -= 1
+            self._condition.notify_all()
+
+
+class RunHandle:
+    """
+    Handle to a single automation run, as returned by ``Automation.loop``, ``keystroke``, ``acquire_clicks``,
+    ``serve`` and the other modes, and by ``AsyncAutomation.loop`` and ``keystroke``.
+    """
+    def __init__(self, run_id: int, name: str, mode: AutomationMode, priority: int = 0):
+        """
+        :param run_id: Unique identifier of the run.
+        :param name: Name of the automation.
+        :param mode: Mode the automation runs in.
+        :param priority: Admission priority of the run.
+        """
+        self.id = run_id
+        self.name = name
+        self.mode = mode
+        self.priority = priority
+        self.state = RunState.PENDING
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.trigger = None  # set for keystroke runs
+        self.stats = None  # set for scheduled loop and replay runs
+        self.task = None  # set for async runs
+        self.recorder = None  # set for record runs
+        self.tuner = None  # set for tune runs
+        self.server = None  # set for control runs
+        self.token = CancellationToken(parent=ROOT)
+        self._stop_callback: callable = lambda: None
+        self._finished = Event()
+
+    @property
+    def running(self) -> bool:
+        """True until the run has finished."""
+        return not self._finished.is_set()
+
+    def on_stop(self, callback: callable):
+        """
+        Set the function that stops the run. It is called once, by the first ``stop()``.
+
+        :param callback: Function to call to stop the run.
+        """
+        self._stop_callback = callback
+
+    def stop(self):
+        """
+        Ask the run to stop and cancel its token, so its waits return immediately.
+        Use ``join()`` to wait for it to finish.
+        """
+        with RunRegistry._lock:
+            if self.state not in (RunState.PENDING, RunState.RUNNING):
+                return
+            self.state = RunState.STOPPING
+        logger.info("Stopping run %s of '%s'.", self.id, self.name)
+        self.token.cancel()
+        self._stop_callback()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the run has finished.
+
+        :param timeout: Maximum time to wait in seconds. None waits forever.
+        :return: True if the run has finished, False if the timeout expired.
+        """
+        return self._finished.wait(timeout)
+
+    def __repr__(self):
+        return f"RunHandle(id={self.id}, name={self.name!r}, mode={self.mode.value}, state={self.state.value})"
+
+
+class RunRegistry:
+    """
+    Thread-safe registry of the active automation runs.
+
+    Every run holds a slot of the admission semaphore from ``open`` to ``close``, so the parallel limit is
+    actually enforced. The counters are derived from the registry under its lock, so they can't drift when
+    runs end concurrently or are interrupted.
+
+    Private attributes:
+    -------------------
+    - __runs : dict[int, RunHandle]
+        Active runs indexed by id, in start order.
+
+    - __admission : Admission
+        Semaphore holding one slot per active run (default limit: 10).
+    """
+    _lock = Lock()
+    __ids = count(1)
+    __runs: dict[int, RunHandle] = {}
+    __admission = Admission(10)
+
+    @classmethod
+    def get_parallel_limit(cls) -> int:
+        """Get the maximum number of runs allowed at the same time."""
+        return cls.__admission.limit
+
+    @classmethod
+    def set_parallel_limit(cls, value: int):
+        """Set the maximum number of runs allowed at the same time."""
+        if value < 1:
+            raise ValueError("Parallel limit must be at least 1.")
+        cls.__admission.limit = value
+
+    @classmethod
+    def open(cls, name: str, mode: AutomationMode, priority: int = 0, timeout: Optional[float] = 0) -> RunHandle:
+        """
+        Admit a new run under the parallel limit and register it.
+
+        :param name: Name of the automation.
+        :param mode: Mode the automation runs in.
+        :param priority: Runs with a higher priority are admitted first when waiting for a slot.
+        :param timeout: Maximum time to wait for a slot in seconds. 0 doesn't wait, None waits forever.
+        :return: The handle of the run, in the RUNNING state.
+        :raises RuntimeError: If no slot is available before the timeout.
+        """
+        handle = RunHandle(next(cls.__ids), name, mode, priority)
+
+        if not cls.__admission.acquire(priority, timeout):
+            message = (f"Cannot start '{name}': the parallel limit of {cls.get_parallel_limit()} "
+                       "automations has been reached.")
+            logger.error(message)
+            raise RuntimeError(message)
+
+        with cls._lock:
+            handle.state = RunState.RUNNING
+            handle.started_at = time()
+            cls.__runs[handle.id] = handle
+        logger.debug("Opened %s. Active runs: %s.", handle, cls.count())
+        return handle
+
+    @classmethod
+    def close(cls, handle: RunHandle):
+        """
+        Unregister a finished run and release its slot. Closing a run more than once has no effect.
+
+        :param handle: The handle of the run.
+        """
+        with cls._lock:
+            if cls.__runs.pop(handle.id, None) is None:
+                return
+            handle.state = RunState.FINISHED
+            handle.finished_at = time()
+        cls.__admission.release()
+        handle._finished.set()
+        logger.debug("Closed %s. Active runs: %s.", handle, cls.count())
+
+    @classmethod
+    def runs(cls) -> list[RunHandle]:
+        """Get the active runs, in start order."""
+        with cls._lock:
+            return list(cls.__runs.values())
+
+    @classmethod
+    def get(cls, run_id: int) -> Optional[RunHandle]:
+        """Get an active run by id."""
+        with cls._lock:
+            return cls.__runs.get(run_id)
+
+    @classmethod
+    def count(cls) -> int:
+        """Get the number of active runs."""
+        with cls._lock:
+            return len(cls.__runs)
+
+    @classmethod
+    def active_mode(cls) -> AutomationMode:
+        """
+        Get the mode of the active runs: AutomationMode.LOOP if a loop is running, otherwise the mode of the most
+        recently started run, or AutomationMode.NONE if nothing is running.
+        """
+        with cls._lock:
+            modes = [handle.mode for handle in cls.__runs.values()]
+        if AutomationMode.LOOP in modes:
+            return AutomationMode.LOOP
+        return modes[-1] if modes else AutomationMode.NONE
+
+    @classmethod
+    def stop_all(cls):
+        """Ask every active run to stop."""
+        for handle in cls.runs():
+            handle.stop()
@@ -0,0 +1,299 @@
+"""
+Hot reload of automation scripts.
+
+A watched script is polled for modifications. When it changes, its new source is parsed and compared, statement by
+statement, with the version the running script was started from. The module body is never run again, neither when
+the watch starts nor on reload, so its side effects (prints, `ParameterStore.define`, listeners, open files) happen
+once, when the script starts. Only the top-level statements that changed are applied to the live namespace:
+
+- functions are updated in place: the running function objects get the new code, so the triggers, bindings
+  and loops holding them run the new version from their next call, without touching the listeners. Only the
+  ``def`` statement is run (its decorators and default values), in a copy of the live namespace. A function is
+  also defined again when its defaults or decorators read a changed assignment;
+- assignments to a name (coordinates, settings) are applied if their statement changed: only the expression of
+  the changed assignment is evaluated. Values tuned while running (e.g. ``long_wait`` in power_and_click) are
+  kept as long as their statement isn't edited;
+- any other top-level statement (imports, calls, classes, ``if`` blocks) is not run: when one changes, a warning
+  asks for a restart.
+
+Changes to ``main()`` itself, such as new key bindings, are only applied by a restart.
+"""
+import ast
+import builtins
+from pathlib import Path
+from threading import Event, Lock, Thread
+from time import perf_counter
+from types import FunctionType
+from typing import Optional, Union
+from src.listener_hub import ListenerHub
+from src.logger import get_logger
+from src.registry import RunRegistry
+
+logger = get_logger(__name__)
+
+RELOAD_NAME = '__guibot_reload__'
+
+Definition = Union[ast.FunctionDef, ast.AsyncFunctionDef]
+Assignment = Union[ast.Assign, ast.AnnAssign]
+
+
+class _Source:
+    """ Top-level statements of a version of a script, parsed without running it. """
+    def __init__(self, path: Path):
+        """
+        :param path: Path of the script.
+        :raises SyntaxError: If the script can't be parsed.
+        """
+        self.path = path
+        self.functions: dict[str, Definition] = {}
+        self.assignments: dict[str, Assignment] = {}
+        self.others: list[str] = []
+        for statement in ast.parse(path.read_bytes(), str(path)).body:
+            if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.functions[statement.name] = statement
+            elif (name := _assigned_name(statement)) is not None:
+                self.assignments[name] = statement
+            else:
+                self.others.append(ast.dump(statement))
+
+
+def _assigned_name(statement: ast.stmt) -> Optional[str]:
+    """Get the name assigned by a statement like ``x = ...`` or ``x: int = ...``, or None for other statements."""
+    if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+        target = statement.targets[0]
+    elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+        target = statement.target
+    else:
+        return None
+    return target.id if isinstance(target, ast.Name) else None
+
+
+def _changed(new: Optional[ast.AST], old: Optional[ast.AST]) -> bool:
+    """Check if a statement is new or differs from its previous version, line numbers aside."""
+    return old is None or ast.dump(new) != ast.dump(old)
+
+
+def _evaluated_names(statement: Definition) -> set[str]:
+    """Get the names read by the decorators and default values of a function, evaluated when it is defined."""
+    expressions = [*statement.decorator_list, *statement.args.defaults,
+                   *(default for default in statement.args.kw_defaults if default is not None)]
+    return {node.id for expression in expressions for node in ast.walk(expression) if isinstance(node, ast.Name)}
+
+
+class _Script:
+    """ A watched script: its live namespace, and the statements of the version it runs. """
+    def __init__(self, path: Path, namespace: dict):
+        self.path = path
+        self.namespace = namespace
+        self.mtime = path.stat().st_mtime_ns
+        self.source = _Source(path)
+
+
+def _define(statement: Definition, path: Path, live: dict) -> FunctionType:
+    """
+    Run a single ``def`` statement in a copy of the live namespace, so that only its decorators and defaults run.
+
+    :param statement: The statement.
+    :param path: Path of the script.
+    :param live: Live globals of the script.
+    :return: The function defined.
+    """
+    namespace = {**live, '__name__': RELOAD_NAME}
+    exec(compile(ast.Module(body=[statement], type_ignores=[]), str(path), 'exec'), namespace)
+    return namespace[statement.name]
+
+
+def _evaluate(statement: Assignment, path: Path, live: dict):
+    """
+    Evaluate the value of a single assignment in a copy of the live namespace.
+
+    :param statement: The statement.
+    :param path: Path of the script.
+    :param live: Live globals of the script.
+    :return: The value assigned.
+    """
+    expression = ast.Expression(body=statement.value)
+    return eval(compile(expression, str(path), 'eval'), {**live, '__name__': RELOAD_NAME})
+
+
+def _is_defined_in(value, path: Path) -> bool:
+    """Check if a value is a function defined in a script."""
+    return isinstance(value, FunctionType) and value.__code__.co_filename == str(path)
+
+
+class Reloader:
+    """
+    Watches automation scripts and applies their modifications while they run.
+
+    Scripts are polled every POLL_INTERVAL seconds with a single stat() call each, on one thread shared by every
+    watched script. A reload that fails (e.g. a syntax error while the file is being edited) is logged and
+    leaves the running version untouched; it is retried at the next modification.
+    """
+    POLL_INTERVAL = 0.05  # seconds
+    __lock = Lock()
+    __scripts: dict[Path, _Script] = {}
+    __thread: Optional[Thread] = None
+    __stopped = Event()
+
+    @classmethod
+    def run(cls, path: Union[str, Path]) -> dict:
+        """
+        Run a script as '__main__' on the current thread, reloading it while it runs.
+
+        :param path: Path of the script.
+        :return: The globals of the script, once it has returned.
+        """
+        path = Path(path).resolve()
+        namespace = {'__name__': '__main__', '__file__': str(path), '__builtins__': builtins}
+        code = compile(path.read_bytes(), str(path), 'exec')
+        cls.watch(path, namespace)
+        try:
+            exec(code, namespace)
+        finally:
+            cls.unwatch(path)
+        return namespace
+
+    @classmethod
+    def watch(cls, path: Union[str, Path], namespace: dict):
+        """
+        Start watching a running script. A script run directly can watch itself with
+        ``Reloader.watch(__file__, globals())`` before calling main().
+
+        :param path: Path of the script.
+        :param namespace: Live globals of the script.
+        """
+        path = Path(path).resolve()
+        script = _Script(path, namespace)
+        with cls.__lock:
+            cls.__scripts[path] = script
+            if cls.__thread is None or not cls.__thread.is_alive():
+                cls.__stopped.clear()
+                cls.__thread = Thread(target=cls.__poll, name="guibot-reloader", daemon=True)
+                cls.__thread.start()
+        logger.info("Watching %s for modifications.", path)
+
+    @classmethod
+    def unwatch(cls, path: Union[str, Path]):
+        """
+        Stop watching a script. The polling thread stops with the last script.
+
+        :param path: Path of the script.
+        """
+        with cls.__lock:
+            cls.__scripts.pop(Path(path).resolve(), None)
+            if not cls.__scripts:
+                cls.__stopped.set()
+
+    @classmethod
+    def watched(cls) -> list[Path]:
+        """Get the paths of the watched scripts."""
+        with cls.__lock:
+            return list(cls.__scripts)
+
+    @classmethod
+    def reload(cls, path: Union[str, Path]) -> bool:
+        """
+        Apply the current source of a watched script to its live namespace.
+
+        :param path: Path of the script.
+        :return: True if the script has been reloaded, False if it isn't watched or its new source failed to run.
+        """
+        start = perf_counter()
+        with cls.__lock:
+            script = cls.__scripts.get(Path(path).resolve())
+        if script is None:
+            return False
+
+        try:
+            script.mtime = script.path.stat().st_mtime_ns
+            new = _Source(script.path)
+            old, live = script.source, script.namespace
+            values = [(name, _evaluate(statement, script.path, live)) for name, statement in new.assignments.items()
+                      if _changed(statement, old.assignments.get(name))]
+            assigned = {name for name, _ in values}
+            # functions whose defaults or decorators read a changed value are defined again with the new value
+            functions = [(name, _define(statement, script.path, {**live, **dict(values)}))
+                         for name, statement in new.functions.items()
+                         if _changed(statement, old.functions.get(name)) or _evaluated_names(statement) & assigned]
+        except Exception:
+            logger.exception("Reload of %s failed. The running version is kept.", script.path)
+            return False
+        if new.others != old.others:
+            logger.warning("Top-level statements of %s other than functions and assignments have changed: they are "
+                           "not run on reload, restart the script to apply them.", script.path.name)
+
+        with cls.__lock:  # applied together, between two polls
+            for name, value in values:
+                live[name] = value
+            for name, function in functions:
+                if _is_defined_in(function, script.path):
+                    cls.__update_function(live, name, function, script.path)
+                else:  # decorated with a wrapper: bound as is, in place of the previous one
+                    current, live[name] = live.get(name), function
+                    if current is not None:
+                        cls._rebind(current, function)
+            script.source = new
+
+        logger.info("Reloaded %s in %.1f ms: %s functions and %s values updated.", script.path.name,
+                    (perf_counter() - start) * 1000, len(functions), len(values))
+        return True
+
+    @classmethod
+    def stop(cls):
+        """Stop watching every script."""
+        with cls.__lock:
+            cls.__scripts.clear()
+            cls.__stopped.set()
+
+    @classmethod
+    def __poll(cls):
+        """Reload the watched scripts whose modification time has changed."""
+        while not cls.__stopped.wait(cls.POLL_INTERVAL):
+            with cls.__lock:
+                scripts = list(cls.__scripts.values())
+            for script in scripts:
+                try:
+                    modified = script.path.stat().st_mtime_ns != script.mtime
+                except OSError:
+                    continue  # being replaced by the editor
+                if modified:
+                    cls.reload(script.path)
+
+    @staticmethod
+    def __update_function(live: dict, name: str, function: FunctionType, path: Path):
+        """
+        Give the live function of that name the code of the new one, or bind a new function if it can't be updated
+        in place (new function, or different closure variables).
+        """
+        current = live.get(name)
+        if _is_defined_in(current, path):
+            try:
+                current.__code__ = function.__code__
+                current.__defaults__ = function.__defaults__
+                current.__kwdefaults__ = function.__kwdefaults__
+                current.__doc__ = function.__doc__
+                return
+            except ValueError:
+                pass
+
+        replacement = FunctionType(function.__code__, live, name, function.__defaults__, function.__closure__)
+        replacement.__kwdefaults__ = function.__kwdefaults__
+        replacement.__doc__ = function.__doc__
+        live[name] = replacement
+        if current is not None:
+            Reloader._rebind(current, replacement)
+
+    @staticmethod
+    def _rebind(old: callable, new: callable):
+        """
+        Replace a callback in the running triggers and bindings.
+
+        :param old: The callback to replace.
+        :param new: The new callback.
+        """
+        for handle in RunRegistry.runs():
+            if handle.trigger is not None and handle.trigger.function is old:
+                handle.trigger.function = new
+        for binding in ListenerHub.bindings():
+            if binding.callback is old:
+                binding.callback = new
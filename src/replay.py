@@ -0,0 +1,111 @@
+from pathlib import Path
+from typing import Optional, Union
+from src import backend, clock
+from src.cancellation import current_token
+from src.keyboard_controller import KeyboardController
+from src.logger import get_logger
+from src.mouse_controller import MouseController, set_position
+from src.recorder import BUTTON_NAMES, EventKind, decode_key, read_events
+from src.scheduler import ScheduleStats
+
+logger = get_logger(__name__)
+
+
+class Replay:
+    """
+    Plays a recorded event log back through the input backend.
+
+    Every event is sent at an absolute deadline of the active clock, ``start + time / speed``, so timing errors
+    don't accumulate over long logs. The error of each event, actual minus scheduled send time, is recorded in
+    ``stats``. Keys and buttons still pressed when the replay ends or is stopped are released.
+    """
+    def __init__(self, path: Union[str, Path], speed: float = 1.0, max_idle: Optional[float] = None):
+        """
+        :param path: Path of the log, as written by a Recorder.
+        :param speed: Speed multiplier, e.g. 2 to replay twice as fast.
+        :param max_idle: If set, gaps between two events longer than this are shortened to it, in seconds of the
+            recording.
+        """
+        if speed <= 0:
+            message = f"Speed must be greater than zero. Speed: {speed}"
+            logger.error(message)
+            raise ValueError(message)
+        self.path = Path(path)
+        self.speed = speed
+        self.max_idle_ns = None if max_idle is None else int(max_idle * 1e9)
+        self.stats = ScheduleStats()
+        self.duration = 0.0
+        self.__keys: set = set()
+        self.__buttons: set = set()
+
+    def run(self) -> ScheduleStats:
+        """
+        Replay the log on the current thread.
+
+        :return: The timing statistics: ``iterations`` is the number of events sent, jitters are in seconds.
+        :raises Cancelled: If the token of the current thread is cancelled during the replay.
+        """
+        logger.info("Replaying %s at %sx speed.", self.path, self.speed)
+        active = clock.get_clock()
+        token = current_token()
+        start = active.now()
+        previous = 0
+        idle = 0  # recording time removed by max_idle, in ns
+        try:
+            for t, kind, code, a, b in read_events(self.path):
+                if self.max_idle_ns is not None and t - previous > self.max_idle_ns:
+                    idle += t - previous - self.max_idle_ns
+                previous = t
+
+                deadline = start + (t - idle) / 1e9 / self.speed
+                active.sleep(deadline - active.now(), token)
+                self.stats.record(active.now() - deadline)
+                self.__send(kind, code, a, b)
+        finally:
+            self.__release()
+            self.duration = active.now() - start
+            logger.info("Replayed %s events of %s in %.3f s: %s", self.stats.iterations, self.path,
+                        self.duration, self.stats)
+        return self.stats
+
+    def __send(self, kind: int, code: int, a: int, b: int):
+        """Send a recorded event, keeping track of the keys and buttons it leaves pressed."""
+        if kind == EventKind.MOVE:
+            MouseController.inject(set_position, (a, b))
+        elif kind == EventKind.SCROLL:
+            MouseController.inject(backend.mouse.scroll, a, b)
+        elif kind in (EventKind.BUTTON_PRESS, EventKind.BUTTON_RELEASE):
+            MouseController.inject(set_position, (a, b))
+            self.__toggle(MouseController, self.__buttons, backend.mouse, backend.Button[BUTTON_NAMES[code]],
+                          kind == EventKind.BUTTON_PRESS)
+        elif kind in (EventKind.KEY_PRESS, EventKind.KEY_RELEASE):
+            self.__toggle(KeyboardController, self.__keys, backend.keyboard, decode_key(code, a),
+                          kind == EventKind.KEY_PRESS)
+        else:
+            logger.warning("Unknown event kind %s in %s, skipped.", kind, self.path)
+
+    @staticmethod
+    def __toggle(controller, pressed: set, device, item, press: bool):
+        """Press or release a key or a button, registering it with its controller for emergency stops."""
+        if press:
+            controller.inject(device.press, item)
+            pressed.add(item)
+            controller._pressed.add(item)
+        else:
+            controller.inject(device.release, item, check=False)
+            pressed.discard(item)
+            controller._pressed.discard(item)
+
+    def __release(self):
+        """Release the keys and buttons pressed by the replay and not released yet."""
+        for controller, pressed, device in ((KeyboardController, self.__keys, backend.keyboard),
+                                            (MouseController, self.__buttons, backend.mouse)):
+            for item in list(pressed):
+                if item in controller._pressed:
+                    logger.info("Releasing %s, still pressed at the end of the replay.", item)
+                    controller.inject(device.release, item, check=False)
+                    controller._pressed.discard(item)
+            pressed.clear()
+
+    def __repr__(self):
+        return f"Replay(path={str(self.path)!r}, speed={self.speed}, events={self.stats.iterations})"
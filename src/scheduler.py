@@ -0,0 +1,138 @@
+from math import ceil, sqrt
+from typing import Optional
+from src import clock
+from src.cancellation import current_token
+from src.enums import OverrunPolicy
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ScheduleStats:
+    """
+    Timing statistics of a scheduled loop.
+
+    Jitter is the difference between the actual and the scheduled start of an iteration, in seconds.
+    Mean and standard deviation are updated incrementally, so recording costs the same after days of running.
+    """
+    def __init__(self):
+        self.iterations = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.max_jitter = 0.0
+        self.__mean = 0.0
+        self.__m2 = 0.0
+
+    @property
+    def mean_jitter(self) -> float:
+        """Mean jitter in seconds."""
+        return self.__mean
+
+    @property
+    def stdev_jitter(self) -> float:
+        """Standard deviation of the jitter in seconds."""
+        return sqrt(self.__m2 / self.iterations) if self.iterations else 0.0
+
+    def record(self, jitter: float):
+        """
+        Record the jitter of an iteration.
+
+        :param jitter: Actual minus scheduled start time of the iteration, in seconds.
+        """
+        self.iterations += 1
+        delta = jitter - self.__mean
+        self.__mean += delta / self.iterations
+        self.__m2 += delta * (jitter - self.__mean)
+        self.max_jitter = max(self.max_jitter, jitter)
+
+    def as_dict(self) -> dict:
+        """Get the statistics as a dictionary."""
+        return {
+            'iterations': self.iterations,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'mean_jitter': self.mean_jitter,
+            'stdev_jitter': self.stdev_jitter,
+            'max_jitter': self.max_jitter,
+        }
+
+    def __repr__(self):
+        return (f"ScheduleStats(iterations={self.iterations}, overruns={self.overruns}, skipped={self.skipped}, "
+                f"mean_jitter={self.mean_jitter * 1000:.3f} ms, max_jitter={self.max_jitter * 1000:.3f} ms)")
+
+
+class Schedule:
+    """
+    Runs a function at a fixed rate against absolute deadlines of the active clock.
+
+    Iteration k is scheduled at ``start + k * period``, whatever the duration of the previous iterations,
+    so timing errors don't accumulate over long runs.
+    """
+    def __init__(self, period: Optional[float] = None, rate: Optional[float] = None,
+                 overrun: OverrunPolicy = OverrunPolicy.SKIP):
+        """
+        :param period: Time between the starts of two iterations, in seconds.
+        :param rate: Number of iterations per second, in Hz. Alternative to period.
+        :param overrun: What to do when an iteration ends after the next deadline.
+        """
+        if (period is None) == (rate is None):
+            raise ValueError("Exactly one of period and rate must be given.")
+        period = period if period is not None else 1 / rate if rate > 0 else 0
+        if not period > 0:
+            raise ValueError(f"Period and rate must be greater than zero. Period: {period}")
+
+        self.period = period
+        self.overrun = overrun
+        self.stats = ScheduleStats()
+
+    def run(self, function: callable, running: callable):
+        """
+        Call the function on schedule while ``running()`` returns True.
+
+        :param function: Function to call at every iteration.
+        :param running: Function returning False when the loop must stop.
+        :raises Cancelled: If the cancellation token of the current thread is cancelled while waiting.
+        """
+        token = current_token()
+        timer = clock.get_clock()
+        deadline = timer.now()
+
+        while running():
+            self.stats.record(timer.now() - deadline)
+            function()
+            deadline = self.__next_deadline(deadline, timer.now())
+            timer.sleep(deadline - timer.now(), token)
+
+    async def run_async(self, function: callable, running: callable):
+        """
+        Await an async function on schedule while ``running()`` returns True. Cancel the task to stop the loop.
+
+        :param function: Async function to await at every iteration.
+        :param running: Function returning False when the loop must stop.
+        """
+        timer = clock.get_clock()
+        deadline = timer.now()
+
+        while running():
+            self.stats.record(timer.now() - deadline)
+            await function()
+            deadline = self.__next_deadline(deadline, timer.now())
+            await timer.sleep_async(deadline - timer.now())
+
+    def __next_deadline(self, deadline: float, now: float) -> float:
+        """
+        Get the start of the next iteration, recording the overrun if the current one ended too late.
+
+        :param deadline: Scheduled start of the current iteration.
+        :param now: End of the current iteration.
+        :return: Scheduled start of the next iteration. With CATCH_UP it may already be in the past.
+        """
+        deadline += self.period
+        if now > deadline:
+            self.stats.overruns += 1
+            if self.overrun == OverrunPolicy.SKIP:
+                missed = ceil((now - deadline) / self.period)
+                self.stats.skipped += missed
+                deadline += missed * self.period
+                logger.debug("Iteration overran the schedule. Skipped %s iterations.", missed)
+        return deadline
@@ -0,0 +1,323 @@
+import logging
+import multiprocessing
+import os
+import runpy
+from glob import glob
+from logging.handlers import QueueListener
+from pathlib import Path
+from queue import Empty
+from threading import Event, Thread
+from time import monotonic, sleep, time
+from typing import Optional
+from src.logger import forward, get_logger
+from src.reloader import Reloader
+
+logger = get_logger(__name__)
+
+HEARTBEAT_INTERVAL = 1.0  # seconds
+
+
+def discover(patterns: list[str]) -> list[list[Path]]:
+    """
+    Find the automation scripts to run, grouped by worker.
+
+    Each pattern is a file, a directory (every '*.a.py' file inside) or a glob. Every file found is its own
+    group, except for patterns joining several files with ',', which share a worker.
+
+    :param patterns: Patterns from the command line, e.g. ['automations/*.a.py', 'a.a.py,b.a.py'].
+    :return: Groups of paths, in order, without duplicates.
+    """
+    groups, seen = [], set()
+    for pattern in patterns:
+        paths = []
+        for part in pattern.split(','):
+            path = Path(part)
+            found = sorted(path.glob('*.a.py')) if path.is_dir() else [Path(p) for p in sorted(glob(part))]
+            if not found:
+                logger.warning("No automation found for '%s'.", part)
+            paths += [p for p in found if p.resolve() not in seen]
+            seen.update(p.resolve() for p in found)
+
+        if ',' in pattern and paths:
+            groups.append(paths)
+        else:
+            groups += [[path] for path in paths]
+    return groups
+
+
+def run_scripts(paths: list[Path], watch: bool = False) -> int:
+    """
+    Run automation scripts as '__main__', each in its own thread, and wait for all of them.
+
+    :param paths: Paths of the scripts.
+    :param watch: If True, apply the modifications of the scripts while they run (see Reloader).
+    :return: 0 if every script returned normally, 1 otherwise.
+    """
+    failed = []
+
+    def run(path: Path):
+        try:
+            if watch:
+                Reloader.run(path)
+            else:
+                runpy.run_path(str(path), run_name="__main__")
+        except SystemExit as exit:
+            if exit.code not in (None, 0):
+                failed.append(path)
+        except BaseException:
+            logger.exception("Automation script %s crashed.", path)
+            failed.append(path)
+
+    threads = [Thread(target=run, args=(path,), name=path.name) for path in paths]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return 1 if failed else 0
+
+
+def _worker_main(name: str, paths: list[Path], status, logs, level: int, watch: bool):
+    """Entry point of a worker process: forward the logs, send heartbeats and run the scripts."""
+    forward(logs, level, prefix=name)
+    from src.registry import RunRegistry  # after the logging set-up, so its records are forwarded
+
+    def heartbeat():
+        while True:
+            runs = [{'id': run.id, 'name': run.name, 'mode': run.mode.value, 'state': run.state.value}
+                    for run in RunRegistry.runs()]
+            status.put((name, os.getpid(), time(), runs))
+            sleep(HEARTBEAT_INTERVAL)
+
+    Thread(target=heartbeat, name="guibot-heartbeat", daemon=True).start()
+    raise SystemExit(run_scripts(paths, watch))
+
+
+class Worker:
+    """
+    A group of automation scripts, run in its own process or in a thread of the supervisor.
+
+    A worker that exits with an error is restarted after an exponential backoff. The backoff is reset once the
+    worker has been running for STABLE_AFTER seconds. A worker that exits normally (e.g. after 'esc') is not
+    restarted.
+    """
+    STABLE_AFTER = 30.0  # seconds
+
+    def __init__(self, name: str, paths: list[Path], context, status, logs, in_process: bool = False,
+                 backoff: float = 1.0, max_backoff: float = 60.0, watch: bool = False):
+        """
+        :param name: Name of the worker, used in logs and status.
+        :param paths: Paths of the automation scripts.
+        :param context: Multiprocessing context used to create the process.
+        :param status: Queue receiving the heartbeats of the worker.
+        :param logs: Queue receiving the log records of the worker.
+        :param in_process: If True, run the scripts in a thread of the supervisor instead of a worker process.
+        :param backoff: Delay before the first restart, in seconds. Doubled after every consecutive crash.
+        :param max_backoff: Maximum delay before a restart, in seconds.
+        :param watch: If True, apply the modifications of the scripts while they run.
+        """
+        self.name = name
+        self.context = context
+        self.status_queue = status
+        self.logs = logs
+        self.paths = paths
+        self.in_process = in_process
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.watch = watch
+
+        self.restarts = 0
+        self.failures = 0
+        self.exitcode: Optional[int] = None
+        self.pid: Optional[int] = None
+        self.runs: list[dict] = []
+        self.heartbeat = 0.0
+        self.finished = False
+        self._process = None
+        self._started_at = 0.0
+        self._restart_at: Optional[float] = None
+
+    @property
+    def alive(self) -> bool:
+        """True while the scripts of the worker are running."""
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        """Start the worker."""
+        if self.in_process:
+            self._process = _ScriptThread(self.paths, self.name, self.watch)
+        else:
+            self._process = self.context.Process(target=_worker_main, name=f"guibot-{self.name}", daemon=True,
+                                                 args=(self.name, self.paths, self.status_queue, self.logs,
+                                                       logging.getLogger().getEffectiveLevel(), self.watch))
+        self._process.start()
+        self.pid = getattr(self._process, 'pid', os.getpid())
+        self._started_at = self.heartbeat = monotonic()
+        self._restart_at = None
+        self.exitcode = None
+        logger.info("Worker '%s' started (pid %s): %s.", self.name, self.pid, ", ".join(map(str, self.paths)))
+
+    def poll(self, heartbeat_timeout: float):
+        """
+        Check on the worker: detect its exit, kill it if it stopped sending heartbeats, restart it when due.
+
+        :param heartbeat_timeout: Time without heartbeat after which a worker process is considered hung.
+        """
+        now = monotonic()
+        if self.finished:
+            return
+        if self._restart_at is not None:
+            if now >= self._restart_at:
+                self.restarts += 1
+                self.start()
+            return
+
+        if self.alive:
+            if not self.in_process and heartbeat_timeout and now - self.heartbeat > heartbeat_timeout:
+                logger.error("Worker '%s' sent no heartbeat for %.0f seconds. Killing it.", self.name, heartbeat_timeout)
+                self._process.kill()
+            return
+
+        self.exitcode = self._process.exitcode
+        self.runs = []
+        if self.exitcode == 0:
+            logger.info("Worker '%s' finished.", self.name)
+            self.finished = True
+            return
+
+        if now - self._started_at >= self.STABLE_AFTER:
+            self.failures = 0
+        delay = min(self.max_backoff, self.backoff * 2 ** self.failures)
+        self.failures += 1
+        self._restart_at = now + delay
+        logger.warning("Worker '%s' exited with code %s. Restarting it in %.1f seconds.", self.name, self.exitcode, delay)
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stop the worker process, killing it if it doesn't exit in time. Threads of in-process workers can't be
+        stopped: they end when their scripts return.
+
+        :param timeout: Time to wait for the process to exit after the termination request, in seconds.
+        """
+        self.finished = True
+        if self.alive and not self.in_process:
+            self._process.terminate()
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.kill()
+
+    def status(self) -> dict:
+        """Get the status of the worker as a dictionary."""
+        state = ('running' if self.alive else 'restarting' if self._restart_at is not None
+                 else 'finished' if self.exitcode == 0 else 'stopped' if self.finished else 'starting')
+        return {'name': self.name, 'pid': self.pid, 'state': state, 'restarts': self.restarts,
+                'exitcode': self.exitcode, 'scripts': [str(path) for path in self.paths], 'runs': self.runs}
+
+
+class _ScriptThread(Thread):
+    """ Runs a group of scripts in the supervisor process, with the same interface as a worker process. """
+    def __init__(self, paths: list[Path], name: str, watch: bool = False):
+        super().__init__(name=f"guibot-{name}", daemon=True)
+        self.paths = paths
+        self.watch = watch
+        self.exitcode: Optional[int] = None
+
+    def run(self):
+        self.exitcode = run_scripts(self.paths, self.watch)
+
+
+class Supervisor:
+    """
+    Runs groups of automation scripts in worker processes, isolated from each other.
+
+    A crashing or hung script only takes its own worker down, and the worker is restarted with a backoff.
+    Each worker process has its own listener and interpreter, so CPU-heavy automations run on separate cores.
+    Logs of the workers are forwarded to the supervisor's logging, and their active runs are collected from
+    their heartbeats.
+    """
+    POLL_INTERVAL = 0.1  # seconds
+
+    def __init__(self, groups: list[list[Path]], in_process: bool = False, backoff: float = 1.0,
+                 max_backoff: float = 60.0, heartbeat_timeout: float = 10.0, watch: bool = False):
+        """
+        :param groups: Groups of automation scripts, as returned by `discover`. Each group runs in one worker.
+        :param in_process: If True, run every group in a thread of this process: no isolation, no extra cores.
+        :param backoff: Delay before the first restart of a crashed worker, in seconds.
+        :param max_backoff: Maximum delay before a restart, in seconds.
+        :param heartbeat_timeout: Time without heartbeat after which a worker process is killed and restarted.
+            0 disables the check.
+        :param watch: If True, apply the modifications of the scripts while they run, without restarting them.
+        """
+        context = multiprocessing.get_context('spawn')  # never fork a process running listener threads
+        self._status = context.Queue()
+        self._logs = context.Queue()
+        self._stopped = Event()
+        self.heartbeat_timeout = heartbeat_timeout
+        self.workers = [Worker("+".join(path.name.removesuffix('.py').removesuffix('.a') for path in group), group,
+                               context, self._status, self._logs, in_process, backoff, max_backoff, watch)
+                        for group in groups]
+
+    def run(self, status_interval: float = 0.0):
+        """
+        Start the workers and supervise them until they have all finished or `stop` is called.
+
+        :param status_interval: If greater than zero, print the status of the workers at this interval, in seconds.
+        """
+        logs = QueueListener(self._logs, _Redispatch())
+        logs.start()
+        for worker in self.workers:
+            worker.start()
+
+        last_report = monotonic()
+        try:
+            while not self._stopped.wait(self.POLL_INTERVAL):
+                self.__collect_heartbeats()
+                for worker in self.workers:
+                    worker.poll(self.heartbeat_timeout)
+                if all(worker.finished for worker in self.workers):
+                    break
+                if status_interval > 0 and monotonic() - last_report >= status_interval:
+                    last_report = monotonic()
+                    print(self.report())
+        except KeyboardInterrupt:
+            logger.info("Supervisor interrupted by user.")
+        finally:
+            for worker in self.workers:
+                worker.stop()
+            logs.stop()
+            logger.info("Supervisor stopped.")
+
+    def stop(self):
+        """Stop supervising: every worker process is terminated. Safe to call from any thread."""
+        self._stopped.set()
+
+    def status(self) -> list[dict]:
+        """Get the status of every worker, with its active runs as reported by its last heartbeat."""
+        return [worker.status() for worker in self.workers]
+
+    def report(self) -> str:
+        """Get the status of every worker as a table."""
+        lines = [f"{'worker':<32} {'pid':>7} {'state':<10} {'restarts':>8} runs"]
+        for status in self.status():
+            runs = ", ".join(f"{run['name']} ({run['mode']})" for run in status['runs'])
+            lines.append(f"{status['name']:<32} {status['pid'] or '':>7} {status['state']:<10} "
+                         f"{status['restarts']:>8} {runs}")
+        return "\n".join(lines)
+
+    def __collect_heartbeats(self):
+        """Update the workers with the heartbeats received since the last poll."""
+        workers = {worker.name: worker for worker in self.workers}
+        while True:
+            try:
+                name, pid, _, runs = self._status.get_nowait()
+            except Empty:
+                return
+            worker = workers.get(name)
+            if worker is not None and worker.pid == pid:
+                worker.heartbeat = monotonic()
+                worker.runs = runs
+
+
+class _Redispatch(logging.Handler):
+    """ Hands the records received from the workers to the supervisor's own loggers. """
+    def emit(self, record: logging.LogRecord):
+        logging.getLogger(record.name).handle(record)
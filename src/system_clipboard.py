@@ -0,0 +1,53 @@
+"""
+System clipboard of the pynput backend: pyperclip, plus the change counter of the platform when it has one.
+
+The change counter lets Clipboard reuse the last text read until another application copies something,
+instead of reading the clipboard again (on Linux, pyperclip starts an xclip or xsel process per read).
+
+- Windows: GetClipboardSequenceNumber, through ctypes.
+- macOS: the change count of the general pasteboard, if PyObjC is installed.
+- Elsewhere: no counter, every read goes to the clipboard.
+"""
+import sys
+from typing import Optional
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _change_counter() -> Optional[callable]:
+    """Get a function returning the change counter of the system clipboard, or None if the platform has none."""
+    if sys.platform == 'win32':
+        import ctypes
+        return ctypes.windll.user32.GetClipboardSequenceNumber
+    if sys.platform == 'darwin':
+        try:
+            from AppKit import NSPasteboard
+        except ImportError:
+            logger.info("PyObjC isn't installed: the clipboard is read again at every query.")
+            return None
+        return NSPasteboard.generalPasteboard().changeCount
+    return None
+
+
+class SystemClipboard:
+    """ Copies and pastes through pyperclip. """
+    def __init__(self):
+        import pyperclip
+
+        self.__pyperclip = pyperclip
+        self.__counter = _change_counter()
+
+    def copy(self, text: str):
+        self.__pyperclip.copy(text)
+
+    def paste(self) -> str:
+        return self.__pyperclip.paste()
+
+    def change_count(self) -> Optional[int]:
+        """
+        Get the change counter of the clipboard. It changes every time something is copied, by any application.
+
+        :return: The counter, or None if the platform has none.
+        """
+        return self.__counter() if self.__counter is not None else None
@@ -0,0 +1,137 @@
+"""
+Keymap of the pynput backend: the keycodes of the active layout, read once, and key events sent in one flush.
+
+pynput resolves every key when it is pressed or released, and sends each event on its own. On X11 that is a
+focus query and a sync per event, and a character missing from the layout costs a keyboard mapping change too.
+
+- X11: the table is read from the core keyboard mapping, and events are sent with XTest and a single sync.
+- Elsewhere: no keymap, every key goes through pynput.
+"""
+from enum import Enum
+from threading import Lock
+from typing import Optional, Union
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+SHIFT = 0xFFE1  # Shift_L
+LEVEL3 = 0xFE03  # ISO_Level3_Shift, AltGr on most layouts
+RETURN = 0xFF0D
+TAB = 0xFF09
+
+
+def get_system_keymap(controller, key_type: type[Enum]) -> Optional['XorgKeymap']:
+    """
+    Get the keymap of the platform pynput runs on.
+
+    :param controller: The pynput keyboard controller.
+    :param key_type: The pynput Key type.
+    :return: The keymap, or None if the platform has none.
+    """
+    if type(controller).__module__ != 'pynput.keyboard._xorg':
+        return None
+    try:
+        return XorgKeymap(key_type)
+    except Exception:
+        logger.warning("Cannot read the X11 keyboard mapping: keys are resolved by pynput.", exc_info=True)
+        return None
+
+
+def _keysym_chars() -> dict[int, str]:
+    """Get the character of the keysyms outside the Latin-1 and Unicode ranges, like EuroSign."""
+    try:
+        from pynput._util.xorg_keysyms import SYMBOLS
+    except ImportError:
+        return {}
+    return {keysym: char for keysym, char in SYMBOLS.values() if char}
+
+
+class XorgKeymap:
+    """ Keymap of an X11 display, read from its core keyboard mapping. Events are sent with XTest. """
+    def __init__(self, key_type: type[Enum]):
+        """
+        :param key_type: The pynput Key type, whose values hold the keysym of each special key.
+        """
+        from Xlib import X, display
+        from Xlib.ext import xtest
+
+        self.__X = X
+        self.__xtest = xtest
+        self.__display = display.Display()
+        self.__key_type = key_type
+        self.__lock = Lock()
+        self.__mapping: list[tuple[int, ...]] = []
+
+    def layout(self) -> int:
+        """Read the keyboard mapping, and get its hash: it changes with the layout."""
+        with self.__lock:
+            info = self.__display.display.info
+            count = info.max_keycode - info.min_keycode + 1
+            self.__mapping = [tuple(keysyms) for keysyms in self.__display.get_keyboard_mapping(info.min_keycode,
+                                                                                              count)]
+            return hash(tuple(self.__mapping))
+
+    def build(self) -> dict[Union[str, Enum], tuple[int, tuple[int, ...]]]:
+        """
+        Build the table of the keyboard mapping read by the last `layout` call.
+
+        Each character gets the keycode and the modifiers of its lowest level: none, shift, AltGr, or both.
+        """
+        min_keycode = self.__display.display.info.min_keycode
+        keycodes: dict[int, int] = {}  # keysym -> keycode of the first level
+        for offset, keysyms in enumerate(self.__mapping):
+            if keysyms and keysyms[0]:
+                keycodes.setdefault(keysyms[0], min_keycode + offset)
+
+        shift, level3 = keycodes.get(SHIFT), keycodes.get(LEVEL3)
+        levels = [(0, ())]
+        if shift is not None:
+            levels.append((1, (shift,)))
+        if level3 is not None:
+            levels.append((4, (level3,)))
+            if shift is not None:
+                levels.append((5, (shift, level3)))
+
+        chars = _keysym_chars()
+        table: dict[Union[str, Enum], tuple[int, tuple[int, ...]]] = {}
+        for level, modifiers in levels:
+            for offset, keysyms in enumerate(self.__mapping):
+                keysym = keysyms[level] if level < len(keysyms) else 0
+                if level == 1 and not keysym and keysyms and keysyms[0]:
+                    keysym = self.__upper(keysyms[0])  # a single lowercase keysym implies its uppercase
+                char = self.__char(keysym, chars)
+                if char is not None and char not in table:
+                    table[char] = (min_keycode + offset, modifiers)
+
+        for key in self.__key_type:
+            keycode = keycodes.get(key.value.vk)
+            if keycode is not None:
+                table[key] = (keycode, ())
+        for char, keysym in (('\n', RETURN), ('\t', TAB)):
+            if keysym in keycodes:
+                table[char] = (keycodes[keysym], ())
+        return table
+
+    def send(self, events):
+        """Send key events with XTest, then sync once."""
+        with self.__lock:
+            for keycode, pressed in events:
+                self.__xtest.fake_input(self.__display, self.__X.KeyPress if pressed else self.__X.KeyRelease,
+                                        keycode)
+            self.__display.sync()
+
+    @staticmethod
+    def __char(keysym: int, chars: dict[int, str]) -> Optional[str]:
+        """Get the character typed by a keysym, or None if it isn't a character."""
+        if 0x20 <= keysym <= 0x7E or 0xA0 <= keysym <= 0xFF:
+            return chr(keysym)
+        if keysym & 0xFF000000 == 0x01000000:
+            return chr(keysym & 0xFFFFFF)
+        return chars.get(keysym)
+
+    @staticmethod
+    def __upper(keysym: int) -> int:
+        """Get the uppercase keysym of a lowercase Latin-1 keysym, or 0."""
+        if 0x61 <= keysym <= 0x7A or 0xE0 <= keysym <= 0xFE and keysym != 0xF7:
+            return keysym - 0x20
+        return 0
@@ -0,0 +1,155 @@
+import atexit
+import os
+from array import array
+from functools import wraps
+from itertools import count
+from threading import enumerate as threads, get_native_id
+from time import perf_counter_ns
+from typing import Optional
+from src.env import get_trace_file
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+BEGIN, END = ord('B'), ord('E')
+
+
+class Tracer:
+    """
+    Opt-in tracer recording begin/end spans into a preallocated ring buffer.
+
+    Recording a span writes two slots of fixed-size arrays, without allocating, so tracing barely affects the
+    timings it measures. When the buffer is full the oldest events are overwritten. The trace is written as
+    Chrome trace-event JSON, which can be opened in Perfetto (ui.perfetto.dev) or chrome://tracing.
+
+    Spans opened on the same thread nest: controller calls appear under the automation run that made them.
+    """
+    enabled: bool = False
+    capacity: int = 0
+
+    __names: list[Optional[str]] = []
+    __phases = array('B')
+    __timestamps = array('q')
+    __threads = array('q')
+    __index = count()
+
+    @classmethod
+    def start(cls, capacity: int = 1 << 20):
+        """
+        Start recording, discarding any previous trace.
+
+        :param capacity: Number of events kept in the ring buffer. Each span takes two events.
+        """
+        cls.enabled = False
+        cls.capacity = capacity
+        cls.__names = [None] * capacity
+        cls.__phases = array('B', bytes(capacity))
+        cls.__timestamps = array('q', bytes(8 * capacity))
+        cls.__threads = array('q', bytes(8 * capacity))
+        cls.__index = count()
+        cls.enabled = True
+        logger.info("Tracing started with a buffer of %s events.", capacity)
+
+    @classmethod
+    def stop(cls):
+        """Stop recording. The recorded events are kept until the next start."""
+        cls.enabled = False
+
+    @classmethod
+    def begin(cls, name: str):
+        """
+        Open a span on the current thread.
+
+        :param name: Name of the span.
+        """
+        cls.__record(name, BEGIN)
+
+    @classmethod
+    def end(cls, name: str):
+        """
+        Close the last span opened on the current thread.
+
+        :param name: Name of the span.
+        """
+        cls.__record(name, END)
+
+    @classmethod
+    def __record(cls, name: str, phase: int):
+        i = next(cls.__index) % cls.capacity
+        cls.__timestamps[i] = perf_counter_ns()
+        cls.__threads[i] = get_native_id()
+        cls.__phases[i] = phase
+        cls.__names[i] = name
+
+    @classmethod
+    def events(cls) -> list[dict]:
+        """Get the recorded events, oldest first, as Chrome trace events."""
+        recorded = next(cls.__index)  # also skips a slot, which is harmless
+        first = max(0, recorded - cls.capacity)
+        pid = os.getpid()
+
+        events = []
+        for n in range(first, recorded):
+            i = n % cls.capacity
+            if cls.__names[i] is None:
+                continue
+            events.append({'name': cls.__names[i], 'ph': chr(cls.__phases[i]), 'ts': cls.__timestamps[i] / 1000,
+                           'pid': pid, 'tid': cls.__threads[i]})
+
+        events += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread.native_id,
+                    'args': {'name': thread.name}} for thread in threads()]
+        return events
+
+    @classmethod
+    def write(cls, path: str):
+        """
+        Write the recorded events to a Chrome trace-event JSON file.
+
+        :param path: Path of the file.
+        """
+        import json
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': cls.events(), 'displayTimeUnit': 'ms'}, file)
+        logger.info("Trace written to %s.", path)
+
+
+def span(name: str) -> callable:
+    """
+    Decorator recording every call of a function as a span, while the tracer is enabled.
+
+    :param name: Name of the span.
+    """
+    def decorator(function: callable) -> callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not Tracer.enabled:
+                return function(*args, **kwargs)
+            Tracer.begin(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                Tracer.end(name)
+        return wrapper
+    return decorator
+
+
+def traced(*methods: str) -> callable:
+    """
+    Class decorator recording the calls of the methods defined in the class as spans named 'Class.method'.
+
+    :param methods: Names of the methods to trace. Defaults to every public static and class method.
+    """
+    def decorator(cls: type) -> type:
+        for name, attribute in list(vars(cls).items()):
+            if methods and name not in methods or not methods and name.startswith('_'):
+                continue
+            if isinstance(attribute, (staticmethod, classmethod)):
+                wrapped = span(f"{cls.__name__}.{name}")(attribute.__func__)
+                setattr(cls, name, type(attribute)(wrapped))
+        return cls
+    return decorator
+
+
+if get_trace_file():
+    Tracer.start()
+    atexit.register(Tracer.write, get_trace_file())
@@ -0,0 +1,128 @@
+from functools import lru_cache
+import numpy as np
+from src import clock
+from src.cancellation import current_token
+from src.enums import Curve
+
+Waypoints = tuple[tuple[int, int], ...]
+
+
+def _progress(steps: int, curve: Curve) -> np.ndarray:
+    """
+    Get the fraction of the movement completed after each step, ending exactly at 1.
+
+    :param steps: Number of steps.
+    :param curve: Shape of the movement.
+    :return: Array of `steps` values in (0, 1].
+    """
+    t = np.linspace(0.0, 1.0, steps + 1)[1:]
+    if curve == Curve.LINEAR:
+        return t
+    return t * t * (3.0 - 2.0 * t)  # smoothstep: zero speed at both ends
+
+
+@lru_cache(maxsize=256)
+def offsets(dx: int, dy: int, steps: int, curve: Curve = Curve.LINEAR) -> np.ndarray:
+    """
+    Precompute the integer offsets from the starting point after each step of a movement by (dx, dy).
+
+    The last offset is always exactly (dx, dy). Results are cached, and returned as read-only arrays.
+
+    :param dx: Horizontal movement in pixels.
+    :param dy: Vertical movement in pixels.
+    :param steps: Number of steps, at least 1.
+    :param curve: Shape of the movement.
+    :return: Array of shape (steps, 2) with the cumulative (x, y) offsets.
+    """
+    if steps < 1:
+        raise ValueError(f"Steps must be at least 1. Steps: {steps}")
+
+    t = _progress(steps, curve)[:, np.newaxis]
+    end = np.array([dx, dy], dtype=float)
+
+    if curve == Curve.BEZIER:
+        normal = np.array([-dy, dx], dtype=float) * 0.15
+        c1, c2 = end * 0.25 + normal, end * 0.75 + normal
+        path = 3 * (1 - t) ** 2 * t * c1 + 3 * (1 - t) * t ** 2 * c2 + t ** 3 * end
+    else:
+        path = t * end
+
+    path = np.rint(path).astype(np.int64)
+    path[-1] = (dx, dy)
+    path.setflags(write=False)
+    return path
+
+
+@lru_cache(maxsize=64)
+def waypoint_offsets(waypoints: Waypoints, steps: int, curve: Curve = Curve.LINEAR) -> np.ndarray:
+    """
+    Precompute the integer offsets of a movement through a sequence of waypoints.
+
+    Steps are shared among the segments in proportion to their length, with at least one step per segment.
+    Every waypoint, and in particular the last one, is reached exactly.
+
+    :param waypoints: Offsets of the waypoints from the starting point, in order.
+    :param steps: Total number of steps, at least the number of waypoints.
+    :param curve: Shape of each segment.
+    :return: Array of shape (steps, 2) with the cumulative (x, y) offsets.
+    """
+    if not waypoints:
+        raise ValueError("At least one waypoint is required.")
+    if steps < len(waypoints):
+        raise ValueError(f"Steps must be at least the number of waypoints. Steps: {steps}")
+
+    points = np.array(((0, 0),) + tuple(waypoints), dtype=np.int64)
+    segments = np.diff(points, axis=0)
+    lengths = np.hypot(segments[:, 0], segments[:, 1])
+    shares = lengths / lengths.sum() if lengths.sum() > 0 else np.full(len(segments), 1 / len(segments))
+
+    counts = np.maximum(1, np.floor(shares * steps).astype(int))
+    counts[np.argmax(lengths)] += steps - counts.sum()
+
+    path = np.concatenate([start + offsets(int(dx), int(dy), int(count), curve)
+                           for start, (dx, dy), count in zip(points[:-1], segments, counts)])
+    path.setflags(write=False)
+    return path
+
+
+def follow(path: np.ndarray, start: tuple[int, int], elapsed_time: float, move: callable):
+    """
+    Move along a precomputed path, pacing the steps against absolute deadlines.
+
+    Step i happens at ``(i + 1) * elapsed_time / len(path)`` seconds after the call, so the movement ends on time
+    whatever the cost of each step.
+
+    :param path: Cumulative offsets, as returned by `offsets` or `waypoint_offsets`.
+    :param start: Absolute starting position.
+    :param elapsed_time: Duration of the movement in seconds.
+    :param move: Function setting the absolute pointer position, called with (x, y).
+    :raises Cancelled: If the cancellation token of the current thread is cancelled during the movement.
+    """
+    token = current_token()
+    timer = clock.get_clock()
+    interval = elapsed_time / len(path)
+    begin = timer.now()
+    x0, y0 = start
+
+    for i, (x, y) in enumerate(path.tolist(), 1):
+        timer.sleep(begin + i * interval - timer.now(), token)
+        move(x0 + x, y0 + y)
+
+
+async def follow_async(path: np.ndarray, start: tuple[int, int], elapsed_time: float, move: callable):
+    """
+    Move along a precomputed path like `follow`, sleeping without blocking the event loop.
+
+    :param path: Cumulative offsets, as returned by `offsets` or `waypoint_offsets`.
+    :param start: Absolute starting position.
+    :param elapsed_time: Duration of the movement in seconds.
+    :param move: Function setting the absolute pointer position, called with (x, y).
+    """
+    timer = clock.get_clock()
+    interval = elapsed_time / len(path)
+    begin = timer.now()
+    x0, y0 = start
+
+    for i, (x, y) in enumerate(path.tolist(), 1):
+        await timer.sleep_async(begin + i * interval - timer.now())
+        move(x0 + x, y0 + y)
@@ -0,0 +1,242 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Timer
+from time import monotonic
+from typing import Optional
+from src.cancellation import ROOT, CancellationToken, Cancelled, bind
+from src.enums import TriggerPolicy
+from src.logger import get_logger
+from src.metrics import AutomationMetrics
+
+logger = get_logger(__name__)
+
+
+class WorkerPool:
+    """
+    Bounded pool of worker threads shared by every triggered automation.
+
+    Automation functions run here instead of on the listener thread, so a slow macro never blocks the other bindings.
+
+    Private attributes:
+    -------------------
+    - __max_workers : int
+        Maximum number of automation functions running at the same time (default: 4).
+
+    - __executor : ThreadPoolExecutor
+        Created on first use with __max_workers threads.
+    """
+    __lock = Lock()
+    __max_workers: int = 4
+    __executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def get_max_workers(cls) -> int:
+        """Get the maximum number of worker threads."""
+        return cls.__max_workers
+
+    @classmethod
+    def set_max_workers(cls, value: int):
+        """
+        Set the maximum number of worker threads. Running workers are not affected until the pool is shut down.
+
+        :param value: Number of worker threads, at least 1.
+        """
+        if value < 1:
+            raise ValueError("Max workers must be at least 1.")
+        cls.__max_workers = value
+
+    @classmethod
+    def submit(cls, function: callable, *args, **kwargs):
+        """
+        Schedule a function on the pool. This method never blocks.
+
+        :param function: Function to run.
+        :param args: Positional arguments to pass to the function.
+        :param kwargs: Keyword arguments to pass to the function.
+        :return: A Future for the result of the function.
+        """
+        with cls.__lock:
+            if cls.__executor is None:
+                cls.__executor = ThreadPoolExecutor(max_workers=cls.__max_workers, thread_name_prefix="guibot-worker")
+            executor = cls.__executor
+        return executor.submit(function, *args, **kwargs)
+
+    @classmethod
+    def shutdown(cls, wait: bool = True):
+        """
+        Shut the pool down. A new pool is created on the next submission.
+
+        :param wait: If True, block until the running functions have returned.
+        """
+        with cls.__lock:
+            executor, cls.__executor = cls.__executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class Trigger:
+    """
+    Runs an automation function on the WorkerPool each time it is fired, according to a TriggerPolicy.
+
+    Runs of the same trigger never overlap: triggers that arrive while the function is running are dropped,
+    queued or coalesced depending on the policy. ``fire()`` only takes a short lock, so it is safe to call
+    from the listener thread.
+
+    Counters:
+    ---------
+    - triggered : int
+        Number of times the trigger has been fired.
+
+    - dropped : int
+        Number of triggers discarded by the policy.
+
+    - completed : int
+        Number of runs that have returned, successfully or not.
+
+    - errors : int
+        Number of runs that have raised an exception.
+    """
+    def __init__(self, name: str, function: callable, policy: TriggerPolicy = TriggerPolicy.DROP,
+                 max_queue: int = 1, window: float = 0.0, token: CancellationToken = ROOT):
+        """
+        :param name: Name of the automation, used in log messages.
+        :param function: Function to run when the trigger is fired.
+        :param policy: What to do with triggers that arrive while the function is running.
+        :param max_queue: Maximum number of pending triggers (TriggerPolicy.QUEUE only).
+        :param window: Time window in seconds (TriggerPolicy.THROTTLE and TriggerPolicy.DEBOUNCE only).
+        :param token: Cancellation token bound to the worker thread while the function runs.
+        """
+        if policy == TriggerPolicy.QUEUE and max_queue < 1:
+            raise ValueError("max_queue must be at least 1 with the QUEUE policy.")
+        if policy in (TriggerPolicy.THROTTLE, TriggerPolicy.DEBOUNCE) and not window > 0:
+            raise ValueError(f"window must be greater than zero with the {policy.name} policy.")
+
+        self.name = name
+        self.function = function
+        self.policy = policy
+        self.max_queue = max_queue
+        self.window = window
+        self.token = token
+
+        self.triggered = 0
+        self.dropped = 0
+        self.completed = 0
+        self.errors = 0
+        self.metrics = AutomationMetrics(name)
+
+        self._lock = Lock()
+        self._running = False
+        self._pending: deque[tuple[tuple, dict]] = deque()
+        self._last_start = float('-inf')
+        self._timer: Optional[Timer] = None
+        self._idle = Event()
+        self._idle.set()
+
+    @property
+    def running(self) -> bool:
+        """True while the function is running or scheduled to run."""
+        return self._running
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of triggers waiting for the current run to finish."""
+        return len(self._pending)
+
+    def fire(self, *args, **kwargs):
+        """
+        Fire the trigger. The function is scheduled on the WorkerPool, queued or dropped according to the policy.
+
+        :param args: Positional arguments to pass to the function.
+        :param kwargs: Keyword arguments to pass to the function.
+        """
+        self.metrics.triggers.inc()
+        with self._lock:
+            self.triggered += 1
+
+            if self.policy == TriggerPolicy.DEBOUNCE:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self.__drop()
+                self._timer = Timer(self.window, self.__fire_debounced, args, kwargs)
+                self._timer.daemon = True
+                self._timer.start()
+                return
+
+            if self.policy == TriggerPolicy.THROTTLE and monotonic() - self._last_start < self.window:
+                self.__drop()
+                return
+
+            if not self._running:
+                self.__start(args, kwargs)
+            elif self.policy == TriggerPolicy.QUEUE and len(self._pending) < self.max_queue:
+                self._pending.append((args, kwargs))
+            elif self.policy == TriggerPolicy.LATEST:
+                if self._pending:
+                    self._pending.clear()
+                    self.__drop()
+                self._pending.append((args, kwargs))
+            else:
+                self.__drop()
+
+        logger.debug("Trigger '%s' fired. Queue depth: %s. Dropped: %s.", self.name, self.queue_depth, self.dropped)
+
+    def stop(self):
+        """Discard the pending triggers. A run already in progress is not interrupted."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending.clear()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the function isn't running and no trigger is pending.
+
+        :param timeout: Maximum time to wait in seconds. None waits forever.
+        :return: True if the trigger is idle, False if the timeout expired.
+        """
+        return self._idle.wait(timeout)
+
+    def __drop(self):
+        """Count a dropped trigger. Must be called with the lock held."""
+        self.dropped += 1
+        self.metrics.dropped.inc()
+
+    def __fire_debounced(self, *args, **kwargs):
+        """Start a run once the debounce window has expired, unless one is already running."""
+        with self._lock:
+            self._timer = None
+            if self._running:
+                self.__drop()
+            else:
+                self.__start(args, kwargs)
+
+    def __start(self, args: tuple, kwargs: dict):
+        """Schedule a run on the pool. Must be called with the lock held."""
+        self._running = True
+        self._idle.clear()
+        self._last_start = monotonic()
+        WorkerPool.submit(self.__run, args, kwargs)
+
+    def __run(self, args: tuple, kwargs: dict):
+        """Run the function, then the pending triggers, on the same worker."""
+        with bind(self.token):
+            while True:
+                try:
+                    self.metrics.run(self.function, *args, **kwargs)
+                except Cancelled:
+                    logger.info("Automation '%s' cancelled.", self.name)
+                    self.stop()
+                except Exception:
+                    self.errors += 1
+                    logger.exception("Automation '%s' raised an exception.", self.name)
+                finally:
+                    self.completed += 1
+
+                with self._lock:
+                    if not self._pending:
+                        self._running = False
+                        self._idle.set()
+                        return
+                    args, kwargs = self._pending.popleft()
+                    self._last_start = monotonic()
@@ -0,0 +1,187 @@
+"""
+Typing engine: sends a text with the fastest strategy able to produce it.
+
+- Long texts are pasted: the text is copied to the clipboard and pasted with ctrl+v (cmd+v on macOS), then the
+  previous content of the clipboard is restored. The cost is the same for 100 or 10 000 characters.
+- Shorter texts are typed with a press and a release per character, sent in batches without waits.
+- Characters no key of the layout produces go through the backend's own typing (pynput injects them as unicode
+  where the platform allows it). If the backend can't type them either, they are pasted.
+
+A speed cap in characters per second can be set for applications dropping keys sent too fast: the key events
+are then spread over time. A paste is a single key combination, so it isn't slowed down by the cap.
+"""
+import string
+import sys
+from collections import deque
+from contextlib import closing
+from itertools import groupby
+from typing import Generator, Iterator, Optional
+from src import backend, clock
+from src.base_controller import BaseController
+from src.clipboard import Clipboard
+from src.enums import TypingStrategy
+from src.env import get_typing_cps
+from src.keymap import KeyTable
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TypingEngine(BaseController):
+    """
+    Picks a typing strategy per call and sends the text with it.
+
+    `steps` sends the text and yields the pauses needed by the speed cap and by the paste, so `type` and the
+    async controller share the same engine and only differ in how they wait.
+    """
+    PASTE_THRESHOLD = 256  # characters
+    BATCH_SIZE = 16  # characters sent between two checks of the cancellation token
+    PACE_STEP = 0.05  # seconds: longest burst of key events allowed under a speed cap
+    PASTE_SETTLE = 0.1  # seconds left to the application to read the clipboard before it is restored
+
+    # Characters typed with a key of the layout when the backend has no keycode table (see KeyTable).
+    # The others go through the fallback strategy.
+    LAYOUT_CHARACTERS = frozenset(string.ascii_letters + string.digits + string.punctuation + ' \n\t')
+
+    cps: float = get_typing_cps()  # maximum characters per second, 0 for no limit
+
+    @classmethod
+    def plan(cls, text: str, strategy: Optional[TypingStrategy] = None) -> list[tuple[TypingStrategy, str]]:
+        """
+        Split a text into the segments sent with each strategy.
+
+        :param text: The text to type.
+        :param strategy: Strategy to use for the whole text. None pastes texts of PASTE_THRESHOLD characters or
+            more and sends the others like BATCH, which uses the fallback for the characters missing from the
+            layout.
+        :return: The (strategy, segment) pairs, in order.
+        """
+        if not text:
+            return []
+        if strategy is None:
+            strategy = TypingStrategy.PASTE if len(text) >= cls.PASTE_THRESHOLD else TypingStrategy.BATCH
+        if strategy is not TypingStrategy.BATCH:
+            return [(strategy, text)]
+        table = KeyTable.get()
+        in_layout = (table if table is not None else cls.LAYOUT_CHARACTERS).__contains__
+        return [(TypingStrategy.BATCH if keyed else TypingStrategy.FALLBACK, ''.join(segment))
+                for keyed, segment in groupby(text, in_layout)]
+
+    @classmethod
+    def type(cls, text: str, strategy: Optional[TypingStrategy] = None, cps: Optional[float] = None):
+        """
+        Type a text with the fastest strategy able to produce it.
+
+        :param text: The text to type.
+        :param strategy: Strategy to use, or None to let the engine choose.
+        :param cps: Maximum characters per second of the key events, 0 for no limit. None uses `cps`.
+        :raises Cancelled: If the automation is stopped while typing. The clipboard is restored anyway.
+        """
+        with closing(cls.steps(text, strategy, cps)) as steps:
+            for pause in steps:
+                cls.wait(pause)
+
+    @classmethod
+    def steps(cls, text: str, strategy: Optional[TypingStrategy] = None,
+              cps: Optional[float] = None) -> Iterator[float]:
+        """
+        Send a text, yielding each pause to make before going on.
+
+        Close the generator when stopping early: a paste in progress then restores the clipboard.
+
+        :param text: The text to type.
+        :param strategy: Strategy to use, or None to let the engine choose.
+        :param cps: Maximum characters per second of the key events, 0 for no limit. None uses `cps`.
+        :raises ValueError: If some characters can be neither typed by the backend nor pasted.
+        """
+        cps = cls.cps if cps is None else cps
+        size = cls.BATCH_SIZE if cps <= 0 else max(1, min(cls.BATCH_SIZE, int(cps * cls.PACE_STEP)))
+        segments = deque(cls.plan(text, strategy))
+        can_paste = True
+        start, sent = clock.now(), 0
+
+        while segments:
+            kind, segment = segments.popleft()
+            logger.debug("Typing %d characters with the %s strategy.", len(segment), kind.value)
+            if kind is TypingStrategy.PASTE:
+                if can_paste and (yield from cls.__paste(segment)):
+                    start, sent = clock.now(), 0
+                    continue
+                can_paste = False
+                segments.extendleft(reversed(cls.plan(segment, TypingStrategy.BATCH)))
+                continue
+
+            # The fallback goes a character at a time, so a failure pastes exactly what hasn't been typed.
+            step = size if kind is TypingStrategy.BATCH else 1
+            for index in range(0, len(segment), step):
+                chunk = segment[index:index + step]
+                if kind is TypingStrategy.BATCH:
+                    cls.inject(cls.__press_each, chunk)
+                elif not cls.__type(chunk):
+                    if not can_paste:
+                        message = f"Cannot type {segment[index:]!r}: the backend can't type it and the clipboard " \
+                                  f"can't be used."
+                        logger.error(message)
+                        raise ValueError(message)
+                    segments.appendleft((TypingStrategy.PASTE, segment[index:]))
+                    break
+
+                sent += len(chunk)
+                if cps > 0:
+                    pause = start + sent / cps - clock.now()
+                    if pause > 0:
+                        yield pause
+
+    @staticmethod
+    def __press_each(chunk: str):
+        """Press and release the key of each character: in one call through the keycode table when it has them."""
+        events = KeyTable.strokes(chunk)
+        if events is not None:
+            KeyTable.send(events)
+            return
+        keyboard = backend.keyboard
+        special = {'\n': backend.Key.enter, '\t': backend.Key.tab}
+        for char in chunk:
+            key = special.get(char, char)
+            keyboard.press(key)
+            keyboard.release(key)
+
+    @classmethod
+    def __type(cls, chunk: str) -> bool:
+        """Let the backend type some characters. Return False if it can't."""
+        cls.check_cancelled()
+        try:
+            cls.inject(backend.keyboard.type, chunk, check=False)
+        except Exception:  # pynput raises Controller.InvalidCharacterException
+            logger.warning("The backend cannot type %r: pasting it.", chunk, exc_info=True)
+            return False
+        return True
+
+    @classmethod
+    def __paste(cls, text: str) -> Generator[float, None, bool]:
+        """Paste a text through the clipboard, then restore it. Return False if the clipboard can't be used."""
+        cls.check_cancelled()
+        try:
+            previous = Clipboard.paste()
+            Clipboard.copy(text)
+        except Exception:
+            logger.warning("The clipboard cannot be used: typing the text key by key.", exc_info=True)
+            return False
+
+        try:
+            modifier = backend.Key.cmd if sys.platform == 'darwin' else backend.Key.ctrl
+            keycodes = (KeyTable.keycode(modifier), KeyTable.keycode('v'))
+            if None not in keycodes:
+                cls.inject(KeyTable.send, [(keycodes[0], True), (keycodes[1], True), (keycodes[1], False),
+                                           (keycodes[0], False)], check=False)
+            else:
+                cls.inject(backend.keyboard.press, modifier, check=False)
+                try:
+                    cls.inject(backend.keyboard.press, 'v', check=False)
+                    cls.inject(backend.keyboard.release, 'v', check=False)
+                finally:
+                    cls.inject(backend.keyboard.release, modifier, check=False)
+            yield cls.PASTE_SETTLE
+        finally:
+            Clipboard.copy(previous)
+        return True
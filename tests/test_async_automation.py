@@ -0,0 +1,41 @@
+"""
+Async automations: starting them never blocks the event loop, although it may start the shared listener.
+"""
+import asyncio
+import unittest
+from time import perf_counter
+from src import backend
+from src.async_automation import AsyncAutomation
+from src.automation import Automation
+from src.listener_hub import ListenerHub
+
+
+class AsyncAutomationTest(unittest.TestCase):
+    def setUp(self):
+        backend.use('null')
+        ListenerHub.stop()  # the next start sleeps SYNC_DELAY
+
+    def tearDown(self):
+        Automation.emergency_stop()
+        backend.use(None)
+
+    def test_start_does_not_block(self):
+        async def noop():
+            await asyncio.sleep(0.01)
+
+        async def main():
+            start = perf_counter()
+            handles = [AsyncAutomation.loop("loop", noop), AsyncAutomation.keystroke("key", noop, 'k')]
+            self.assertLess(perf_counter() - start, ListenerHub.SYNC_DELAY / 2)
+
+            await asyncio.sleep(ListenerHub.SYNC_DELAY * 3)
+            self.assertEqual(len([binding for binding in ListenerHub.bindings() if binding.on_esc]), 1)
+            Automation.emergency_stop()
+            for handle in handles:
+                await AsyncAutomation.join(handle)
+
+        asyncio.run(main())
+
+
+if __name__ == "__main__":
+    unittest.main()
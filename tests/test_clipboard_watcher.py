@@ -0,0 +1,63 @@
+"""
+ClipboardWatcher: a clipboard that can't be read is polled with the backoff and reported once, and its first
+successful read is not delivered as a change.
+"""
+import unittest
+from time import sleep
+from src import backend
+from src.backend import MemoryClipboard
+from src.clipboard import Clipboard
+from src.clipboard_watcher import ClipboardSubscription, ClipboardWatcher
+
+
+class FailingClipboard(MemoryClipboard):
+    """ Clipboard failing to paste while ``failing`` is set, like one without xclip or xsel. """
+    def __init__(self):
+        super().__init__()
+        self.failing = True
+        self.reads = 0
+
+    def paste(self) -> str:
+        self.reads += 1
+        if self.failing:
+            raise RuntimeError("no clipboard mechanism")
+        return super().paste()
+
+    def change_count(self):
+        return None  # read the text at every poll
+
+
+class ClipboardWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.null = backend.use('null')
+        self.clipboard = self.null.clipboard = FailingClipboard()
+        backend.use(self.null)
+        self.intervals = ClipboardWatcher.MIN_INTERVAL, ClipboardWatcher.MAX_INTERVAL, ClipboardWatcher.DEBOUNCE
+        ClipboardWatcher.MIN_INTERVAL, ClipboardWatcher.MAX_INTERVAL, ClipboardWatcher.DEBOUNCE = 0.01, 0.08, 0.02
+
+    def tearDown(self):
+        for subscription in ClipboardWatcher.subscriptions():
+            subscription.stop()
+        ClipboardWatcher.MIN_INTERVAL, ClipboardWatcher.MAX_INTERVAL, ClipboardWatcher.DEBOUNCE = self.intervals
+        backend.use(None)
+
+    def test_failing_reads(self):
+        texts = []
+        with self.assertLogs('src.clipboard_watcher', 'WARNING') as logs:
+            ClipboardWatcher.subscribe(ClipboardSubscription(texts.append, ignore_own=False))
+            sleep(1)
+        self.assertEqual(len(logs.records), 1)
+        self.assertLess(self.clipboard.reads, 20)  # 100 without the backoff
+
+        self.clipboard.text = "before"
+        self.clipboard.failing = False
+        sleep(0.3)
+        self.assertEqual(texts, [])
+
+        Clipboard.copy("after")
+        sleep(0.3)
+        self.assertEqual(texts, ["after"])
+
+
+if __name__ == "__main__":
+    unittest.main()
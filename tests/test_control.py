@@ -0,0 +1,154 @@
+"""
+Control endpoint: the requests of the protocol, served by `Automation.serve` on a temporary socket to a
+`ControlClient`, on the null backend.
+"""
+import os
+import socket
+import stat
+import unittest
+from contextlib import redirect_stdout
+from tempfile import TemporaryDirectory
+from unittest import mock
+from src import backend
+from src.automation import Automation
+from src.control import ControlClient, resolve_address, token_file
+from src.enums import RunState
+from src.mouse_controller import MouseController as mc
+from src.registry import RunRegistry
+
+
+def free_port() -> int:
+    """Get a free TCP port of the loopback interface."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class ControlTest(unittest.TestCase):
+    def setUp(self):
+        backend.use('null')
+        self.directory = TemporaryDirectory()
+        home = mock.patch.dict(os.environ, {'HOME': self.directory.name})  # the TCP token file is written there
+        home.start()
+        self.addCleanup(home.stop)
+        self.calls = []
+
+    def tearDown(self):
+        Automation.emergency_stop()
+        self.directory.cleanup()
+        backend.use(None)
+
+    def serve(self, address: str):
+        """Serve 'greet', recording its calls, and 'slow', waiting for 30 seconds."""
+        automations = {'greet': lambda *args, **kwargs: self.calls.append((args, kwargs)),
+                       'slow': lambda: mc.wait(30)}
+        with redirect_stdout(None):
+            return Automation.serve(automations, address, blocking=False)
+
+    def unix_address(self) -> str:
+        if not hasattr(socket, 'AF_UNIX'):
+            self.skipTest("needs Unix domain sockets")
+        return os.path.join(self.directory.name, "control.sock")
+
+    def test_list_and_trigger(self):
+        address = self.unix_address()
+        handle = self.serve(address)
+        with ControlClient(address, timeout=5) as client:
+            response = client.request('list', id=7)
+            self.assertEqual(response['id'], 7)
+            self.assertEqual([automation['name'] for automation in response['automations']], ['greet', 'slow'])
+
+            self.assertTrue(client.request('trigger', name='greet', args=[1], kwargs={'b': 2})['ok'])
+            handle.server.triggers['greet'].join(5)
+            response = client.request('trigger', name='greet', wait=True)
+            self.assertEqual((response['running'], response['triggered'], response['completed']), (False, 2, 2))
+            self.assertEqual(self.calls, [((1,), {'b': 2}), ((), {})])
+
+            response = client.request('trigger', name='slow', wait=True, timeout=0.2)
+            self.assertTrue(response['running'])
+
+            for request in ({'name': 'missing'}, {'name': 'greet', 'args': {}}, {'name': 'greet', 'timeout': -1},
+                            {}):
+                with self.subTest(request=request):
+                    self.assertFalse(client.request('trigger', **request)['ok'])
+            self.assertFalse(client.request('unknown')['ok'])
+
+    def test_status_and_stop(self):
+        address = self.unix_address()
+        server = self.serve(address)
+        with redirect_stdout(None):
+            other = Automation.keystroke("other", lambda: None, 'o', blocking=False)
+        with ControlClient(address, timeout=5) as client:
+            runs = client.request('status')['runs']
+            self.assertEqual({run['id'] for run in runs}, {server.id, other.id})
+            self.assertEqual(client.request('status', run=other.id)['run']['name'], "other")
+            for run in (-1, str(other.id), True, 1.5):
+                with self.subTest(run=run):
+                    self.assertFalse(client.request('status', run=run)['ok'])
+
+            # by name: the current run of an automation served, the server keeps running
+            client.request('trigger', name='slow')
+            trigger = server.server.triggers['slow']
+            self.assertEqual(client.request('stop', name='slow')['stopped'], ['slow'])
+            self.assertTrue(trigger.join(1))
+            self.assertEqual(server.state, RunState.RUNNING)
+
+            # by run id
+            self.assertEqual(client.request('stop', run=other.id)['stopped'], [other.id])
+            self.assertTrue(other.join(1))
+
+            # bare: this server only
+            with redirect_stdout(None):
+                another = Automation.keystroke("another", lambda: None, 'a', blocking=False)
+            self.assertEqual(client.request('stop')['stopped'], [server.id])
+        self.assertTrue(server.join(1))
+        self.assertEqual(another.state, RunState.RUNNING)
+
+        # all: every run of the process
+        server = self.serve(address)
+        with ControlClient(address, timeout=5) as client:
+            self.assertEqual(set(client.request('stop', all=True)['stopped']), {server.id, another.id})
+        for handle in (server, another):
+            self.assertTrue(handle.join(1))
+        self.assertEqual(RunRegistry.count(), 0)
+
+    def test_tcp_token(self):
+        address = f"127.0.0.1:{free_port()}"
+        handle = self.serve(address)
+        path = token_file(*resolve_address(address))
+        self.assertTrue(path.startswith(self.directory.name))
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+        with ControlClient(address, timeout=5) as client:
+            self.assertTrue(client.request('trigger', name='greet', wait=True)['ok'])
+        with socket.create_connection(handle.server.address, timeout=5) as connection, \
+                connection.makefile('rb') as lines:
+            for request in (b'{"command":"trigger","name":"greet"}\n',
+                            b'{"command":"trigger","name":"greet","token":"guess"}\n'):
+                connection.sendall(request)
+                self.assertEqual(lines.readline(), b'{"ok":false,"error":"Missing or invalid token."}\n')
+        self.assertEqual(len(self.calls), 1)
+
+        handle.stop()
+        self.assertTrue(handle.join(1))
+        self.assertFalse(os.path.exists(path))
+
+    def test_closed_on_invalid_lines(self):
+        address = self.unix_address()
+        handle = self.serve(address)
+        trigger = b'{"command":"trigger","name":"greet"}\n'
+        for line, response in ((b'POST /trigger HTTP/1.1\r\n', b''),
+                               (b'not json\n', b'{"ok":false,"error":"Invalid request: '),
+                               (b'[1, 2]\n', b'{"ok":false,"error":"Invalid request: ')):
+            with self.subTest(line=line), socket.socket(socket.AF_UNIX) as connection, \
+                    connection.makefile('rb') as lines:
+                connection.settimeout(5)
+                connection.connect(address)
+                connection.sendall(line + trigger)
+                self.assertTrue(lines.readline().startswith(response))
+                self.assertEqual(lines.readline(), b'')  # closed: the trigger after it isn't run
+        self.assertEqual(handle.server.triggers['greet'].triggered, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+"""
+Keystroke automations: a binding that can never run is refused without holding a slot of the parallel limit.
+"""
+import unittest
+from contextlib import redirect_stdout
+from src import backend
+from src.automation import Automation
+from src.enums import RunState
+from src.registry import RunRegistry
+
+
+class KeystrokeTest(unittest.TestCase):
+    def setUp(self):
+        backend.use('null')
+
+    def tearDown(self):
+        Automation.emergency_stop()
+        backend.use(None)
+
+    def test_esc_activator_is_refused(self):
+        for activator in (backend.Key.esc, ['ctrl', backend.Key.esc]):
+            with self.subTest(activator=activator), self.assertLogs('src.listener_hub', 'ERROR'), \
+                    self.assertRaises(ValueError):
+                Automation.keystroke("esc", lambda: None, activator, blocking=False)
+        self.assertEqual(RunRegistry.runs(), [])
+
+    def test_stop(self):
+        with redirect_stdout(None):
+            handle = Automation.keystroke("a", lambda: None, 'a', blocking=False)
+        handle.stop()
+        self.assertTrue(handle.join(1))
+        self.assertEqual(handle.state, RunState.FINISHED)
+        self.assertEqual(RunRegistry.count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
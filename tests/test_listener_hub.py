@@ -0,0 +1,117 @@
+"""
+ListenerHub: dispatch of key presses to the bindings, driven through ``_on_press`` and ``_on_release`` on the null
+backend, without starting the shared listener.
+"""
+import unittest
+from src import backend
+from src.listener_hub import Binding, ListenerHub, normalize_key
+
+Key = backend.NullKey
+KeyCode = backend.NullKeyCode
+
+
+class ListenerHubTest(unittest.TestCase):
+    def setUp(self):
+        backend.use('null')
+        ListenerHub.stop()
+
+    def tearDown(self):
+        ListenerHub.stop()
+        backend.use(None)
+
+    def bind(self, *keys: str, edge_triggered: bool = False) -> list:
+        """Register a binding on the keys, returning the list its presses are appended to."""
+        hits = []
+        ListenerHub.register(Binding(frozenset(keys), hits.append, ('+'.join(keys),), edge_triggered=edge_triggered),
+                             start=False)
+        return hits
+
+    @staticmethod
+    def tap(*keys):
+        """Press the keys in order, then release them in reverse order."""
+        for key in keys:
+            ListenerHub._on_press(key)
+        for key in reversed(keys):
+            ListenerHub._on_release(key)
+
+    def test_normalize_key(self):
+        for key, name in ((Key.ctrl_l, 'ctrl'), (Key.ctrl_r, 'ctrl'), ('shift_r', 'shift'), (Key.cmd_l, 'cmd'),
+                          (Key.alt_gr, 'alt_gr'), (Key.f5, 'f5'), (KeyCode('c'), 'c'), (KeyCode('\x03'), 'c'),
+                          ('\x1a', 'z'), ('\t', '\t'), ('\r', '\r'), (KeyCode(vk=65), None)):
+            with self.subTest(key=key):
+                self.assertEqual(normalize_key(key), name)
+
+    def test_aliases_and_control_characters(self):
+        hits = self.bind('ctrl', 'c')
+        self.tap(Key.ctrl_l, KeyCode('c'))
+        self.tap(Key.ctrl_r, KeyCode('\x03'))  # ctrl+c as reported by some platforms
+        self.assertEqual(hits, ['ctrl+c', 'ctrl+c'])
+
+    def test_chord_precedence(self):
+        single, chord = self.bind('c'), self.bind('ctrl', 'c')
+        self.tap(KeyCode('c'))
+        self.tap(Key.ctrl, KeyCode('c'))
+        self.tap(Key.shift, KeyCode('c'))  # no 'shift+c' chord: the single key runs
+        self.assertEqual(single, ['c', 'c'])
+        self.assertEqual(chord, ['ctrl+c'])
+
+    def test_conflicts(self):
+        self.bind('c')
+        self.bind('ctrl', 'c')
+        same, shadowed = ListenerHub.conflicts(frozenset({'c'}))
+        self.assertTrue(same.startswith("conflicts with Binding(c, append)"))
+        self.assertTrue(shadowed.startswith("shadowed by the chords c+ctrl"))
+        shadows, = ListenerHub.conflicts(frozenset({'alt', 'c'}))
+        self.assertTrue(shadows.startswith("shadows Binding(c, append)"))
+        self.assertEqual(ListenerHub.conflicts(frozenset({'d'})), [])
+
+        with self.assertLogs('src.listener_hub', 'WARNING') as logs:
+            self.bind('ctrl', 'c')
+        conflict, shadow = logs.output
+        self.assertIn("conflicts with Binding(c+ctrl, append)", conflict)
+        self.assertIn("shadows Binding(c, append)", shadow)
+
+    def test_edge_triggered_repeats(self):
+        edge, level = self.bind('a', edge_triggered=True), self.bind('b')
+        for key in (KeyCode('a'), KeyCode('b')):
+            for _ in range(3):  # auto-repeat: presses without releases
+                ListenerHub._on_press(key)
+            ListenerHub._on_release(key)
+        self.tap(KeyCode('a'))
+        self.assertEqual(edge, ['a', 'a'])
+        self.assertEqual(level, ['b', 'b', 'b'])
+
+    def test_esc(self):
+        stopped = []
+        hits = self.bind('a')
+        ListenerHub.register(Binding(frozenset(), stopped.append, ('esc',), on_esc=True), start=False)
+        with self.assertLogs('src.listener_hub', 'ERROR'), self.assertRaises(ValueError):
+            self.bind('ctrl', 'esc')
+
+        self.assertFalse(ListenerHub._on_press(Key.esc))
+        self.assertEqual(stopped, ['esc'])
+        self.assertEqual(ListenerHub.bindings(), [])
+        self.tap(KeyCode('a'))
+        self.assertEqual(hits, [])
+
+    def test_modifier_released_first(self):
+        hits = self.bind('A', edge_triggered=True)
+        chord = self.bind('ctrl', 'c')
+        for shifted, unshifted in ((KeyCode('A', 65), KeyCode('a', 65)),  # same virtual key code
+                                   (KeyCode('A', 0x41), KeyCode('a', 0x61)),  # keysyms, as on X
+                                   (KeyCode('A'), KeyCode('a'))):  # no virtual key code
+            with self.subTest(shifted=shifted):
+                hits.clear()
+                chord.clear()
+                for _ in range(2):
+                    ListenerHub._on_press(Key.shift)
+                    ListenerHub._on_press(shifted)
+                    ListenerHub._on_release(Key.shift)
+                    ListenerHub._on_release(unshifted)
+                self.assertEqual(hits, ['A', 'A'])
+                self.tap(Key.ctrl, KeyCode('c'))
+                self.assertEqual(chord, ['ctrl+c'])
+
+
+if __name__ == "__main__":
+    unittest.main()
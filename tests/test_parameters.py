@@ -0,0 +1,99 @@
+"""
+ParameterStore: conversion and clamping of the values, the lock-free snapshot, and the batched persistence to a
+temporary parameters file.
+"""
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+from src.parameters import ParameterStore
+
+
+class ParameterStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "parameters.json")
+        ParameterStore.use(self.path)
+        self.flush_delay = ParameterStore.FLUSH_DELAY
+        ParameterStore.FLUSH_DELAY = 0.1
+
+    def tearDown(self):
+        ParameterStore.use(None)
+        ParameterStore.FLUSH_DELAY = self.flush_delay
+        self.directory.cleanup()
+
+    def name(self, parameter: str) -> str:
+        """Name a parameter after the test: a parameter can't be defined twice in a process."""
+        return f"{self.id()}.{parameter}"
+
+    def wait_for_write(self, writes: int):
+        """Wait until the parameters file has been written more than `writes` times."""
+        deadline = monotonic() + 5
+        while ParameterStore.writes() <= writes and monotonic() < deadline:
+            sleep(0.01)
+
+    def test_conversion_and_clamping(self):
+        count = ParameterStore.define(self.name('count'), 5, minimum=0, maximum=10)
+        with self.assertLogs('src.parameters', 'WARNING') as logs:
+            self.assertEqual(count.set(12), 10)
+            self.assertEqual(count.decrement(20), 0)
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(count.set(2.6), 3)
+        self.assertEqual(count.increment(2.4), 5)
+        self.assertIs(type(count.value), int)
+
+        delay = ParameterStore.define(self.name('delay'), 0.5, minimum=0.1)
+        self.assertEqual(delay.scale(0.5), 0.25)
+        self.assertEqual(delay.increment(ParameterStore.define(self.name('step'), 0.25)), 0.5)
+        self.assertEqual(delay.set(1), 1.0)
+        self.assertIs(type(delay.value), float)
+        self.assertEqual(delay.reset(), 0.5)
+        self.assertIs(ParameterStore.define(self.name('delay'), 2.0), delay)
+
+    def test_values_snapshot(self):
+        speed = ParameterStore.define(self.name('speed'), 1.0)
+        snapshot = ParameterStore.values()
+        speed.set(2.0)
+        self.assertEqual(snapshot[speed.name], 1.0)
+        self.assertEqual(ParameterStore.values()[speed.name], 2.0)
+        with self.assertRaises(TypeError):
+            snapshot[speed.name] = 3.0
+
+    def test_batched_persistence(self):
+        delay = ParameterStore.define(self.name('delay'), 0.5)
+        writes = ParameterStore.writes()
+        delay.set(0.6)
+        self.wait_for_write(writes)
+        with open(self.path, encoding='utf-8') as file:
+            self.assertEqual(json.load(file), {delay.name: 0.6})
+
+        writes = ParameterStore.writes()
+        for _ in range(50):
+            delay.increment(0.01)
+        self.wait_for_write(writes)
+        sleep(ParameterStore.FLUSH_DELAY * 3)
+        self.assertEqual(ParameterStore.writes(), writes + 1)
+        with open(self.path, encoding='utf-8') as file:
+            self.assertAlmostEqual(json.load(file)[delay.name], 1.1)
+
+    def test_reload(self):
+        names = [self.name(parameter) for parameter in ('count', 'label', 'limit', 'other')]
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(dict(zip(names, (7, "x", 99, 1))), file)
+        ParameterStore.use(self.path)
+
+        count = ParameterStore.define(names[0], 1)
+        with self.assertLogs('src.parameters', 'WARNING'):
+            label = ParameterStore.define(names[1], 1)  # a persisted value of the wrong type is ignored
+            limit = ParameterStore.define(names[2], 1, maximum=10)
+        self.assertEqual((count.value, label.value, limit.value), (7, 1, 10))
+
+        count.set(8)
+        ParameterStore.flush()
+        with open(self.path, encoding='utf-8') as file:
+            self.assertEqual(json.load(file), dict(zip(names, (8, "x", 99, 1))))  # undefined parameters are kept
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Recorder and Replay: round trip of the binary event log, recorded from the listeners of the null backend and
+replayed in a dry run.
+"""
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from src import backend
+from src.dry_run import DryRun
+from src.recorder import HEADER, MAGIC, RECORD, VERSION, EventKind, KeyEncoding, Recorder, decode_key, \
+    encode_key, read_events
+from src.replay import Replay
+
+Key = backend.NullKey
+KeyCode = backend.NullKeyCode
+Button = backend.NullButton
+
+
+def write_log(path: str, events: list, version: int = VERSION, magic: bytes = MAGIC) -> str:
+    """Write a log of (time in ns, kind, code, a, b) events."""
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(magic, version, RECORD.size, 0))
+        for event in events:
+            file.write(RECORD.pack(*event))
+    return path
+
+
+class RecorderTest(unittest.TestCase):
+    def setUp(self):
+        self.null = backend.use('null')
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "session.gbrl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+        backend.use(None)
+
+    def test_encode_decode(self):
+        for key, code in ((KeyCode('a'), KeyEncoding.CHAR), ('é', KeyEncoding.CHAR), (Key.shift, KeyEncoding.SPECIAL),
+                          (Key.f12, KeyEncoding.SPECIAL), (KeyCode(vk=200), KeyEncoding.VK)):
+            with self.subTest(key=key):
+                encoded = encode_key(key)
+                self.assertEqual(encoded[0], code)
+                self.assertEqual(decode_key(*encoded[:2]), KeyCode(key) if isinstance(key, str) else key)
+        self.assertIsNone(encode_key(KeyCode()))
+
+    def test_record_and_replay(self):
+        with Recorder(self.path, move_interval=0):
+            mouse, keyboard = self.null.listeners
+            mouse.move(10, 20)
+            mouse.click(10, 20, Button.left, True)
+            mouse.click(10, 20, Button.left, False)
+            mouse.scroll(12, 20, 0, -1)
+            keyboard.press(Key.shift)
+            keyboard.press(KeyCode('A'))
+            keyboard.release(KeyCode('A'))
+            keyboard.release(Key.shift)
+            keyboard.press(Key.esc)  # not recorded
+            keyboard.release(Key.esc)
+            keyboard.press(KeyCode(vk=200))  # still pressed at the end
+        events = list(read_events(self.path))
+        self.assertEqual([kind for _, kind, *_ in events],
+                         [EventKind.MOVE, EventKind.BUTTON_PRESS, EventKind.BUTTON_RELEASE, EventKind.MOVE,
+                          EventKind.SCROLL, EventKind.KEY_PRESS, EventKind.KEY_PRESS, EventKind.KEY_RELEASE,
+                          EventKind.KEY_RELEASE, EventKind.KEY_PRESS])
+        self.assertEqual(events, sorted(events))
+
+        with DryRun("replay") as dry_run:
+            stats = Replay(self.path).run()
+        self.assertEqual(stats.iterations, len(events))
+        self.assertEqual([event[1:] for event in dry_run.events], [
+            ('mouse', 'position', (10, 20)),
+            ('mouse', 'position', (10, 20)), ('mouse', 'press', (Button.left,)),
+            ('mouse', 'position', (10, 20)), ('mouse', 'release', (Button.left,)),
+            ('mouse', 'position', (12, 20)), ('mouse', 'scroll', (0, -1)),
+            ('keyboard', 'press', (Key.shift,)), ('keyboard', 'press', (KeyCode('A'),)),
+            ('keyboard', 'release', (KeyCode('A'),)), ('keyboard', 'release', (Key.shift,)),
+            ('keyboard', 'press', (KeyCode(vk=200),)),
+            ('keyboard', 'release', (KeyCode(vk=200),)),  # released at the end of the replay
+        ])
+        self.assertEqual(dry_run.backend.keyboard.pressed, set())
+
+    def test_truncated_log(self):
+        write_log(self.path, [(0, EventKind.MOVE, 0, 1, 2), (10, EventKind.MOVE, 0, 3, 4)])
+        with open(self.path, 'ab') as file:
+            file.write(RECORD.pack(20, EventKind.MOVE, 0, 5, 6)[:RECORD.size // 2])  # cut while writing
+        self.assertEqual(list(read_events(self.path, chunk_events=1)),
+                         [(0, EventKind.MOVE, 0, 1, 2), (10, EventKind.MOVE, 0, 3, 4)])
+
+    def test_invalid_header(self):
+        for name, write in (('empty', lambda path: open(path, 'wb').close()),
+                            ('magic', lambda path: write_log(path, [], magic=b'NOPE')),
+                            ('version', lambda path: write_log(path, [], version=VERSION + 1))):
+            with self.subTest(name):
+                write(self.path)
+                with self.assertRaises(ValueError):
+                    list(read_events(self.path))
+
+    def test_max_idle(self):
+        write_log(self.path, [(0, EventKind.MOVE, 0, 0, 0), (10_000_000_000, EventKind.MOVE, 0, 1, 1),
+                              (10_500_000_000, EventKind.MOVE, 0, 2, 2)])
+        for speed, times in ((1, [0, 1, 1.5]), (2, [0, 0.5, 0.75])):
+            with self.subTest(speed=speed), DryRun("idle") as dry_run:
+                Replay(self.path, speed=speed, max_idle=1).run()
+            self.assertEqual([round(event[0], 6) for event in dry_run.events], times)
+            self.assertAlmostEqual(dry_run.duration, times[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Emergency stop: every active run must reach FINISHED within STOP_LATENCY, with nothing left pressed.
+
+Runs on the null backend, so no display is needed: python -m pytest tests, or python -m unittest discover tests.
+"""
+import os
+import socket
+import unittest
+from contextlib import redirect_stdout
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+from src import backend
+from src.automation import Automation
+from src.cancellation import STOP_LATENCY
+from src.enums import RunState
+from src.keyboard_controller import KeyboardController as kc
+from src.mouse_controller import MouseController as mc
+from src.point import Point
+from src.registry import RunRegistry
+
+
+class EmergencyStopTest(unittest.TestCase):
+    def setUp(self):
+        self.null = backend.use('null')
+
+    def tearDown(self):
+        Automation.emergency_stop()
+        backend.use(None)
+
+    def assert_stopped_in_time(self, handles: list):
+        """Trigger an emergency stop and check that every run has finished within STOP_LATENCY."""
+        sleep(0.1)  # let the automations reach their long waits
+        self.assertTrue(all(handle.state == RunState.RUNNING for handle in handles))
+
+        start = perf_counter()
+        Automation.emergency_stop()
+        for handle in handles:
+            handle.join(max(start + STOP_LATENCY - perf_counter(), 0))
+        elapsed = perf_counter() - start
+
+        self.assertEqual([handle.state for handle in handles], [RunState.FINISHED] * len(handles))
+        self.assertLess(elapsed, STOP_LATENCY)
+        self.assertEqual(RunRegistry.count(), 0)
+        self.assertEqual(len(self.null.mouse.pressed) + len(self.null.keyboard.pressed), 0)
+
+    def test_loop(self):
+        with redirect_stdout(None):
+            handle = Automation.loop("long wait", lambda: mc.wait(21.5), blocking=False)
+        self.assert_stopped_in_time([handle])
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "serves the automation on a Unix domain socket")
+    def test_triggered_runs(self):
+        def drag():
+            mc.drag_offset(Point(0, 0), 500, 0, elapsed_time=30, definition=30)
+
+        def hotkey():
+            kc.hotkey(backend.Key.ctrl, backend.Key.shift, 'f', wait=30)
+
+        with TemporaryDirectory() as directory, redirect_stdout(None):
+            keystroke = Automation.keystroke("drag", drag, 'd', blocking=False)
+            server = Automation.serve({'hotkey': hotkey}, os.path.join(directory, "control.sock"), blocking=False)
+            keystroke.trigger.fire()
+            server.server.triggers['hotkey'].fire()
+            self.assert_stopped_in_time([keystroke, server])
+
+    def test_single_stop_keeps_other_keys(self):
+        with redirect_stdout(None):
+            holding = Automation.keystroke("hold", lambda: kc.hotkey(backend.Key.shift, 'h', wait=30), 'h',
+                                           blocking=False)
+            waiting = Automation.keystroke("wait", lambda: mc.wait(30), 'w', blocking=False)
+        holding.trigger.fire()
+        waiting.trigger.fire()
+        sleep(0.1)
+        pressed = set(self.null.keyboard.pressed)
+        self.assertEqual(len(pressed), 2)
+
+        waiting.stop()
+        self.assertTrue(waiting.join(STOP_LATENCY))
+        self.assertEqual(set(self.null.keyboard.pressed), pressed)
+        self.assertEqual(holding.state, RunState.RUNNING)
+
+
+if __name__ == "__main__":
+    unittest.main()